@@ -0,0 +1,117 @@
+"""
+Recall/latency benchmark of approximate FAISS index types against exact search.
+
+Vectors are read from a `.npy` file of shape (n, d), or generated at random.
+Each configuration is built through `FAISSVectorDB`, so the numbers include the
+chunk-id and metadata lookups done on every query.
+
+Examples:
+    $ python benchmarks/ann_benchmark.py --num-vectors 200000 --dimension 384
+    $ python benchmarks/ann_benchmark.py --vectors embeddings.npy --nprobe 4 8 16 32
+    $ python benchmarks/ann_benchmark.py --metric cosine --storage sq8
+"""
+
+import argparse
+import tempfile
+import time
+from typing import List, Optional, Set
+import numpy as np
+from src.config.vector_db_config import FAISSConfig
+from src.vector_db.faiss_db import FAISSVectorDB
+
+
+def build(config: FAISSConfig, vectors: np.ndarray) -> FAISSVectorDB:
+    """Build a vector database of the given configuration and report build time."""
+    start: float = time.perf_counter()
+    vector_db: FAISSVectorDB = FAISSVectorDB(config)
+    vector_db.add_embeddings(vectors, [{"text": ""}] * len(vectors))
+    print(f"  built {config.index_type} in {time.perf_counter() - start:.2f}s")
+    return vector_db
+
+
+def run(
+    vector_db: FAISSVectorDB,
+    queries: np.ndarray,
+    k: int,
+    truth: Optional[List[Set[int]]] = None,
+    **search_params: int,
+) -> List[Set[int]]:
+    """Search every query, print recall@k and latency, and return the hit ids."""
+    hits: List[Set[int]] = []
+    latencies: List[float] = []
+    for query in queries:
+        start: float = time.perf_counter()
+        results = vector_db.search(query, k, **search_params)
+        latencies.append(time.perf_counter() - start)
+        hits.append({result["index"] for result in results})
+
+    recall: float = (
+        np.mean([len(h & t) / k for h, t in zip(hits, truth)]) if truth else 1.0
+    )
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    label: str = ", ".join(f"{key}={value}" for key, value in search_params.items())
+    print(
+        f"  {vector_db.config.index_type:<8} {label:<14} recall@{k}={recall:.3f} "
+        f"p50={p50:.3f}ms p99={p99:.3f}ms"
+    )
+    return hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", help="Path to a .npy file of shape (n, d)")
+    parser.add_argument("--num-vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument(
+        "--metric", choices=["l2", "inner_product", "cosine"], default="l2"
+    )
+    parser.add_argument(
+        "--storage", choices=["float32", "float16", "sq8"], default="float32"
+    )
+    args = parser.parse_args()
+
+    rng: np.random.Generator = np.random.default_rng(0)
+    if args.vectors:
+        vectors: np.ndarray = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = rng.random((args.num_vectors, args.dimension), dtype=np.float32)
+    queries: np.ndarray = vectors[
+        rng.choice(len(vectors), size=args.num_queries, replace=False)
+    ]
+    queries = queries + rng.normal(0, 0.01, queries.shape).astype(np.float32)
+    print(
+        f"{len(vectors)} vectors, dimension {vectors.shape[1]}, {len(queries)} queries"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        def config(index_type: str) -> FAISSConfig:
+            return FAISSConfig(
+                index_path=f"{directory}/{index_type}.index",
+                index_type=index_type,
+                metric=args.metric,
+                storage=args.storage,
+                nlist=args.nlist,
+                hnsw_m=args.hnsw_m,
+                pq_m=args.pq_m,
+            )
+
+        truth: List[Set[int]] = run(build(config("flat"), vectors), queries, args.k)
+        for index_type in ("ivf_flat", "ivf_pq"):
+            vector_db: FAISSVectorDB = build(config(index_type), vectors)
+            for nprobe in args.nprobe:
+                run(vector_db, queries, args.k, truth, nprobe=nprobe)
+        vector_db = build(config("hnsw"), vectors)
+        for ef_search in args.ef_search:
+            run(vector_db, queries, args.k, truth, ef_search=ef_search)
+
+
+if __name__ == "__main__":
+    main()
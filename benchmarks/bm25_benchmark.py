@@ -0,0 +1,81 @@
+"""
+Latency benchmark of BM25 keyword lookup on a synthetic corpus.
+
+Chunks are bags of words drawn from a Zipf distribution, so a few terms are
+very common and most are rare, as in real text. Each query is one keyword
+drawn uniformly from the vocabulary (a name or part number) plus common words
+drawn from the same Zipf distribution as the chunks.
+
+Examples:
+    $ python benchmarks/bm25_benchmark.py --num-chunks 1000000
+    $ python benchmarks/bm25_benchmark.py --zipf 1.5 --common-terms-per-query 5
+"""
+
+import argparse
+import time
+from typing import List
+import numpy as np
+from src.config.search_config import HybridSearchConfig
+from src.lexical_index import BM25Index
+
+
+def build(
+    rng: np.random.Generator, args: argparse.Namespace, vocabulary: List[str]
+) -> BM25Index:
+    """Build an index of random chunks and report build time."""
+    start: float = time.perf_counter()
+    index: BM25Index = BM25Index(HybridSearchConfig())
+    batch: int = 10_000
+    for first in range(0, args.num_chunks, batch):
+        count: int = min(batch, args.num_chunks - first)
+        words: np.ndarray = (
+            np.minimum(
+                rng.zipf(args.zipf, size=(count, args.words_per_chunk)), len(vocabulary)
+            )
+            - 1
+        )
+        index.add(
+            list(range(first, first + count)),
+            [" ".join(vocabulary[word] for word in row) for row in words],
+        )
+    index.compact()
+    print(f"  built {len(index)} chunks in {time.perf_counter() - start:.1f}s")
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--num-chunks", type=int, default=200_000)
+    parser.add_argument("--vocabulary-size", type=int, default=200_000)
+    parser.add_argument("--words-per-chunk", type=int, default=60)
+    parser.add_argument("--zipf", type=float, default=1.3)
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--common-terms-per-query", type=int, default=3)
+    parser.add_argument("-k", type=int, default=50)
+    args = parser.parse_args()
+
+    rng: np.random.Generator = np.random.default_rng(0)
+    vocabulary: List[str] = [f"term{i}" for i in range(args.vocabulary_size)]
+    index: BM25Index = build(rng, args, vocabulary)
+
+    queries: List[str] = [
+        " ".join(
+            [vocabulary[rng.integers(args.vocabulary_size)]]
+            + [
+                vocabulary[min(int(word), args.vocabulary_size) - 1]
+                for word in rng.zipf(args.zipf, size=args.common_terms_per_query)
+            ]
+        )
+        for _ in range(args.num_queries)
+    ]
+    latencies: List[float] = []
+    for query in queries:
+        start: float = time.perf_counter()
+        index.search(query, args.k)
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(f"  top-{args.k} lookup p50={p50:.3f}ms p99={p99:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark of the overhead of stage metrics on query latency.
+
+A query is modelled as the stages RAGSystem times, with a FAISS flat search
+over `--num-vectors` random vectors as the only real work, so the overhead is
+measured against the cheapest stage rather than against generation. Each
+query is run bare, with metrics disabled (NullMetrics) and with Prometheus
+metrics enabled, and the per-span cost is reported next to the query latency.
+
+Examples:
+    $ python benchmarks/metrics_benchmark.py --num-vectors 100000 --num-queries 2000
+    $ python benchmarks/metrics_benchmark.py --num-vectors 1000
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+import faiss
+import numpy as np
+from src.config.metrics_config import MetricsConfig
+from src.metrics import Metrics, NullMetrics, PrometheusMetrics
+
+_STAGES: List[str] = [
+    "query.embed",
+    "query.search",
+    "query.fuse",
+    "query.rerank",
+    "query.prompt",
+    "query.generate",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--num-vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=1000)
+    parser.add_argument("--spans", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng: np.random.Generator = np.random.default_rng(0)
+    index: faiss.IndexFlatIP = faiss.IndexFlatIP(args.dimension)
+    index.add(rng.random((args.num_vectors, args.dimension), dtype=np.float32))
+    queries: np.ndarray = rng.random(
+        (args.num_queries, args.dimension), dtype=np.float32
+    )
+
+    def bare(query: np.ndarray) -> None:
+        index.search(query, 5)
+
+    def instrumented(metrics: Metrics) -> Callable[[np.ndarray], None]:
+        def run(query: np.ndarray) -> None:
+            with metrics.span("query"):
+                metrics.increment("queries")
+                for stage in _STAGES:
+                    with metrics.span(stage):
+                        if stage == "query.search":
+                            index.search(query, 5)
+
+        return run
+
+    print(
+        f"{args.num_vectors} vectors of dimension {args.dimension}, "
+        f"{args.num_queries} queries, {len(_STAGES) + 1} spans per query"
+    )
+    variants: Dict[str, Callable[[np.ndarray], None]] = {
+        "bare": bare,
+        "disabled": instrumented(NullMetrics()),
+        "prometheus": instrumented(PrometheusMetrics(MetricsConfig())),
+    }
+    for name, run in variants.items():
+        latencies: List[float] = []
+        for query in queries:
+            started: float = time.perf_counter()
+            run(query[None, :])
+            latencies.append(time.perf_counter() - started)
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        print(f"  {name:<10} query p50={p50:.3f}ms p99={p99:.3f}ms")
+
+    for name, metrics in [
+        ("disabled", NullMetrics()),
+        ("prometheus", PrometheusMetrics(MetricsConfig())),
+    ]:
+        started = time.perf_counter()
+        for _ in range(args.spans):
+            with metrics.span("query.search"):
+                pass
+        per_span: float = (time.perf_counter() - started) / args.spans
+        print(f"  {name:<10} {per_span * 1e9:.0f}ns per span")
+
+
+if __name__ == "__main__":
+    main()
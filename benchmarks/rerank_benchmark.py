@@ -0,0 +1,90 @@
+"""
+Benchmark of reranking many candidates against sending more chunks unranked.
+
+Each query retrieves `--candidates` chunks of Zipf-distributed filler words.
+One of them also contains the query phrase and is placed at a uniformly random
+retrieval rank, as when the embedding ranks the answer anywhere in the top 50.
+The benchmark compares passing the reranked top `--rerank-k` chunks with
+passing the top `--dense-k` chunks in retrieval order: how often the answer is
+included, how many context tokens the prompt carries, and the reranking time.
+
+Examples:
+    $ python benchmarks/rerank_benchmark.py --candidates 50 --rerank-k 3 --dense-k 10
+    $ python benchmarks/rerank_benchmark.py --words-per-chunk 400 --budget-ms 5
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List
+import numpy as np
+from src.config.rerank_config import LexicalRerankerConfig
+from src.context_builder import ContextBuilder
+from src.rerankers.lexical_reranker import LexicalReranker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--rerank-k", type=int, default=3)
+    parser.add_argument("--dense-k", type=int, default=10)
+    parser.add_argument("--words-per-chunk", type=int, default=200)
+    parser.add_argument("--vocabulary-size", type=int, default=50_000)
+    parser.add_argument("--zipf", type=float, default=1.3)
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    rng: np.random.Generator = np.random.default_rng(0)
+    vocabulary: List[str] = [f"term{i}" for i in range(args.vocabulary_size)]
+    reranker: LexicalReranker = LexicalReranker(
+        LexicalRerankerConfig(
+            candidates=args.candidates,
+            batch_size=args.candidates,
+            budget_ms=args.budget_ms,
+        )
+    )
+
+    def filler(count: int) -> str:
+        words: np.ndarray = np.minimum(rng.zipf(args.zipf, size=count), len(vocabulary))
+        return " ".join(vocabulary[word - 1] for word in words)
+
+    found: Dict[str, int] = {"reranked": 0, "dense": 0}
+    tokens: Dict[str, int] = {"reranked": 0, "dense": 0}
+    latencies: List[float] = []
+    for _ in range(args.num_queries):
+        phrase: str = " ".join(
+            f"answer{word}" for word in rng.integers(1_000_000, size=3)
+        )
+        query: str = f"how does {phrase} work"
+        docs: List[Dict[str, Any]] = [
+            {"index": i, "text": filler(args.words_per_chunk)}
+            for i in range(args.candidates)
+        ]
+        answer: int = int(rng.integers(args.candidates))
+        docs[answer]["text"] += f" {phrase}"
+
+        start: float = time.perf_counter()
+        reranked: List[Dict[str, Any]] = reranker.rerank(query, docs, args.rerank_k)
+        latencies.append(time.perf_counter() - start)
+        for name, selected in (("reranked", reranked), ("dense", docs[: args.dense_k])):
+            found[name] += any(doc["index"] == answer for doc in selected)
+            tokens[name] += sum(
+                ContextBuilder.count_tokens(doc["text"]) for doc in selected
+            )
+
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(
+        f"  rerank {args.candidates} -> {args.rerank_k}: "
+        f"answer in context {found['reranked'] / args.num_queries:.1%}, "
+        f"{tokens['reranked'] / args.num_queries:.0f} context tokens, "
+        f"rerank p50={p50:.2f}ms p99={p99:.2f}ms, {reranker.fallbacks} fallbacks"
+    )
+    print(
+        f"  dense top {args.dense_k}:   "
+        f"answer in context {found['dense'] / args.num_queries:.1%}, "
+        f"{tokens['dense'] / args.num_queries:.0f} context tokens"
+    )
+
+
+if __name__ == "__main__":
+    main()
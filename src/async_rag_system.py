@@ -0,0 +1,186 @@
+import asyncio
+from typing import List, Optional
+from .config.cache_config import EmbeddingCacheConfig, QueryCacheConfig
+from .config.context_config import ContextConfig
+from .config.data_source_config import DataSourceConfig
+from .config.dedup_config import DedupConfig
+from .config.metrics_config import MetricsConfig
+from .config.search_config import HybridSearchConfig
+from .config.rerank_config import RerankerConfig
+from .config.model_config import ModelConfig
+from .config.vector_db_config import VectorDBConfig
+from .query_cache import QueryCache
+from .rag_system import RAGSystem
+from .vector_db.metadata_columns import MetadataFilter
+
+
+class AsyncRAGSystem(RAGSystem):
+    """
+    Asyncio-native counterpart of RAGSystem for use inside async web servers.
+
+    Embedding and generation use the model's async methods (`ollama.AsyncClient`
+    for Ollama), and retrieval runs in the event loop's default thread pool
+    executor, so no step blocks the loop. At most `max_concurrent_queries`
+    queries are processed at once; further callers wait their turn. Cancelling
+    a query task cancels the in-flight model request. Indexing is inherited
+    from RAGSystem and stays synchronous.
+
+    Examples:
+        >>> rag = AsyncRAGSystem(ollama_config, faiss_config, pdf_config)
+        >>> rag.index_data()
+        >>> response = await rag.aquery("Your question here")
+        >>> print(response)
+        'RAG response here'
+    """
+
+    def __init__(
+        self,
+        model_config: ModelConfig,
+        vector_db_config: VectorDBConfig,
+        data_source_config: DataSourceConfig,
+        embedding_cache_config: Optional[EmbeddingCacheConfig] = None,
+        max_concurrent_queries: int = 64,
+        dedup_config: Optional[DedupConfig] = None,
+        query_cache_config: Optional[QueryCacheConfig] = None,
+        hybrid_search_config: Optional[HybridSearchConfig] = None,
+        context_config: Optional[ContextConfig] = None,
+        embedding_model_config: Optional[ModelConfig] = None,
+        reranker_config: Optional[RerankerConfig] = None,
+        metrics_config: Optional[MetricsConfig] = None,
+    ) -> None:
+        """
+        Initialize async RAG system.
+
+        Args:
+            model_config: Configuration for the language model
+            vector_db_config: Configuration for the vector database
+            data_source_config: Configuration for the data source
+            embedding_cache_config: Optional configuration for a persistent
+                embedding cache placed in front of the language model
+            max_concurrent_queries: Maximum number of queries processed at once
+            dedup_config: Optional configuration for eliminating exact and
+                near-duplicate chunks before they are embedded
+            query_cache_config: Optional configuration for a cache of query
+                responses, looked up by exact and by semantic match
+            hybrid_search_config: Optional configuration for fusing BM25
+                keyword search with vector search
+            context_config: Optional configuration for packing retrieved
+                chunks into the prompt; defaults to `ContextConfig()`
+            embedding_model_config: Optional configuration for a separate
+                embedding model; by default `model_config` also embeds
+            reranker_config: Optional configuration for rescoring retrieved
+                chunks before the best `k` are put in the prompt
+            metrics_config: Optional configuration for recording stage
+                latencies and counters in `metrics`
+
+        Returns:
+            None
+
+        Examples:
+            >>> rag = AsyncRAGSystem(ollama_config, faiss_config, pdf_config, max_concurrent_queries=16)
+        """
+        super().__init__(
+            model_config,
+            vector_db_config,
+            data_source_config,
+            embedding_cache_config,
+            dedup_config=dedup_config,
+            query_cache_config=query_cache_config,
+            hybrid_search_config=hybrid_search_config,
+            context_config=context_config,
+            embedding_model_config=embedding_model_config,
+            reranker_config=reranker_config,
+            metrics_config=metrics_config,
+        )
+        self.max_concurrent_queries: int = max_concurrent_queries
+        self._query_slots: asyncio.Semaphore = asyncio.Semaphore(max_concurrent_queries)
+
+    async def aquery(
+        self, query: str, k: int = 5, where: Optional[MetadataFilter] = None
+    ) -> str:
+        """
+        Process a query asynchronously and return the response.
+
+        Exact cache hits are returned without waiting for a query slot.
+        Filtered queries bypass the cache. Stages are timed in `metrics` as
+        by `query`; `query` includes the time spent waiting for a slot.
+
+        Args:
+            query: User question string
+            k: Number of similar documents to retrieve
+            where: Optional filter restricting retrieval to chunks whose
+                metadata matches
+
+        Returns:
+            Generated response string
+
+        Examples:
+            >>> response = await rag.aquery("Your question here")
+            >>> isinstance(response, str)
+            True
+        """
+        with self.metrics.span("query"):
+            self.metrics.increment("queries")
+            query_cache: Optional[QueryCache] = (
+                self.query_cache if where is None else None
+            )
+            if query_cache is not None:
+                cached: Optional[str] = query_cache.get(query, k)
+                if cached is not None:
+                    self.metrics.increment("query_cache_hits")
+                    return cached
+            async with self._query_slots:
+                with self.metrics.span("query.embed"):
+                    query_embedding: List[float] = await self.model.aget_embeddings(
+                        query
+                    )
+                if query_cache is not None:
+                    cached = query_cache.get_similar(query_embedding, k)
+                    if cached is not None:
+                        self.metrics.increment("query_cache_hits")
+                        return cached
+                    self.metrics.increment("query_cache_misses")
+                similar_docs: List[
+                    dict[str, str]
+                ] = await asyncio.get_running_loop().run_in_executor(
+                    None, self._retrieve, query, query_embedding, k, where
+                )
+                prompt: str = self._build_prompt(query, similar_docs)
+                with self.metrics.span("query.generate"):
+                    response: str = await self.model.agenerate(prompt)
+                if query_cache is not None:
+                    query_cache.put(query, k, query_embedding, response)
+                return response
+
+    async def aquery_batch(
+        self, queries: List[str], k: int = 5, where: Optional[MetadataFilter] = None
+    ) -> List[str]:
+        """
+        Process many queries concurrently and return their responses in input order.
+
+        Concurrency is bounded by `max_concurrent_queries`. If any query fails,
+        or the batch is cancelled, the remaining queries are cancelled.
+
+        Args:
+            queries: User question strings
+            k: Number of similar documents to retrieve per query
+            where: Optional filter restricting retrieval to chunks whose
+                metadata matches, for every query
+
+        Returns:
+            Generated response strings, one per query
+
+        Examples:
+            >>> responses = await rag.aquery_batch(["First question", "Second question"])
+            >>> len(responses)
+            2
+        """
+        tasks: List[asyncio.Task[str]] = [
+            asyncio.ensure_future(self.aquery(query, k, where)) for query in queries
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+
+
+class EmbeddingCacheConfig(BaseModel):
+    """
+    Configuration for the persistent embedding cache.
+
+    Examples:
+        >>> config = EmbeddingCacheConfig(cache_path="/path/to/embeddings.sqlite")
+        >>> print(config.max_entries)
+        100000
+    """
+
+    cache_path: str = Field(..., description="Path to the SQLite cache file")
+    max_entries: int = Field(
+        100_000, ge=1, description="Maximum number of cached embeddings (LRU evicted)"
+    )
+
+
+class QueryCacheConfig(BaseModel):
+    """
+    Configuration for the in-memory semantic query-result cache.
+
+    Examples:
+        >>> config = QueryCacheConfig(similarity_threshold=0.97, ttl_seconds=600)
+        >>> print(config.max_entries)
+        1024
+    """
+
+    similarity_threshold: float = Field(
+        0.95,
+        gt=0.0,
+        le=1.0,
+        description="Minimum cosine similarity for a past query to answer a new one",
+    )
+    max_entries: int = Field(
+        1024, ge=1, description="Maximum number of cached responses (LRU evicted)"
+    )
+    ttl_seconds: float = Field(
+        3600.0, gt=0.0, description="Seconds a cached response stays valid"
+    )
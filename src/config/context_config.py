@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+
+
+class ContextConfig(BaseModel):
+    """
+    Configuration for packing retrieved chunks into the prompt context.
+
+    Examples:
+        >>> config = ContextConfig(max_tokens=1024)
+        >>> print(config.duplicate_threshold)
+        0.8
+    """
+
+    max_tokens: int = Field(
+        2048, ge=1, description="Maximum number of context tokens in a prompt"
+    )
+    duplicate_threshold: float = Field(
+        0.8,
+        gt=0.0,
+        le=1.0,
+        description="Jaccard similarity of word shingles above which passages are near-duplicates",
+    )
+    merge_gap: int = Field(
+        2,
+        ge=0,
+        description="Maximum number of characters between chunks of a document that are merged",
+    )
@@ -1,3 +1,4 @@
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 
 
@@ -15,6 +16,23 @@ class PDFConfig(DataSourceConfig):
         >>> config = PDFConfig(pdf_path="/path/to/document.pdf")
         >>> print(config.pdf_path)
         '/path/to/document.pdf'
+        >>> config = PDFConfig(pdf_path=["/path/to/manuals", "/path/to/reports/*.pdf"])
     """
 
-    pdf_path: str = Field(..., description="Path to the PDF file")
+    pdf_path: Union[str, List[str]] = Field(
+        ...,
+        description="Path to a PDF file, a directory, a glob pattern, or a list of these",
+    )
+    max_workers: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Processes used to extract text; defaults to the number of CPUs",
+    )
+    pages_per_task: int = Field(
+        16,
+        ge=1,
+        description=(
+            "Pages extracted per worker task; bounds the pages held in memory "
+            "and spreads the pages of large files across workers"
+        ),
+    )
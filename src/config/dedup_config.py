@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+
+
+class DedupConfig(BaseModel):
+    """
+    Configuration for near-duplicate chunk elimination during indexing.
+
+    Examples:
+        >>> config = DedupConfig(threshold=0.9)
+        >>> print(config.num_perm)
+        128
+    """
+
+    threshold: float = Field(
+        0.85,
+        gt=0.0,
+        le=1.0,
+        description="Estimated Jaccard similarity above which chunks are near-duplicates",
+    )
+    num_perm: int = Field(
+        128, ge=8, description="Number of MinHash permutations per signature"
+    )
+    shingle_size: int = Field(
+        3, ge=1, description="Number of consecutive words per shingle"
+    )
@@ -0,0 +1,39 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class MetricsConfig(BaseModel):
+    """
+    Configuration for stage latency and counter metrics.
+
+    Examples:
+        >>> config = MetricsConfig(namespace="docs_qa")
+        >>> print(config.buckets[0])
+        0.001
+    """
+
+    namespace: str = Field(
+        "rag",
+        pattern=r"^[a-zA-Z_][a-zA-Z0-9_]*$",
+        description="Prefix of every exported metric name",
+    )
+    buckets: List[float] = Field(
+        default_factory=lambda: [
+            0.001,
+            0.0025,
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.1,
+            0.25,
+            0.5,
+            1.0,
+            2.5,
+            5.0,
+            10.0,
+            30.0,
+        ],
+        min_length=1,
+        description="Upper bounds in seconds of the latency histogram buckets",
+    )
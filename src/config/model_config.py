@@ -1,3 +1,4 @@
+from typing import Optional, Union
 from pydantic import Field, BaseModel
 
 
@@ -12,9 +13,68 @@ class OllamaConfig(ModelConfig):
     Configuration for Ollama models.
 
     Examples:
-        >>> config = OllamaConfig(model_name="llama2")
-        >>> print(config.model_name)
+        >>> config = OllamaConfig(llm_model="llama2")
+        >>> print(config.llm_model)
         'llama2'
+        >>> config = OllamaConfig(llm_model="llama2", embedding_batch_size=64)
+        >>> print(config.embedding_batch_size)
+        64
+        >>> config = OllamaConfig(llm_model="llama2", keep_alive=-1, num_ctx=8192, prewarm=True)
+        >>> config = OllamaConfig(llm_model="llama3.2:1b", embedding_model="nomic-embed-text")
     """
 
     llm_model: str = Field(..., description="Name of the Ollama model")
+    embedding_model: Optional[str] = Field(
+        None,
+        description="Name of the Ollama model used for embeddings; None uses `llm_model`",
+    )
+    embedding_batch_size: int = Field(
+        32, ge=1, description="Maximum number of texts sent in one embedding request"
+    )
+    max_concurrent_requests: int = Field(
+        4, ge=1, description="Maximum number of embedding requests in flight"
+    )
+    keep_alive: Union[str, float] = Field(
+        "30m",
+        description="How long Ollama keeps the model loaded after a request, as a duration such as '30m' or in seconds; negative keeps it loaded",
+    )
+    num_ctx: Optional[int] = Field(
+        None, ge=1, description="Context window in tokens; None uses the model default"
+    )
+    prewarm: bool = Field(
+        False,
+        description="Load the model and evaluate the fixed prompt prefix when the RAG system starts",
+    )
+
+
+class ONNXEmbeddingConfig(ModelConfig):
+    """
+    Configuration for in-process sentence embeddings with an ONNX model on CPU.
+
+    The model is a transformer encoder exported to ONNX, such as
+    all-MiniLM-L6-v2, with the `tokenizer.json` of its Hugging Face tokenizer.
+
+    Examples:
+        >>> config = ONNXEmbeddingConfig(
+        ...     model_path="/models/all-MiniLM-L6-v2/model.onnx",
+        ...     tokenizer_path="/models/all-MiniLM-L6-v2/tokenizer.json",
+        ... )
+        >>> print(config.batch_size)
+        32
+    """
+
+    model_path: str = Field(..., description="Path to the ONNX model file")
+    tokenizer_path: str = Field(
+        ..., description="Path to the tokenizer.json file of the model"
+    )
+    batch_size: int = Field(32, ge=1, description="Maximum number of texts per batch")
+    max_length: int = Field(
+        256,
+        ge=1,
+        description="Maximum number of tokens per text; longer texts are truncated",
+    )
+    num_threads: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Number of CPU threads per batch; None lets ONNX Runtime decide",
+    )
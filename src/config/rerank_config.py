@@ -0,0 +1,71 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class RerankerConfig(BaseModel):
+    """Base configuration for rerankers."""
+
+    candidates: int = Field(
+        50, ge=1, description="Retrieved chunks rescored for each query"
+    )
+    batch_size: int = Field(
+        64, ge=1, description="Maximum number of chunks scored in one batch"
+    )
+    budget_ms: float = Field(
+        100.0,
+        ge=0.0,
+        description="Per-query reranking time budget in milliseconds, after which retrieval order is kept; 0 disables it",
+    )
+
+
+class LexicalRerankerConfig(RerankerConfig):
+    """
+    Configuration for reranking by query-term overlap.
+
+    Examples:
+        >>> config = LexicalRerankerConfig(candidates=30)
+        >>> print(config.bigram_weight)
+        0.5
+    """
+
+    bigram_weight: float = Field(
+        0.5,
+        ge=0.0,
+        description="Weight of the share of query bigrams found next to each other in a chunk",
+    )
+
+
+class CrossEncoderRerankerConfig(RerankerConfig):
+    """
+    Configuration for reranking with an ONNX cross-encoder on CPU.
+
+    The model is a cross-encoder exported to ONNX, such as
+    ms-marco-MiniLM-L-6-v2, with the `tokenizer.json` of its Hugging Face
+    tokenizer.
+
+    Examples:
+        >>> config = CrossEncoderRerankerConfig(
+        ...     model_path="/models/ms-marco-MiniLM-L-6-v2/model.onnx",
+        ...     tokenizer_path="/models/ms-marco-MiniLM-L-6-v2/tokenizer.json",
+        ... )
+        >>> print(config.batch_size)
+        16
+    """
+
+    model_path: str = Field(..., description="Path to the ONNX model file")
+    tokenizer_path: str = Field(
+        ..., description="Path to the tokenizer.json file of the model"
+    )
+    batch_size: int = Field(
+        16, ge=1, description="Maximum number of chunks scored in one batch"
+    )
+    max_length: int = Field(
+        512,
+        ge=1,
+        description="Maximum number of tokens per query and chunk pair; chunks are truncated",
+    )
+    num_threads: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Number of CPU threads per batch; None lets ONNX Runtime decide",
+    )
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+
+
+class HybridSearchConfig(BaseModel):
+    """
+    Configuration for hybrid BM25 + vector retrieval.
+
+    Examples:
+        >>> config = HybridSearchConfig(candidates=100)
+        >>> print(config.rrf_k)
+        60
+    """
+
+    k1: float = Field(1.2, ge=0.0, description="BM25 term-frequency saturation")
+    b: float = Field(0.75, ge=0.0, le=1.0, description="BM25 length normalisation")
+    rrf_k: int = Field(
+        60, ge=1, description="Reciprocal rank fusion constant added to each rank"
+    )
+    candidates: int = Field(
+        50, ge=1, description="Results taken from each retriever before fusion"
+    )
@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic import Field, BaseModel
 
 
@@ -11,10 +12,94 @@ class FAISSConfig(VectorDBConfig):
     """
     Configuration for FAISS vector database.
 
+    `index_type` selects exact search (`flat`) or an approximate index:
+    `ivf_flat` and `ivf_pq` partition vectors into `nlist` cells and probe
+    `nprobe` of them per query, while `hnsw` builds a graph with `hnsw_m`
+    links per node and explores `ef_search` candidates per query. IVF
+    indexes are trained once `training_sample_size` vectors are stored, or
+    at a checkpoint once 39 vectors per centroid are; until then vectors are
+    kept in a flat index and searched exactly.
+
+    `metric` selects L2 distance, inner product, or cosine similarity (inner
+    product over vectors normalised to unit length). `storage` keeps vectors
+    as float32, float16 (half the memory) or 8-bit scalar-quantised codes (a
+    quarter); it applies to `flat`, `ivf_flat` and `hnsw`, since `ivf_pq`
+    vectors are already compressed. Like IVF, `sq8` vectors are kept in a
+    flat index until their value ranges are trained, once
+    `training_sample_size` vectors are stored or at the next checkpoint.
+
     Examples:
         >>> config = FAISSConfig(index_path="/path/to/faiss/index")
         >>> print(config.index_path)
         '/path/to/faiss/index'
+        >>> config = FAISSConfig(index_path="/path/to/faiss/index", index_type="hnsw")
+        >>> print(config.ef_search)
+        64
+        >>> config = FAISSConfig(index_path="/path/to/faiss/index", metric="cosine", storage="float16")
     """
 
     index_path: str = Field(..., description="Path to the FAISS index")
+    index_type: Literal["flat", "ivf_flat", "ivf_pq", "hnsw"] = Field(
+        "flat", description="FAISS index structure"
+    )
+    metric: Literal["l2", "inner_product", "cosine"] = Field(
+        "l2", description="Similarity metric; cosine normalises vectors to unit length"
+    )
+    storage: Literal["float32", "float16", "sq8"] = Field(
+        "float32", description="Precision of stored vectors, except for ivf_pq"
+    )
+    nlist: int = Field(1024, ge=1, description="Number of IVF cells")
+    nprobe: int = Field(16, ge=1, description="IVF cells probed per query")
+    pq_m: int = Field(
+        16, ge=1, description="PQ sub-quantizers; must divide the dimension"
+    )
+    pq_nbits: int = Field(8, ge=1, le=16, description="Bits per PQ sub-quantizer code")
+    hnsw_m: int = Field(32, ge=2, description="HNSW links per node")
+    ef_construction: int = Field(40, ge=1, description="HNSW build-time breadth")
+    ef_search: int = Field(64, ge=1, description="HNSW search-time breadth")
+    max_deleted_fraction: float = Field(
+        0.1,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of HNSW vectors kept as deleted tombstones before a checkpoint rebuilds the graph",
+    )
+    training_sample_size: int = Field(
+        100_000,
+        ge=1,
+        description="Vectors used to train IVF/PQ and sq8 ranges; such indexes stay flat until this many are stored",
+    )
+    read_only: bool = Field(
+        False, description="Memory-map the saved index read-only, for serving"
+    )
+    autosave_vectors: int = Field(
+        100_000,
+        ge=0,
+        description="Pending changes that trigger a checkpoint (0 disables)",
+    )
+    autosave_seconds: float = Field(
+        300.0,
+        ge=0,
+        description="Seconds between checkpoints while changing (0 disables)",
+    )
+
+
+class ShardedFAISSConfig(FAISSConfig):
+    """
+    Configuration for a FAISS vector database split across several shards.
+
+    Every shard is a FAISS index of the configured type, stored next to
+    `index_path` as `<index_path>.shard<i>`. Autosave thresholds apply to each
+    shard separately.
+
+    Examples:
+        >>> config = ShardedFAISSConfig(index_path="/path/to/faiss/index", num_shards=8)
+        >>> print(config.num_shards)
+        8
+    """
+
+    num_shards: int = Field(4, ge=1, description="Number of shard indexes")
+    max_workers: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Threads searching shards in parallel; None uses one per shard",
+    )
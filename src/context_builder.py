@@ -0,0 +1,183 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+from .config.context_config import ContextConfig
+from .text_splitter.recursive_splitter import _TOKEN_PATTERN
+
+_WORD_PATTERN: re.Pattern = re.compile(r"\w+")
+_SHINGLE_SIZE: int = 3
+
+
+@dataclass
+class _Passage:
+    """A run of retrieved text, merged from one or more chunks of a document."""
+
+    doc: Dict[str, Any]
+    text: str
+    rank: int
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+    def to_doc(self) -> Dict[str, Any]:
+        """Return the passage as a retrieved document."""
+        if self.start is None:
+            return {**self.doc, "text": self.text}
+        return {**self.doc, "text": self.text, "start": self.start, "end": self.end}
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks into a prompt context within a token budget.
+
+    Chunks of the same document whose `start`/`end` offsets overlap or lie at
+    most `merge_gap` characters apart are merged into one passage, so text
+    shared by overlapping chunks is sent once. Passages that are
+    near-duplicates of a better-ranked one, by Jaccard similarity of their word
+    shingles, are dropped. The rest are added best first while they fit in
+    `max_tokens`; a passage that does not fit is skipped in favour of smaller
+    ones further down, and if not even the best one fits it is truncated.
+
+    Tokens are counted as by RecursiveTextSplitter, so the budget is in the
+    same units as the chunk size.
+
+    Examples:
+        >>> builder = ContextBuilder(ContextConfig(max_tokens=512))
+        >>> docs = [
+        ...     {"text": "b c d", "document_id": "a.pdf#page=1", "start": 2, "end": 7},
+        ...     {"text": "a b c", "document_id": "a.pdf#page=1", "start": 0, "end": 5},
+        ... ]
+        >>> builder.build(docs)
+        'a b c d'
+    """
+
+    def __init__(self, config: ContextConfig) -> None:
+        """
+        Initialize the context builder.
+
+        Args:
+            config (ContextConfig): Configuration object for context packing.
+        """
+        self.max_tokens: int = config.max_tokens
+        self.duplicate_threshold: float = config.duplicate_threshold
+        self.merge_gap: int = config.merge_gap
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """
+        Count the words and punctuation marks in a text.
+
+        Args:
+            text (str): The text to measure.
+
+        Returns:
+            int: Number of tokens.
+
+        Examples:
+            >>> ContextBuilder.count_tokens("Hello, world!")
+            4
+        """
+        return sum(1 for _ in _TOKEN_PATTERN.finditer(text))
+
+    def pack(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge, deduplicate and select retrieved documents for the context.
+
+        Args:
+            docs (List[Dict[str, Any]]): Retrieved documents, most relevant first.
+
+        Returns:
+            List[Dict[str, Any]]: Selected passages, most relevant first. Merged
+                passages keep the metadata of their best-ranked chunk, with
+                `text`, `start` and `end` covering the merged span.
+        """
+        kept: List[_Passage] = []
+        kept_shingles: List[Set[str]] = []
+        for passage in sorted(self._merge(docs), key=lambda passage: passage.rank):
+            shingles: Set[str] = self._shingles(passage.text)
+            if any(
+                len(shingles & other)
+                >= self.duplicate_threshold * len(shingles | other)
+                for other in kept_shingles
+            ):
+                continue
+            kept.append(passage)
+            kept_shingles.append(shingles)
+
+        packed: List[Dict[str, Any]] = []
+        remaining: int = self.max_tokens
+        for passage in kept:
+            tokens: int = self.count_tokens(passage.text)
+            if tokens <= remaining:
+                packed.append(passage.to_doc())
+                remaining -= tokens
+            elif not packed:
+                passage.text = self._truncate(passage.text, remaining)
+                packed.append(passage.to_doc())
+                remaining = 0
+            if remaining == 0:
+                break
+        return packed
+
+    def build(self, docs: List[Dict[str, Any]]) -> str:
+        """
+        Build the context text for retrieved documents.
+
+        Args:
+            docs (List[Dict[str, Any]]): Retrieved documents, most relevant first.
+
+        Returns:
+            str: The selected passages separated by blank lines.
+        """
+        return "\n\n".join(doc["text"] for doc in self.pack(docs))
+
+    def _merge(self, docs: List[Dict[str, Any]]) -> List[_Passage]:
+        """Merge overlapping and adjacent chunks of the same document."""
+        passages: List[_Passage] = []
+        by_document: Dict[str, List[_Passage]] = {}
+        for rank, doc in enumerate(docs):
+            if "document_id" in doc and "start" in doc and "end" in doc:
+                by_document.setdefault(doc["document_id"], []).append(
+                    _Passage(doc, doc["text"], rank, doc["start"], doc["end"])
+                )
+            else:
+                passages.append(_Passage(doc, doc["text"], rank))
+
+        for group in by_document.values():
+            group.sort(key=lambda passage: passage.start)
+            current: _Passage = group[0]
+            for passage in group[1:]:
+                if passage.start > current.end + self.merge_gap:
+                    passages.append(current)
+                    current = passage
+                    continue
+                best: _Passage = current if current.rank <= passage.rank else passage
+                if passage.end > current.end:
+                    # Chunk texts are slices of the document text, so the part
+                    # of `passage` past `current` starts at their offset difference
+                    separator: str = " " if passage.start > current.end else ""
+                    current.text += (
+                        separator + passage.text[max(current.end - passage.start, 0) :]
+                    )
+                    current.end = passage.end
+                current.doc, current.rank = best.doc, best.rank
+            passages.append(current)
+        return passages
+
+    @staticmethod
+    def _shingles(text: str) -> Set[str]:
+        """Return the set of lowercase word shingles of a text."""
+        words: List[str] = _WORD_PATTERN.findall(text.lower())
+        size: int = min(_SHINGLE_SIZE, len(words)) or 1
+        return {
+            " ".join(words[i : i + size]) for i in range(max(1, len(words) - size + 1))
+        }
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        """Cut a text after its first `max_tokens` tokens."""
+        end: int = 0
+        for count, match in enumerate(_TOKEN_PATTERN.finditer(text), start=1):
+            if count > max_tokens:
+                break
+            end = match.end()
+        return text[:end]
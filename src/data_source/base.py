@@ -1,5 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, Iterator, List
+from pydantic import BaseModel, Field
+
+
+class Document(BaseModel):
+    """
+    A document read from a data source.
+
+    Examples:
+        >>> document = Document(
+        ...     id="/path/to/document.pdf#page=1",
+        ...     text="This is the content of the first page...",
+        ...     metadata={"source": "/path/to/document.pdf", "page": 1},
+        ... )
+    """
+
+    id: str = Field(..., description="Stable document id")
+    text: str = Field(..., description="Text content of the document")
+    metadata: Dict[str, Any] = Field(
+        default_factory=dict, description="Source metadata, such as file and page"
+    )
 
 
 class DataSource(ABC):
@@ -17,3 +37,34 @@ class DataSource(ABC):
             5
         """
         raise NotImplementedError  # pragma: no cover
+
+    def load_documents(self) -> Dict[str, str]:
+        """
+        Load data from the source keyed by a stable document id.
+
+        The default implementation keys the output of `load_data` by position.
+
+        Examples:
+            >>> data_source = PDFDataSource(PDFConfig(pdf_path="/path/to/document.pdf"))
+            >>> documents = data_source.load_documents()
+            >>> print(list(documents)[0])
+            '/path/to/document.pdf#page=1'
+        """
+        return {str(position): text for position, text in enumerate(self.load_data())}
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Iterate over the documents of the source.
+
+        The default implementation iterates over `load_documents`. Sources that
+        can read documents one at a time should override it and yield them
+        lazily, so ingestion can start on the first document right away and
+        memory stays bounded.
+
+        Examples:
+            >>> for document in data_source.iter_documents():
+            ...     print(document.id, document.metadata)
+            /path/to/document.pdf#page=1 {'source': '/path/to/document.pdf', 'page': 1, 'offset': 0}
+        """
+        for document_id, text in self.load_documents().items():
+            yield Document(id=document_id, text=text)
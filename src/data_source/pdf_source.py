@@ -1,14 +1,82 @@
-from typing import List
-from .base import DataSource
+import glob
+import itertools
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import (
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+from .base import DataSource, Document
 from ..config.data_source_config import PDFConfig
 import PyPDF2
 
+logger = logging.getLogger(__name__)
+
+# A unit of extraction work: file path, first page and end page (exclusive).
+_PageRange = Tuple[str, int, Optional[int]]
+
+
+def _iter_pages(task: _PageRange) -> Iterator[str]:
+    """
+    Extract the text of a range of pages from a PDF file, one page at a time.
+
+    Args:
+        task (_PageRange): File path, first page and end page (exclusive, None for the last page).
+
+    Returns:
+        Iterator[str]: Text content of each page in the range.
+    """
+    path, start, stop = task
+    with open(path, "rb") as file:
+        reader: PyPDF2.PdfReader = PyPDF2.PdfReader(file)
+        for page in reader.pages[start:stop]:
+            yield page.extract_text()
+
+
+def _extract_pages(task: _PageRange) -> List[str]:
+    """
+    Extract the text of a range of pages from a PDF file.
+
+    Runs in a worker process, so it must stay a picklable module-level function.
+
+    Args:
+        task (_PageRange): File path, first page and end page (exclusive, None for the last page).
+
+    Returns:
+        List[str]: Text content of each page in the range.
+    """
+    return list(_iter_pages(task))
+
+
+def _count_pages(path: str) -> int:
+    """Return the number of pages in a PDF file."""
+    with open(path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
 
 class PDFDataSource(DataSource):
     """
     PDF implementation of DataSource.
 
-    This class provides methods to load data from PDF files.
+    This class provides methods to load data from one or many PDF files. Text
+    extraction is CPU-bound, so page ranges of the files are spread across a
+    process pool.
+
+    Worker processes are spawned, so each one imports the main script again:
+    scripts loading more than one task with `max_workers > 1` must guard their
+    entry point with `if __name__ == "__main__":`. If the workers fail to
+    start, extraction falls back to the calling process.
 
     Examples:
         >>> from ..config.data_source_config import PDFConfig
@@ -31,11 +99,165 @@ class PDFDataSource(DataSource):
             >>> config = PDFConfig(pdf_path="/path/to/document.pdf")
             >>> pdf_source = PDFDataSource(config)
         """
-        self.pdf_path: str = config.pdf_path
+        self.pdf_path: Union[str, List[str]] = config.pdf_path
+        self.max_workers: int = config.max_workers or os.cpu_count() or 1
+        self.pages_per_task: int = config.pages_per_task
+
+    def resolve_paths(self) -> List[str]:
+        """
+        Expand the configured paths, directories and glob patterns into PDF files.
+
+        Directories are searched recursively. Paths are returned in sorted order
+        within each pattern, without duplicates.
+
+        Returns:
+            List[str]: Paths of the PDF files to load.
+
+        Examples:
+            >>> pdf_source = PDFDataSource(PDFConfig(pdf_path=["/data/a.pdf", "/data/manuals"]))
+            >>> print(pdf_source.resolve_paths())
+            ['/data/a.pdf', '/data/manuals/b.pdf', '/data/manuals/c.pdf']
+        """
+        patterns: List[str] = (
+            [self.pdf_path] if isinstance(self.pdf_path, str) else list(self.pdf_path)
+        )
+        paths: List[str] = []
+        for pattern in patterns:
+            if os.path.isdir(pattern):
+                paths.extend(
+                    path
+                    for path in sorted(
+                        glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+                    )
+                    if path.lower().endswith(".pdf") and os.path.isfile(path)
+                )
+            elif any(character in pattern for character in "*?["):
+                paths.extend(sorted(glob.glob(pattern, recursive=True)))
+            else:
+                paths.append(pattern)
+        return list(dict.fromkeys(paths))
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Lazily extract pages from all PDF files, in file and page order.
+
+        With `max_workers=1`, or a single file of at most `pages_per_task`
+        pages, pages are extracted in-process one at a time, so only the
+        current page is held in memory. Otherwise files are split into tasks
+        of `pages_per_task` pages, run on a process pool of `max_workers`
+        spawned processes with at most two tasks per worker in flight, so
+        about `2 * max_workers * pages_per_task` pages at most are held in
+        memory whatever the size of the files. Workers also count the pages of the
+        upcoming files. If the pool breaks, e.g. because an unguarded main
+        script failed to import in the workers, the remaining pages are
+        extracted in-process.
+
+        Returns:
+            Iterator[Document]: One document per page, with `source`, `page` and
+                `offset` metadata. `offset` is the character offset of the page
+                within the text of its file.
+
+        Examples:
+            >>> pdf_source = PDFDataSource(PDFConfig(pdf_path="/path/to/manuals"))
+            >>> page = next(pdf_source.iter_documents())
+            >>> print(page.id, page.metadata)
+            /path/to/manuals/a.pdf#page=1 {'source': '/path/to/manuals/a.pdf', 'page': 1, 'offset': 0}
+        """
+        paths: List[str] = self.resolve_paths()
+        if (
+            self.max_workers == 1
+            or not paths
+            or (len(paths) == 1 and _count_pages(paths[0]) <= self.pages_per_task)
+        ):
+            yield from self._to_documents(self._extract_in_process(paths, 0))
+            return
+        # Workers are spawned rather than forked, as the ingestion pipeline
+        # iterates documents on one of several threads
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            yield from self._to_documents(self._extract_in_pool(executor, paths))
+
+    @staticmethod
+    def _extract_in_process(
+        paths: List[str], start: int
+    ) -> Iterator[Tuple[_PageRange, Iterator[str]]]:
+        """Extract whole files lazily, the first one from page `start` on."""
+        for path in paths:
+            task: _PageRange = (path, start, None)
+            yield task, _iter_pages(task)
+            start = 0
+
+    def _page_ranges(
+        self, executor: ProcessPoolExecutor, paths: List[str]
+    ) -> Iterator[_PageRange]:
+        """Split files into page ranges, counting pages on the pool ahead of use."""
+        window: int = self.max_workers * 2
+        upcoming: Iterator[str] = iter(paths)
+        counts: Deque[Tuple[str, Future]] = deque(
+            (path, executor.submit(_count_pages, path))
+            for path in itertools.islice(upcoming, window)
+        )
+        while counts:
+            path, count = counts.popleft()
+            page_count: int = count.result()
+            for next_path in itertools.islice(upcoming, 1):
+                counts.append((next_path, executor.submit(_count_pages, next_path)))
+            for start in range(0, page_count, self.pages_per_task):
+                yield path, start, min(start + self.pages_per_task, page_count)
+
+    def _extract_in_pool(
+        self, executor: ProcessPoolExecutor, paths: List[str]
+    ) -> Iterator[Tuple[_PageRange, List[str]]]:
+        """Run tasks on the pool in order, keeping a bounded window of futures."""
+        window: int = self.max_workers * 2
+        # Next page to produce, as an index into `paths` and a page number
+        position: Tuple[int, int] = (0, 0)
+        try:
+            tasks: Iterator[_PageRange] = self._page_ranges(executor, paths)
+            pending: Deque[Tuple[_PageRange, Future]] = deque(
+                (task, executor.submit(_extract_pages, task))
+                for task in itertools.islice(tasks, window)
+            )
+            while pending:
+                task, future = pending[0]
+                texts: List[str] = future.result()
+                pending.popleft()
+                for next_task in itertools.islice(tasks, 1):
+                    pending.append(
+                        (next_task, executor.submit(_extract_pages, next_task))
+                    )
+                position = (paths.index(task[0], position[0]), cast(int, task[2]))
+                yield task, texts
+        except BrokenProcessPool:
+            logger.warning(
+                "PDF extraction workers died, extracting in-process instead; "
+                'guard the main script with `if __name__ == "__main__":`'
+            )
+            yield from self._extract_in_process(paths[position[0] :], position[1])
+
+    @staticmethod
+    def _to_documents(
+        results: Iterable[Tuple[_PageRange, Iterable[str]]],
+    ) -> Iterator[Document]:
+        """Attach source, page and offset metadata to extracted page texts."""
+        offset: int = 0
+        previous_path: Optional[str] = None
+        for (path, start, _), texts in results:
+            if path != previous_path:
+                offset, previous_path = 0, path
+            for number, text in enumerate(texts, start=start + 1):
+                yield Document(
+                    id=f"{path}#page={number}",
+                    text=text,
+                    metadata={"source": path, "page": number, "offset": offset},
+                )
+                offset += len(text)
 
     def load_data(self) -> List[str]:
         """
-        Load data from PDF file.
+        Load data from the PDF files.
 
         Returns:
             List[str]: A list of strings, where each string represents the text content of a page.
@@ -48,6 +270,19 @@ class PDFDataSource(DataSource):
             >>> print(documents[0][:50])
             'This is the content of the first page of the PDF...'
         """
-        with open(self.pdf_path, "rb") as file:
-            reader: PyPDF2.PdfReader = PyPDF2.PdfReader(file)
-            return [page.extract_text() for page in reader.pages]
+        return [page.text for page in self.iter_documents()]
+
+    def load_documents(self) -> Dict[str, str]:
+        """
+        Load data from the PDF files, keyed by file path and page number.
+
+        Returns:
+            Dict[str, str]: Page texts keyed by ids of the form `<pdf_path>#page=<n>`.
+
+        Examples:
+            >>> pdf_source = PDFDataSource(PDFConfig(pdf_path="/path/to/document.pdf"))
+            >>> documents = pdf_source.load_documents()
+            >>> print(list(documents))
+            ['/path/to/document.pdf#page=1', '/path/to/document.pdf#page=2']
+        """
+        return {page.id: page.text for page in self.iter_documents()}
@@ -0,0 +1,267 @@
+import hashlib
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from .config.dedup_config import DedupConfig
+from .manifest import IndexManifest
+
+# A prime just above 2**32; a * x stays below 2**64 for 32-bit a and x.
+_PRIME: int = 4_294_967_311
+_WORD_PATTERN: re.Pattern = re.compile(r"\w+")
+
+
+def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick the LSH band layout for a similarity threshold.
+
+    Returns the `(bands, rows)` split of `num_perm` whose candidate threshold
+    `(1 / bands) ** (1 / rows)` is closest to, but not above, `threshold`, so
+    that recall is favoured and candidates are then verified exactly.
+    """
+    layouts: List[Tuple[int, int]] = [
+        (num_perm // rows, rows)
+        for rows in range(1, num_perm + 1)
+        if num_perm % rows == 0
+    ]
+    below: List[Tuple[int, int]] = [
+        layout for layout in layouts if (1 / layout[0]) ** (1 / layout[1]) <= threshold
+    ]
+    return max(
+        below or layouts[:1], key=lambda layout: (1 / layout[0]) ** (1 / layout[1])
+    )
+
+
+class ChunkDeduplicator:
+    """
+    Finds exact and near-duplicate chunks before they are embedded.
+
+    Exact duplicates are found by hashing whitespace- and case-normalised text.
+    Near-duplicates are found with MinHash signatures over word shingles,
+    indexed with locality-sensitive hashing (LSH) bands; LSH candidates are
+    kept only if their estimated Jaccard similarity reaches `threshold`.
+
+    Duplicate chunks reuse the id of the chunk already stored, so several
+    manifest records can reference one embedding. References are counted from
+    the manifest, and an embedding is only released for deletion once no
+    document references it.
+
+    Examples:
+        >>> dedup = ChunkDeduplicator(DedupConfig(threshold=0.85))
+        >>> dedup.count_references(manifest)
+        >>> dedup.add("Copyright 2024 ACME Corp. All rights reserved.", 1)
+        >>> dedup.find("Copyright 2024 ACME Corp.  All rights reserved.")
+        1
+    """
+
+    def __init__(self, config: DedupConfig) -> None:
+        """
+        Initialize an empty deduplication index.
+
+        Args:
+            config (DedupConfig): Configuration object for deduplication.
+        """
+        self.threshold: float = config.threshold
+        self.num_perm: int = config.num_perm
+        self.shingle_size: int = config.shingle_size
+        self.bands, self.rows = _choose_bands(self.num_perm, self.threshold)
+        generator: np.random.Generator = np.random.default_rng(0x5EED)
+        self._a: np.ndarray = generator.integers(
+            1, 2**32, size=(self.num_perm, 1), dtype=np.uint64
+        )
+        self._b: np.ndarray = generator.integers(
+            0, 2**32, size=(self.num_perm, 1), dtype=np.uint64
+        )
+        self._hashes: Dict[str, int] = {}
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(self.bands)]
+        self._references: Counter = Counter()
+
+    @staticmethod
+    def _normalise(text: str) -> str:
+        """Lowercase the text and collapse runs of whitespace."""
+        return " ".join(text.lower().split())
+
+    def _exact_key(self, text: str) -> str:
+        """Hash of the normalised text, used to catch exact duplicates."""
+        return hashlib.blake2b(
+            self._normalise(text).encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text over its word shingles.
+
+        Args:
+            text (str): The text to sign.
+
+        Returns:
+            np.ndarray: A `(num_perm,)` uint64 signature.
+        """
+        words: List[str] = _WORD_PATTERN.findall(text.lower())
+        size: int = min(self.shingle_size, len(words)) or 1
+        shingles: Set[str] = {
+            " ".join(words[i : i + size]) for i in range(max(1, len(words) - size + 1))
+        }
+        values: np.ndarray = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        return (((self._a * values) % _PRIME + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        """Yield the LSH bucket key of each band of a signature."""
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows].tobytes()
+
+    def find(self, text: str) -> Optional[int]:
+        """
+        Find a stored chunk that duplicates `text`.
+
+        Only chunks that are still referenced are returned.
+
+        Args:
+            text (str): The chunk text.
+
+        Returns:
+            Optional[int]: Id of the duplicate chunk, or None if the text is new.
+        """
+        exact: Optional[int] = self._hashes.get(self._exact_key(text))
+        if exact is not None and self._references[exact] > 0:
+            return exact
+
+        signature: np.ndarray = self.signature(text)
+        candidates: Set[int] = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        best: Optional[int] = None
+        best_similarity: float = self.threshold
+        for candidate in candidates:
+            if self._references[candidate] <= 0:
+                continue
+            similarity: float = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+
+    def add(self, text: str, chunk_id: int) -> None:
+        """
+        Register a new chunk and take one reference to it.
+
+        Args:
+            text (str): The chunk text.
+            chunk_id (int): Id under which the chunk is stored.
+        """
+        self._hashes[self._exact_key(text)] = chunk_id
+        self._insert_signature(chunk_id, self.signature(text))
+        self._references[chunk_id] += 1
+
+    def _insert_signature(self, chunk_id: int, signature: np.ndarray) -> None:
+        """Index a signature in the LSH buckets."""
+        self._signatures[chunk_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, set()).add(chunk_id)
+
+    def acquire(self, chunk_id: int) -> None:
+        """
+        Take one more reference to a stored chunk.
+
+        Args:
+            chunk_id (int): Id of the chunk.
+        """
+        self._references[chunk_id] += 1
+
+    def release(self, chunk_ids: Iterable[int]) -> List[int]:
+        """
+        Drop one reference to each chunk.
+
+        Args:
+            chunk_ids (Iterable[int]): Ids of the chunks, one entry per reference.
+
+        Returns:
+            List[int]: Ids that are no longer referenced and can be deleted.
+        """
+        unreferenced: List[int] = []
+        for chunk_id in chunk_ids:
+            self._references[chunk_id] -= 1
+            if self._references[chunk_id] <= 0:
+                del self._references[chunk_id]
+                unreferenced.append(chunk_id)
+        return unreferenced
+
+    def count_references(self, manifest: IndexManifest) -> None:
+        """
+        Reset reference counts to those recorded in a manifest.
+
+        Args:
+            manifest (IndexManifest): Manifest of indexed documents.
+        """
+        self._references = Counter(
+            chunk_id
+            for record in manifest.documents.values()
+            for chunk_id in record.chunk_ids
+        )
+
+    @classmethod
+    def load(cls, path: str, config: DedupConfig) -> "ChunkDeduplicator":
+        """
+        Load a deduplication index from disk, or create an empty one.
+
+        Signatures computed with a different `num_perm` or `shingle_size` are
+        discarded; exact hashes are always kept.
+
+        Args:
+            path (str): Path to the `.npz` index file.
+            config (DedupConfig): Configuration object for deduplication.
+
+        Returns:
+            ChunkDeduplicator: The loaded index.
+        """
+        dedup: ChunkDeduplicator = cls(config)
+        if not os.path.exists(path):
+            return dedup
+        with np.load(path) as data:
+            dedup._hashes = dict(
+                zip(data["hash_keys"].tolist(), data["hash_ids"].tolist())
+            )
+            if (
+                data["signatures"].shape[1:] == (dedup.num_perm,)
+                and int(data["shingle_size"]) == dedup.shingle_size
+            ):
+                for chunk_id, signature in zip(
+                    data["signature_ids"].tolist(), data["signatures"]
+                ):
+                    dedup._insert_signature(chunk_id, signature)
+        return dedup
+
+    def save(self, path: str) -> None:
+        """
+        Atomically write the index to disk, dropping unreferenced chunks.
+
+        Args:
+            path (str): Path to the `.npz` index file.
+        """
+        hashes: Dict[str, int] = {
+            key: chunk_id
+            for key, chunk_id in self._hashes.items()
+            if self._references[chunk_id] > 0
+        }
+        signature_ids: List[int] = [
+            chunk_id for chunk_id in self._signatures if self._references[chunk_id] > 0
+        ]
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                hash_keys=np.array(list(hashes), dtype="U32"),
+                hash_ids=np.array(list(hashes.values()), dtype=np.int64),
+                signature_ids=np.array(signature_ids, dtype=np.int64),
+                signatures=np.array(
+                    [self._signatures[chunk_id] for chunk_id in signature_ids],
+                    dtype=np.uint64,
+                ).reshape(-1, self.num_perm),
+                shingle_size=np.int64(self.shingle_size),
+            )
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,346 @@
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from .data_source.base import DataSource
+from .dedup import ChunkDeduplicator
+from .lexical_index import BM25Index
+from .manifest import DocumentRecord, IndexManifest, chunk_id, content_hash
+from .metrics import Metrics, NullMetrics
+from .models.base import LanguageModel
+from .text_splitter.base import TextSplitter
+from .vector_db.base import VectorDB
+
+
+@dataclass
+class _Chunk:
+    """A chunk waiting to be embedded."""
+
+    text: str
+    id: int
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class _Delete:
+    """Chunk ids of a changed document that must be removed."""
+
+    ids: List[int]
+
+
+@dataclass
+class _Commit:
+    """Manifest entry to record once all chunks of a document are indexed."""
+
+    document_id: str
+    record: DocumentRecord
+
+
+@dataclass
+class _Batch:
+    """An embedded batch, with the deletions and commits that precede and follow it."""
+
+    embeddings: List[List[float]] = field(default_factory=list)
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+    ids: List[int] = field(default_factory=list)
+    deleted_ids: List[int] = field(default_factory=list)
+    commits: List[_Commit] = field(default_factory=list)
+
+
+_DONE: object = object()
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class IngestionPipeline:
+    """
+    Streaming, bounded-memory ingestion from a data source into a vector database.
+
+    Three stages run concurrently and are connected by bounded queues:
+
+    1. a splitter thread reads documents lazily from the data source, skips the
+       ones whose content hash matches the manifest, and splits the rest; with
+       a `ChunkDeduplicator`, chunks duplicating a stored chunk are not
+       embedded again but reference the stored chunk's id;
+    2. an embedder thread groups chunks into batches of `batch_size` and embeds
+       them with `get_embeddings_batch`;
+    3. the calling thread adds each embedded batch to the vector database,
+       and to the BM25 index if one is given.
+
+    At most `queue_size` batches are buffered between stages, so memory use does
+    not grow with the corpus. A document is recorded in the manifest only once
+    all its chunks have been added. Documents missing from the source are
+    deleted when the run completes. An exception in any stage stops the other
+    stages and is re-raised.
+
+    With a `Metrics` sink, splitting a document, embedding a batch, adding a
+    batch and applying deletions are timed as the `index.split`,
+    `index.embed`, `index.add` and `index.delete` stages, and the
+    `chunks_embedded`, `chunks_deduplicated`, `vectors_added` and
+    `vectors_deleted` counters are kept; time spent waiting on the queues is
+    not counted.
+
+    Examples:
+        >>> pipeline = IngestionPipeline(
+        ...     data_source, text_splitter, model, vector_db, manifest, batch_size=256
+        ... )
+        >>> pipeline.run()
+        >>> print(pipeline.chunks_indexed)
+        1024
+    """
+
+    def __init__(
+        self,
+        data_source: DataSource,
+        text_splitter: TextSplitter,
+        model: LanguageModel,
+        vector_db: VectorDB,
+        manifest: IndexManifest,
+        batch_size: int = 256,
+        queue_size: int = 4,
+        dedup: Optional[ChunkDeduplicator] = None,
+        lexical_index: Optional[BM25Index] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            data_source: Source of the documents to index
+            text_splitter: Splitter used to chunk new or changed documents
+            model: Language model used to embed chunks
+            vector_db: Vector database receiving the embeddings
+            manifest: Manifest of indexed documents, updated in place
+            batch_size: Number of chunks per embedding call
+            queue_size: Number of batches buffered between stages
+            dedup: Optional deduplicator; chunks it matches reuse the stored
+                embedding of their duplicate instead of being embedded
+            lexical_index: Optional BM25 index kept in step with the vector
+                database
+            metrics: Optional sink for stage latencies and counters
+
+        Returns:
+            None
+        """
+        self.data_source: DataSource = data_source
+        self.text_splitter: TextSplitter = text_splitter
+        self.model: LanguageModel = model
+        self.vector_db: VectorDB = vector_db
+        self.manifest: IndexManifest = manifest
+        self.batch_size: int = batch_size
+        self.queue_size: int = queue_size
+        self.dedup: Optional[ChunkDeduplicator] = dedup
+        self.lexical_index: Optional[BM25Index] = lexical_index
+        self.metrics: Metrics = metrics if metrics is not None else NullMetrics()
+        self.chunks_indexed: int = 0
+        self.chunks_deduplicated: int = 0
+        self.chunks_deleted: int = 0
+        self.documents_deleted: int = 0
+        self._seen: Set[str] = set()
+        self._stop: threading.Event = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self) -> None:
+        """
+        Run all stages to completion.
+
+        Raises:
+            Exception: The first exception raised by any stage.
+        """
+        if self.dedup is not None:
+            self.dedup.count_references(self.manifest)
+        chunks: queue.Queue = queue.Queue(maxsize=self.batch_size * self.queue_size)
+        batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        threads: List[threading.Thread] = [
+            threading.Thread(
+                target=self._guard, args=(self._split, chunks), daemon=True
+            ),
+            threading.Thread(
+                target=self._guard, args=(self._embed, chunks, batches), daemon=True
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self._guard(self._index, batches)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._errors:
+            raise self._errors[0]
+        self._delete_missing_documents()
+
+    def _guard(self, stage: Callable[..., None], *queues: queue.Queue) -> None:
+        """Run a stage, recording its failure and stopping the other stages."""
+        try:
+            stage(*queues)
+        except _Stopped:
+            pass
+        except BaseException as error:
+            self._errors.append(error)
+            self._stop.set()
+
+    def _put(self, target: queue.Queue, item: object) -> None:
+        """Put an item on a queue, giving up if another stage has failed."""
+        while True:
+            if self._stop.is_set():
+                raise _Stopped
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Get an item from a queue, giving up if another stage has failed."""
+        while True:
+            if self._stop.is_set():
+                raise _Stopped
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _split(self, chunks: queue.Queue) -> None:
+        """Stage 1: read, change-detect and split documents."""
+        for document in self.data_source.iter_documents():
+            document_id: str = document.id
+            self._seen.add(document_id)
+            document_hash: str = content_hash(document.text)
+            record: Optional[DocumentRecord] = self.manifest.documents.get(document_id)
+            if record is not None and record.content_hash == document_hash:
+                continue
+            if record is not None and record.chunk_ids:
+                stale_ids: List[int] = self._release(record.chunk_ids)
+                if stale_ids:
+                    self._put(chunks, _Delete(stale_ids))
+
+            with self.metrics.span("index.split"):
+                offsets: List[Tuple[int, int]] = list(
+                    self.text_splitter.split_offsets(document.text)
+                )
+            ids: List[int] = []
+            for position, (start, end) in enumerate(offsets):
+                chunk: str = document.text[start:end]
+                if self.dedup is not None:
+                    duplicate: Optional[int] = self.dedup.find(chunk)
+                    if duplicate is not None:
+                        # Reuse the stored embedding instead of embedding again
+                        self.dedup.acquire(duplicate)
+                        ids.append(duplicate)
+                        self.chunks_deduplicated += 1
+                        self.metrics.increment("chunks_deduplicated")
+                        continue
+                ids.append(chunk_id(document_id, document_hash, position))
+                if self.dedup is not None:
+                    self.dedup.add(chunk, ids[-1])
+                metadata: Dict[str, Any] = {
+                    **document.metadata,
+                    "text": chunk,
+                    "document_id": document_id,
+                    "start": start,
+                    "end": end,
+                }
+                self._put(chunks, _Chunk(chunk, ids[-1], metadata))
+            self._put(
+                chunks,
+                _Commit(
+                    document_id,
+                    DocumentRecord(
+                        content_hash=document_hash,
+                        chunk_ids=ids,
+                        chunk_offsets=offsets,
+                        metadata=document.metadata,
+                    ),
+                ),
+            )
+        self._put(chunks, _DONE)
+
+    def _embed(self, chunks: queue.Queue, batches: queue.Queue) -> None:
+        """Stage 2: group chunks into batches and embed them."""
+        pending: List[_Chunk] = []
+        batch: _Batch = _Batch()
+        while True:
+            item: Union[_Chunk, _Delete, _Commit, object] = self._get(chunks)
+            if isinstance(item, _Chunk):
+                pending.append(item)
+            elif isinstance(item, _Delete):
+                batch.deleted_ids.extend(item.ids)
+            elif isinstance(item, _Commit):
+                batch.commits.append(item)
+
+            done: bool = item is _DONE
+            has_work: bool = bool(pending or batch.commits or batch.deleted_ids)
+            if len(pending) >= self.batch_size or (done and has_work):
+                # A document's commit always follows its chunks, so it travels
+                # in the batch holding its last chunk or a later one.
+                if pending:
+                    with self.metrics.span("index.embed"):
+                        batch.embeddings = self.model.get_embeddings_batch(
+                            [chunk.text for chunk in pending]
+                        )
+                    self.metrics.increment("chunks_embedded", len(pending))
+                    batch.metadata = [chunk.metadata for chunk in pending]
+                    batch.ids = [chunk.id for chunk in pending]
+                self._put(batches, batch)
+                batch, pending = _Batch(), []
+            if done:
+                self._put(batches, _DONE)
+                return
+
+    def _index(self, batches: queue.Queue) -> None:
+        """Stage 3: apply deletions, add embeddings and record manifest entries."""
+        while True:
+            batch: Union[_Batch, object] = self._get(batches)
+            if batch is _DONE:
+                return
+            if batch.deleted_ids:
+                self._delete(batch.deleted_ids)
+            if batch.ids:
+                with self.metrics.span("index.add"):
+                    self.vector_db.add_embeddings(
+                        batch.embeddings, batch.metadata, batch.ids
+                    )
+                    if self.lexical_index is not None:
+                        self.lexical_index.add(
+                            batch.ids,
+                            [metadata["text"] for metadata in batch.metadata],
+                        )
+                self.chunks_indexed += len(batch.ids)
+                self.metrics.increment("vectors_added", len(batch.ids))
+            for commit in batch.commits:
+                self.manifest.documents[commit.document_id] = commit.record
+
+    def _delete(self, chunk_ids: List[int]) -> None:
+        """Remove chunks from the vector database and the BM25 index."""
+        with self.metrics.span("index.delete"):
+            self.vector_db.delete_embeddings(chunk_ids)
+            if self.lexical_index is not None:
+                self.lexical_index.remove(chunk_ids)
+        self.chunks_deleted += len(chunk_ids)
+        self.metrics.increment("vectors_deleted", len(chunk_ids))
+
+    def _release(self, chunk_ids: List[int]) -> List[int]:
+        """Return the ids of a removed document version that can be deleted."""
+        if self.dedup is None:
+            return chunk_ids
+        return self.dedup.release(chunk_ids)
+
+    def _delete_missing_documents(self) -> None:
+        """Remove documents that are in the manifest but no longer in the source."""
+        missing: List[str] = [
+            document_id
+            for document_id in self.manifest.documents
+            if document_id not in self._seen
+        ]
+        stale_ids: List[int] = []
+        for document_id in missing:
+            stale_ids.extend(
+                self._release(self.manifest.documents.pop(document_id).chunk_ids)
+            )
+        if stale_ids:
+            self._delete(stale_ids)
+        self.documents_deleted = len(missing)
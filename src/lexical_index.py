@@ -0,0 +1,537 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .config.search_config import HybridSearchConfig
+
+_TOKEN_PATTERN: re.Pattern = re.compile(r"\w+(?:[-./]\w+)*")
+_TOKEN_SEPARATORS: re.Pattern = re.compile(r"[-./]")
+
+# Rows, term frequencies, idf and champion postings of a query term
+_Term = Tuple[np.ndarray, np.ndarray, float, Optional[Tuple[np.ndarray, np.ndarray]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for lexical search.
+
+    Compound tokens such as part numbers, versions or file names are kept whole
+    and are also indexed by their parts, so both `ab-1234` and `1234` match.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: Terms in order of occurrence.
+
+    Examples:
+        >>> tokenize("Replace part AB-1234 (v2.1).")
+        ['replace', 'part', 'ab-1234', 'ab', '1234', 'v2.1', 'v2', '1']
+    """
+    terms: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        term: str = match.group()
+        terms.append(term)
+        if _TOKEN_SEPARATORS.search(term):
+            terms.extend(_TOKEN_SEPARATORS.split(term))
+    return terms
+
+
+class BM25Index:
+    """
+    Compact in-process inverted index with BM25 scoring.
+
+    Postings are stored in CSR form: for term id `t`, the rows of the documents
+    containing it are `postings[offsets[t]:offsets[t + 1]]` and their term
+    frequencies are the same slice of `frequencies`. A lookup touches only the
+    postings of the query terms, so it stays fast as the index grows.
+
+    Documents added after the last `compact()` are kept in small per-term delta
+    lists, and deleted documents are masked out; `save()` compacts both into
+    the arrays. Documents are identified by their chunk ids.
+
+    Examples:
+        >>> index = BM25Index(HybridSearchConfig())
+        >>> index.add([10, 11], ["Replace filter AB-1234", "Clean the filter housing"])
+        >>> index.search("ab-1234", k=1)
+        [(10, 1.98...)]
+    """
+
+    _COMPACT_MIN: int = 1_000_000
+    # Terms in more documents than this keep a champion list of their
+    # `_CHAMPIONS` highest-impact postings
+    _CHAMPION_MIN: int = 4096
+    _CHAMPIONS: int = 1024
+
+    def __init__(self, config: HybridSearchConfig) -> None:
+        """
+        Initialize an empty index.
+
+        Args:
+            config (HybridSearchConfig): Configuration object for hybrid search.
+        """
+        self.k1: float = config.k1
+        self.b: float = config.b
+        self._vocabulary: Dict[str, int] = {}
+        self._offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self._postings: np.ndarray = np.empty(0, dtype=np.int32)
+        self._frequencies: np.ndarray = np.empty(0, dtype=np.int32)
+        self._champion_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self._champion_rows: np.ndarray = np.empty(0, dtype=np.int32)
+        self._champion_frequencies: np.ndarray = np.empty(0, dtype=np.int32)
+        self._delta: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._delta_postings: int = 0
+        self._size: int = 0
+        self._doc_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self._lengths: np.ndarray = np.empty(0, dtype=np.int32)
+        self._alive: np.ndarray = np.empty(0, dtype=bool)
+        self._alive_count: int = 0
+        self._total_length: int = 0
+        # Compacted rows are found through their ids in ascending order, newer
+        # rows through a dict
+        self._base_sorted_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self._base_order: np.ndarray = np.empty(0, dtype=np.int64)
+        self._delta_rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return self._alive_count
+
+    def _reserve(self, count: int) -> None:
+        """Grow the per-document arrays to hold `count` more documents."""
+        needed: int = self._size + count
+        if needed <= len(self._doc_ids):
+            return
+        capacity: int = max(needed, 2 * len(self._doc_ids), 1024)
+        for name in ("_doc_ids", "_lengths", "_alive"):
+            array: np.ndarray = getattr(self, name)
+            grown: np.ndarray = np.zeros(capacity, dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            setattr(self, name, grown)
+
+    def add(self, ids: List[int], texts: List[str]) -> None:
+        """
+        Index documents under their chunk ids, replacing existing ones.
+
+        Args:
+            ids (List[int]): Chunk ids of the documents.
+            texts (List[str]): Text of each document.
+        """
+        self.remove(ids)
+        self._reserve(len(ids))
+        for chunk_id, text in zip(ids, texts):
+            counts: Counter = Counter(tokenize(text))
+            row: int = self._size
+            length: int = sum(counts.values())
+            self._doc_ids[row] = chunk_id
+            self._delta_rows[chunk_id] = row
+            self._lengths[row] = length
+            self._alive[row] = True
+            self._size += 1
+            self._alive_count += 1
+            self._total_length += length
+            for term, frequency in counts.items():
+                term_id: int = self._vocabulary.setdefault(term, len(self._vocabulary))
+                rows, frequencies = self._delta.setdefault(term_id, ([], []))
+                rows.append(row)
+                frequencies.append(frequency)
+            self._delta_postings += len(counts)
+        # Delta lists cost far more memory per posting than the arrays, so fold
+        # them in once they reach half the compacted size (amortised linear)
+        if self._delta_postings >= max(self._COMPACT_MIN, len(self._postings) // 2):
+            self.compact()
+
+    def remove(self, ids: List[int]) -> None:
+        """
+        Remove documents by chunk id. Unknown ids are ignored.
+
+        Args:
+            ids (List[int]): Chunk ids of the documents.
+        """
+        if not ids or self._alive_count == 0:
+            return
+        rows: np.ndarray = self._rows_of(np.asarray(ids, dtype=np.int64))
+        rows = np.unique(rows[self._alive[rows]])
+        self._alive[rows] = False
+        self._alive_count -= len(rows)
+        self._total_length -= int(self._lengths[rows].sum())
+
+    def _rows_of(self, ids: np.ndarray) -> np.ndarray:
+        """Return the rows holding the given chunk ids, live or not."""
+        rows: List[int] = [
+            self._delta_rows[chunk_id]
+            for chunk_id in ids.tolist()
+            if chunk_id in self._delta_rows
+        ]
+        if len(self._base_sorted_ids):
+            positions: np.ndarray = np.minimum(
+                np.searchsorted(self._base_sorted_ids, ids),
+                len(self._base_sorted_ids) - 1,
+            )
+            found: np.ndarray = self._base_sorted_ids[positions] == ids
+            rows.extend(self._base_order[positions[found]].tolist())
+        return np.asarray(rows, dtype=np.int64)
+
+    def _index_base_rows(self) -> None:
+        """Rebuild the id lookup of compacted rows."""
+        self._base_order = np.argsort(self._doc_ids[: self._size], kind="stable")
+        self._base_sorted_ids = self._doc_ids[: self._size][self._base_order]
+        self._delta_rows = {}
+
+    def _postings_for(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the rows and term frequencies of a term, including deleted rows.
+
+        Rows are in ascending order: compacted rows are sorted within each term
+        and delta rows are appended in insertion order after them.
+        """
+        rows: np.ndarray = self._postings[0:0]
+        frequencies: np.ndarray = self._frequencies[0:0]
+        if term_id + 1 < len(self._offsets):
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            rows, frequencies = self._postings[start:end], self._frequencies[start:end]
+        if term_id in self._delta:
+            delta_rows, delta_frequencies = self._delta[term_id]
+            rows = np.concatenate([rows, np.asarray(delta_rows, dtype=np.int32)])
+            frequencies = np.concatenate(
+                [frequencies, np.asarray(delta_frequencies, dtype=np.int32)]
+            )
+        return rows, frequencies
+
+    def _live(
+        self, allowed: Optional[np.ndarray], rows: np.ndarray, *arrays: np.ndarray
+    ) -> List[np.ndarray]:
+        """
+        Drop deleted rows, or rows outside `allowed` when it is given, and the
+        matching entries of `arrays`.
+        """
+        if allowed is None and self._alive_count == self._size:
+            return [rows, *arrays]
+        live: np.ndarray = (self._alive if allowed is None else allowed)[rows]
+        return [rows[live], *(array[live] for array in arrays)]
+
+    def _term_scores(
+        self,
+        idf: float,
+        frequencies: np.ndarray,
+        rows: np.ndarray,
+        average_length: float,
+    ) -> np.ndarray:
+        """BM25 contribution of one term to the given rows."""
+        norms: np.ndarray = self.k1 * (
+            1 - self.b + self.b * self._lengths[rows] / average_length
+        )
+        return idf * frequencies * (self.k1 + 1) / (frequencies + norms)
+
+    def _champions_for(self, term_id: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the champion postings of a very common term, or None.
+
+        Delta postings are included, since they are not ranked until the next
+        compaction.
+        """
+        if term_id + 1 >= len(self._champion_offsets):
+            return None
+        start, end = (
+            self._champion_offsets[term_id],
+            self._champion_offsets[term_id + 1],
+        )
+        if start == end:
+            return None
+        rows: np.ndarray = self._champion_rows[start:end]
+        frequencies: np.ndarray = self._champion_frequencies[start:end]
+        if term_id in self._delta:
+            delta_rows, delta_frequencies = self._delta[term_id]
+            rows = np.concatenate([rows, np.asarray(delta_rows, dtype=np.int32)])
+            frequencies = np.concatenate(
+                [frequencies, np.asarray(delta_frequencies, dtype=np.int32)]
+            )
+        return rows, frequencies
+
+    def search(
+        self, query: str, k: int, ids: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the `k` documents with the highest BM25 score for a query.
+
+        Query terms are processed from rarest to most common. Once no document
+        outside the current candidates could reach the k-th best score, even by
+        matching every remaining term (MaxScore pruning), the remaining common
+        terms are only scored for the candidates, by binary search in their
+        postings.
+
+        When pruning cannot start, for instance because the rare terms match
+        fewer than `k` documents, very common terms only contribute new
+        candidates from their champion lists: the postings with the highest
+        term-frequency impact, chosen at compaction. Every candidate is still
+        scored exactly, so only documents matching nothing but common terms
+        outside their champion lists can be missed. Lookups therefore cost
+        about as much as the postings of the rare terms, however common the
+        other query terms are.
+
+        With `ids`, postings of other documents are skipped while the terms
+        are traversed. When the allowed documents are fewer than the postings
+        of the query terms, they are scored directly instead, by binary search
+        in every term's postings.
+
+        As in most search engines, document frequencies include deleted
+        documents until the index is compacted.
+
+        Args:
+            query (str): The query text.
+            k (int): The number of documents to return.
+            ids (Optional[np.ndarray]): Only return documents with these chunk
+                ids, e.g. those whose metadata matches a filter.
+
+        Returns:
+            List[Tuple[int, float]]: `(chunk_id, score)` pairs, best first.
+        """
+        if self._alive_count == 0 or k <= 0:
+            return []
+        average_length: float = self._total_length / self._alive_count or 1.0
+        terms: List[_Term] = []
+        for term in set(tokenize(query)):
+            term_id: int = self._vocabulary.get(term, -1)
+            if term_id < 0:
+                continue
+            rows, frequencies = self._postings_for(term_id)
+            if len(rows):
+                idf: float = math.log(
+                    1 + (self._size - len(rows) + 0.5) / (len(rows) + 0.5)
+                )
+                terms.append((rows, frequencies, idf, self._champions_for(term_id)))
+        if not terms:
+            return []
+        allowed: Optional[np.ndarray] = None
+        if ids is not None:
+            allowed = np.zeros(self._size, dtype=bool)
+            allowed[self._rows_of(np.asarray(ids, dtype=np.int64))] = True
+            allowed &= self._alive[: self._size]
+            if np.count_nonzero(allowed) <= sum(len(term[0]) for term in terms):
+                candidates: np.ndarray = np.flatnonzero(allowed)
+                scores: np.ndarray = np.zeros(len(candidates), dtype=np.float64)
+                for term in terms:
+                    scores += self._match(term, candidates, average_length)
+                matched: np.ndarray = scores > 0
+                return self._top(candidates[matched], scores[matched], k)
+        terms.sort(key=lambda term: len(term[0]))
+        # Upper bound of what the terms from position i onwards can add to a score
+        bounds: np.ndarray = np.cumsum(
+            [idf * (self.k1 + 1) for _, _, idf, _ in reversed(terms)]
+        )[::-1]
+
+        candidates = np.empty(0, dtype=np.int64)
+        scores = np.empty(0, dtype=np.float64)
+        # Terms whose candidates came from their champion lists only
+        sampled: List[_Term] = []
+        position: int = 0
+        while position < len(terms):
+            if position and len(scores) >= k:
+                threshold: float = np.partition(scores, len(scores) - k)[-k]
+                if threshold >= bounds[position]:
+                    break
+            rows, frequencies, idf, champions = terms[position]
+            if champions is None:
+                rows, frequencies = self._live(allowed, rows, frequencies)
+                term_scores: np.ndarray = self._term_scores(
+                    idf, frequencies, rows, average_length
+                )
+                candidates, scores = self._accumulate(
+                    candidates, scores, rows, term_scores
+                )
+            else:
+                scores = scores + self._match(
+                    terms[position], candidates, average_length
+                )
+                champion_rows, champion_frequencies = self._live(allowed, *champions)
+                new: np.ndarray = ~np.isin(champion_rows, candidates)
+                new_rows: np.ndarray = champion_rows[new].astype(np.int64)
+                new_scores: np.ndarray = self._term_scores(
+                    idf, champion_frequencies[new], new_rows, average_length
+                )
+                # New candidates matched none of the fully processed terms,
+                # but may be outside the champion lists of earlier sampled ones
+                for earlier in sampled:
+                    new_scores += self._match(earlier, new_rows, average_length)
+                candidates = np.concatenate([candidates, new_rows])
+                scores = np.concatenate([scores, new_scores])
+                sampled.append(terms[position])
+            position += 1
+
+        for term in terms[position:]:
+            scores += self._match(term, candidates, average_length)
+        return self._top(candidates, scores, k)
+
+    def _top(
+        self, candidates: np.ndarray, scores: np.ndarray, k: int
+    ) -> List[Tuple[int, float]]:
+        """Return the chunk ids and scores of the `k` best candidates, best first."""
+        if len(scores) == 0:
+            return []
+        top: np.ndarray = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self._doc_ids[candidates[i]]), float(scores[i])) for i in top]
+
+    def _match(
+        self, term: _Term, candidates: np.ndarray, average_length: float
+    ) -> np.ndarray:
+        """Score one term for the candidates by binary search in its postings."""
+        rows, frequencies, idf, _ = term
+        indices: np.ndarray = np.minimum(
+            np.searchsorted(rows, candidates), len(rows) - 1
+        )
+        matched: np.ndarray = rows[indices] == candidates
+        contributions: np.ndarray = np.zeros(len(candidates), dtype=np.float64)
+        contributions[matched] = self._term_scores(
+            idf, frequencies[indices[matched]], candidates[matched], average_length
+        )
+        return contributions
+
+    def _accumulate(
+        self,
+        candidates: np.ndarray,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        term_scores: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Add one term's scores to the candidate scores."""
+        if len(candidates) == 0:
+            return rows.astype(np.int64), term_scores
+        all_rows: np.ndarray = np.concatenate([candidates, rows])
+        all_scores: np.ndarray = np.concatenate([scores, term_scores])
+        if len(all_rows) * 8 > self._size:
+            # Dense accumulation is cheaper than sorting long postings
+            dense: np.ndarray = np.bincount(
+                all_rows, weights=all_scores, minlength=self._size
+            )
+            merged: np.ndarray = np.flatnonzero(dense)
+            return merged, dense[merged]
+        merged, inverse = np.unique(all_rows, return_inverse=True)
+        return merged, np.bincount(inverse, weights=all_scores)
+
+    def compact(self) -> None:
+        """
+        Merge delta postings into the CSR arrays and drop deleted documents.
+
+        Examples:
+            >>> index.compact()
+        """
+        alive: np.ndarray = self._alive[: self._size]
+        base_terms: np.ndarray = np.repeat(
+            np.arange(len(self._offsets) - 1, dtype=np.int64), np.diff(self._offsets)
+        )
+        terms: List[np.ndarray] = [base_terms]
+        rows: List[np.ndarray] = [self._postings]
+        frequencies: List[np.ndarray] = [self._frequencies]
+        for term_id, (delta_rows, delta_frequencies) in self._delta.items():
+            terms.append(np.full(len(delta_rows), term_id, dtype=np.int64))
+            rows.append(np.asarray(delta_rows, dtype=np.int32))
+            frequencies.append(np.asarray(delta_frequencies, dtype=np.int32))
+        all_terms: np.ndarray = np.concatenate(terms)
+        all_rows: np.ndarray = np.concatenate(rows)
+        all_frequencies: np.ndarray = np.concatenate(frequencies)
+
+        live: np.ndarray = alive[all_rows]
+        new_rows: np.ndarray = (np.cumsum(alive) - 1).astype(np.int32)
+        all_terms = all_terms[live]
+        all_rows = new_rows[all_rows[live]]
+        all_frequencies = all_frequencies[live]
+        order: np.ndarray = np.lexsort((all_rows, all_terms))
+
+        self._offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(all_terms, minlength=len(self._vocabulary)))]
+        ).astype(np.int64)
+        self._postings = all_rows[order]
+        self._frequencies = all_frequencies[order]
+        self._delta = {}
+        self._delta_postings = 0
+        self._doc_ids = self._doc_ids[: self._size][alive]
+        self._lengths = self._lengths[: self._size][alive]
+        self._size = len(self._doc_ids)
+        self._alive = np.ones(self._size, dtype=bool)
+        self._index_base_rows()
+        self._build_champions()
+
+    def _build_champions(self) -> None:
+        """Rank the compacted postings of very common terms by BM25 impact."""
+        counts: np.ndarray = np.diff(self._offsets)
+        average_length: float = self._total_length / max(self._alive_count, 1) or 1.0
+        champion_counts: np.ndarray = np.zeros(len(counts), dtype=np.int64)
+        rows: List[np.ndarray] = []
+        frequencies: List[np.ndarray] = []
+        for term_id in np.flatnonzero(counts > self._CHAMPION_MIN).tolist():
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            impacts: np.ndarray = self._term_scores(
+                1.0,
+                self._frequencies[start:end],
+                self._postings[start:end],
+                average_length,
+            )
+            # Sorting the positions keeps the champion rows in ascending order
+            top: np.ndarray = start + np.sort(
+                np.argpartition(-impacts, self._CHAMPIONS)[: self._CHAMPIONS]
+            )
+            rows.append(self._postings[top])
+            frequencies.append(self._frequencies[top])
+            champion_counts[term_id] = self._CHAMPIONS
+        self._champion_offsets = np.concatenate([[0], np.cumsum(champion_counts)])
+        self._champion_rows = np.concatenate(rows or [self._postings[0:0]])
+        self._champion_frequencies = np.concatenate(
+            frequencies or [self._frequencies[0:0]]
+        )
+
+    @classmethod
+    def load(cls, path: str, config: HybridSearchConfig) -> "BM25Index":
+        """
+        Load an index from disk, or create an empty one if none exists.
+
+        Args:
+            path (str): Path to the `.npz` index file.
+            config (HybridSearchConfig): Configuration object for hybrid search.
+
+        Returns:
+            BM25Index: The loaded index.
+        """
+        index: BM25Index = cls(config)
+        if not os.path.exists(path):
+            return index
+        with np.load(path) as data:
+            terms: List[str] = json.loads(bytes(data["vocabulary"]).decode("utf-8"))
+            index._vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+            index._offsets = data["offsets"]
+            index._postings = data["postings"]
+            index._frequencies = data["frequencies"]
+            index._doc_ids = data["doc_ids"]
+            index._lengths = data["lengths"]
+        index._size = len(index._doc_ids)
+        index._alive = np.ones(index._size, dtype=bool)
+        index._alive_count = index._size
+        index._total_length = int(index._lengths.sum())
+        index._index_base_rows()
+        index._build_champions()
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Compact the index and atomically write it to disk.
+
+        Args:
+            path (str): Path to the `.npz` index file.
+        """
+        self.compact()
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                vocabulary=np.frombuffer(
+                    json.dumps(list(self._vocabulary)).encode("utf-8"), dtype=np.uint8
+                ),
+                offsets=self._offsets,
+                postings=self._postings,
+                frequencies=self._frequencies,
+                doc_ids=self._doc_ids,
+                lengths=self._lengths,
+            )
+        os.replace(f"{path}.tmp", path)
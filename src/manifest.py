@@ -0,0 +1,180 @@
+import hashlib
+import os
+from typing import Any, Dict, List, Tuple
+from pydantic import BaseModel, Field
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash document content for change detection.
+
+    Args:
+        text (str): The document content.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest of the UTF-8 encoded text.
+
+    Examples:
+        >>> content_hash("Hello")[:8]
+        '185f8db3'
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(document_id: str, document_hash: str, position: int) -> int:
+    """
+    Derive a stable, non-negative int64 id for a chunk of a document version.
+
+    Args:
+        document_id (str): Identifier of the source document.
+        document_hash (str): Content hash of the document version.
+        position (int): Position of the chunk within the document.
+
+    Returns:
+        int: A 63-bit id that is identical across runs for the same chunk.
+
+    Examples:
+        >>> chunk_id("doc.pdf#page=1", content_hash("Hello"), 0) >= 0
+        True
+    """
+    digest: bytes = hashlib.blake2b(
+        f"{document_id}\0{document_hash}\0{position}".encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+class ChunkLocation(BaseModel):
+    """
+    Where a chunk occurs in the source.
+
+    Attributes:
+        document_id (str): Identifier of the source document.
+        start (int): Character offset of the chunk in the document.
+        end (int): Character offset just past the end of the chunk.
+    """
+
+    document_id: str
+    start: int
+    end: int
+
+
+class DocumentRecord(BaseModel):
+    """
+    Manifest entry for one indexed document.
+
+    A chunk id may appear in several records when duplicate chunks share one
+    stored embedding.
+
+    Attributes:
+        content_hash (str): Hash of the content that was indexed.
+        chunk_ids (List[int]): Ids of the chunks stored in the vector database.
+        chunk_offsets (List[Tuple[int, int]]): `(start, end)` offsets of each
+            chunk in the document, parallel to `chunk_ids`.
+        metadata (Dict[str, Any]): Metadata of the document, such as its
+            source and page.
+    """
+
+    content_hash: str = Field(..., description="Hash of the indexed content")
+    chunk_ids: List[int] = Field(default_factory=list, description="Stored chunk ids")
+    chunk_offsets: List[Tuple[int, int]] = Field(
+        default_factory=list, description="Offsets of the chunks in the document"
+    )
+    metadata: Dict[str, Any] = Field(
+        default_factory=dict, description="Metadata of the document"
+    )
+
+
+class IndexManifest(BaseModel):
+    """
+    Record of which documents are indexed, used for incremental indexing.
+
+    Examples:
+        >>> manifest = IndexManifest.load("/path/to/faiss/index.manifest.json")
+        >>> manifest.documents["doc.pdf#page=1"] = DocumentRecord(
+        ...     content_hash=content_hash("Hello"), chunk_ids=[1, 2]
+        ... )
+        >>> manifest.save("/path/to/faiss/index.manifest.json")
+    """
+
+    documents: Dict[str, DocumentRecord] = Field(
+        default_factory=dict, description="Indexed documents keyed by document id"
+    )
+
+    def locations(self) -> Dict[int, List[ChunkLocation]]:
+        """
+        Map every chunk id to all the places in the source where it occurs.
+
+        Returns:
+            Dict[int, List[ChunkLocation]]: Locations keyed by chunk id. Chunks
+                shared by duplicate text have more than one location.
+
+        Examples:
+            >>> manifest.locations()[1234]
+            [ChunkLocation(document_id='a.pdf#page=1', start=0, end=80), ChunkLocation(document_id='a.pdf#page=2', start=0, end=80)]
+        """
+        locations: Dict[int, List[ChunkLocation]] = {}
+        for document_id, record in self.documents.items():
+            for chunk, (start, end) in zip(record.chunk_ids, record.chunk_offsets):
+                locations.setdefault(chunk, []).append(
+                    ChunkLocation(document_id=document_id, start=start, end=end)
+                )
+        return locations
+
+    def shared_chunks(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        List the metadata of every location of the chunks that occur more than once.
+
+        The vector database stores the metadata of a chunk's first occurrence
+        only, so filters on locations are resolved for shared chunks from
+        these records instead.
+
+        Returns:
+            List[Tuple[int, Dict[str, Any]]]: `(chunk_id, metadata)` pairs, one
+                per location, where the metadata is the document's metadata
+                with the `document_id`, `start` and `end` of the location.
+
+        Examples:
+            >>> manifest.shared_chunks()[:2]
+            [(1234, {'source': 'a.pdf', 'page': 1, 'document_id': 'a.pdf#page=1', 'start': 0, 'end': 80}), (1234, {'source': 'b.pdf', 'page': 4, 'document_id': 'b.pdf#page=4', 'start': 0, 'end': 80})]
+        """
+        return [
+            (
+                chunk,
+                {
+                    **self.documents[location.document_id].metadata,
+                    "document_id": location.document_id,
+                    "start": location.start,
+                    "end": location.end,
+                },
+            )
+            for chunk, locations in self.locations().items()
+            if len(locations) > 1
+            for location in locations
+        ]
+
+    @classmethod
+    def load(cls, path: str) -> "IndexManifest":
+        """
+        Load a manifest from disk, or return an empty one if none exists.
+
+        Args:
+            path (str): Path to the manifest JSON file.
+
+        Returns:
+            IndexManifest: The loaded manifest.
+        """
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as file:
+            return cls.model_validate_json(file.read())
+
+    def save(self, path: str) -> None:
+        """
+        Atomically write the manifest to disk.
+
+        Args:
+            path (str): Path to the manifest JSON file.
+        """
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            file.write(self.model_dump_json())
+        os.replace(f"{path}.tmp", path)
@@ -1,5 +1,32 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List, Optional
+from pydantic import BaseModel, Field
+
+
+class GenerationChunk(BaseModel):
+    """
+    A piece of streamed generation output.
+
+    The final chunk has `done=True` and carries latency statistics for the
+    whole generation.
+
+    Examples:
+        >>> for chunk in model.generate_stream("Your question here"):
+        ...     print(chunk.text, end="")
+        ...     if chunk.done:
+        ...         print(chunk.time_to_first_token, chunk.tokens_per_second)
+    """
+
+    text: str = Field("", description="Generated text in this chunk")
+    done: bool = Field(False, description="Whether this is the final chunk")
+    time_to_first_token: Optional[float] = Field(
+        None, description="Seconds from request to first generated text (final chunk)"
+    )
+    tokens_per_second: Optional[float] = Field(
+        None, description="Generation throughput (final chunk)"
+    )
 
 
 class LanguageModel(ABC):
@@ -27,3 +54,85 @@ class LanguageModel(ABC):
             768
         """
         raise NotImplementedError  # pragma: no cover
+
+    def generate_stream(self, prompt: str) -> Iterator[GenerationChunk]:
+        """
+        Generate text based on the given prompt, yielding it as it is produced.
+
+        The default implementation yields the whole `generate` output as a
+        single final chunk. Implementations that can stream should override it.
+
+        Examples:
+            >>> for chunk in model.generate_stream("Your question here"):
+            ...     print(chunk.text, end="")
+            LLM response here.
+        """
+        start: float = time.perf_counter()
+        text: str = self.generate(prompt)
+        yield GenerationChunk(
+            text=text, done=True, time_to_first_token=time.perf_counter() - start
+        )
+
+    def prewarm(self, prefix: str = "") -> None:
+        """
+        Prepare the model for the first request.
+
+        The default implementation does nothing. Implementations that load
+        models lazily or cache prompt prefixes should override it.
+
+        Args:
+            prefix (str): Text that every prompt starts with.
+
+        Examples:
+            >>> model.prewarm("AI: Context:")
+        """
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for a list of texts, preserving input order.
+
+        The default implementation calls `get_embeddings` once per text.
+        Implementations backed by a remote service should override it to
+        send batched requests.
+
+        Examples:
+            >>> embeddings = model.get_embeddings_batch(["Hello", "World"])
+            >>> print(len(embeddings))
+            2
+        """
+        return [self.get_embeddings(text) for text in texts]
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Generate text asynchronously.
+
+        The default implementation runs `generate` in a worker thread.
+        Implementations with a native async client should override it.
+
+        Examples:
+            >>> await model.agenerate("Your question here")
+            'LLM response here.'
+        """
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def aget_embeddings(self, text: str) -> List[float]:
+        """
+        Get embeddings for the given text asynchronously.
+
+        The default implementation runs `get_embeddings` in a worker thread.
+
+        Examples:
+            >>> embeddings = await model.aget_embeddings("Hello, world!")
+        """
+        return await asyncio.to_thread(self.get_embeddings, text)
+
+    async def aget_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for a list of texts asynchronously, preserving input order.
+
+        The default implementation runs `get_embeddings_batch` in a worker thread.
+
+        Examples:
+            >>> embeddings = await model.aget_embeddings_batch(["Hello", "World"])
+        """
+        return await asyncio.to_thread(self.get_embeddings_batch, texts)
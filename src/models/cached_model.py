@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from .base import GenerationChunk, LanguageModel
+from ..config.cache_config import EmbeddingCacheConfig
+
+
+class CachedLanguageModel(LanguageModel):
+    """
+    LanguageModel wrapper that keeps embeddings in a persistent SQLite cache.
+
+    Entries are keyed by the model name plus a SHA-256 hash of the text and stored
+    as float32 blobs. Once the cache holds more than `max_entries` vectors, the
+    least recently used ones are evicted. Generation is passed straight through.
+
+    The entry count is kept in memory, and the access times of cache hits are
+    written in batches together with the next insert, so lookups do not
+    commit. A crash loses only recent access times, which merely affect
+    eviction order.
+
+    Examples:
+        >>> from ..config.cache_config import EmbeddingCacheConfig
+        >>> config = EmbeddingCacheConfig(cache_path="/path/to/embeddings.sqlite")
+        >>> model = CachedLanguageModel(OllamaModel(OllamaConfig(llm_model="llama2")), config)
+        >>> embeddings = model.get_embeddings("Hello, world!")
+        >>> embeddings = model.get_embeddings("Hello, world!")
+        >>> print(model.hits, model.misses)
+        1 1
+    """
+
+    _SQLITE_MAX_VARIABLES: int = 500
+    _MAX_PENDING_ACCESSES: int = 10_000
+
+    def __init__(
+        self,
+        model: LanguageModel,
+        config: EmbeddingCacheConfig,
+        model_name: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the cache and open (or create) its backing SQLite file.
+
+        Args:
+            model (LanguageModel): The model whose embeddings are cached.
+            config (EmbeddingCacheConfig): Configuration object for the cache.
+            model_name (Optional[str]): Name used in cache keys. Defaults to the
+                wrapped model's `embedding_model_name` or `model_name`
+                attribute, or its class name.
+
+        Examples:
+            >>> config = EmbeddingCacheConfig(cache_path="/path/to/embeddings.sqlite")
+            >>> model = CachedLanguageModel(OllamaModel(OllamaConfig(llm_model="llama2")), config)
+        """
+        self.model: LanguageModel = model
+        self.model_name: str = model_name or getattr(
+            model,
+            "embedding_model_name",
+            getattr(model, "model_name", type(model).__name__),
+        )
+        self.max_entries: int = config.max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            config.cache_path, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access INTEGER NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+        )
+        self._connection.commit()
+        row = self._connection.execute(
+            "SELECT COALESCE(MAX(last_access), 0) FROM embeddings"
+        ).fetchone()
+        self._clock: int = row[0]
+        self._count: int = self._connection.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+        # Access times of cache hits not yet written, by key
+        self._accesses: Dict[str, int] = {}
+
+    def generate(self, prompt: str) -> str:
+        """
+        Generate text with the wrapped model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        return self.model.generate(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[GenerationChunk]:
+        """
+        Stream generated text from the wrapped model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Yields:
+            GenerationChunk: Pieces of the generated text.
+        """
+        return self.model.generate_stream(prompt)
+
+    def prewarm(self, prefix: str = "") -> None:
+        """
+        Prewarm the wrapped model.
+
+        Args:
+            prefix (str): Text that every prompt starts with.
+        """
+        self.model.prewarm(prefix)
+
+    def get_embeddings(self, text: str) -> List[float]:
+        """
+        Get the embedding for a text, using the cache when possible.
+
+        Args:
+            text (str): The input text to generate embeddings for.
+
+        Returns:
+            List[float]: The embedding vector.
+
+        Examples:
+            >>> embeddings = model.get_embeddings("Hello, world!")
+        """
+        return self.get_embeddings_batch([text])[0]
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts, only sending cache misses to the model.
+
+        Duplicate texts within one call are embedded once.
+
+        Args:
+            texts (List[str]): The input texts to generate embeddings for.
+
+        Returns:
+            List[List[float]]: One embedding per input text, in input order.
+
+        Examples:
+            >>> embeddings = model.get_embeddings_batch(["Hello", "World"])
+            >>> print(len(embeddings))
+            2
+        """
+        keys, cached, missing = self._partition(texts)
+        if missing:
+            self._fill(
+                cached, missing, self.model.get_embeddings_batch(list(missing.values()))
+            )
+        return [cached[key] for key in keys]
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Generate text asynchronously with the wrapped model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        return await self.model.agenerate(prompt)
+
+    async def aget_embeddings(self, text: str) -> List[float]:
+        """
+        Get the embedding for a text asynchronously, using the cache when possible.
+
+        Args:
+            text (str): The input text to generate embeddings for.
+
+        Returns:
+            List[float]: The embedding vector.
+        """
+        return (await self.aget_embeddings_batch([text]))[0]
+
+    async def aget_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts asynchronously, only awaiting the model for misses.
+
+        Cache reads and writes run in a worker thread, so SQLite queries and
+        commits do not block the event loop.
+
+        Args:
+            texts (List[str]): The input texts to generate embeddings for.
+
+        Returns:
+            List[List[float]]: One embedding per input text, in input order.
+        """
+        keys, cached, missing = await asyncio.to_thread(self._partition, texts)
+        if missing:
+            await asyncio.to_thread(
+                self._fill,
+                cached,
+                missing,
+                await self.model.aget_embeddings_batch(list(missing.values())),
+            )
+        return [cached[key] for key in keys]
+
+    def _partition(
+        self, texts: List[str]
+    ) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """
+        Look texts up in the cache and update the hit/miss counters.
+
+        Returns:
+            The key of every text, the cached vectors by key, and the distinct
+            texts that still need embedding by key.
+        """
+        keys: List[str] = [self._key(text) for text in texts]
+        missing: Dict[str, str] = {}
+        with self._lock:
+            cached: Dict[str, List[float]] = self._lookup(keys)
+            for key, text in zip(keys, texts):
+                if key in cached:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.setdefault(key, text)
+        return keys, cached, missing
+
+    def _fill(
+        self,
+        cached: Dict[str, List[float]],
+        missing: Dict[str, str],
+        new_embeddings: List[List[float]],
+    ) -> None:
+        """Store freshly computed vectors and merge them into `cached`."""
+        computed: Dict[str, List[float]] = dict(zip(missing, new_embeddings))
+        with self._lock:
+            self._store(computed)
+        cached.update(computed)
+
+    def close(self) -> None:
+        """
+        Close the backing SQLite connection.
+
+        Examples:
+            >>> model.close()
+        """
+        with self._lock:
+            self._write_accesses()
+            self._connection.commit()
+        self._connection.close()
+
+    def __len__(self) -> int:
+        """Return the number of cached embeddings."""
+        with self._lock:
+            return self._count
+
+    def _key(self, text: str) -> str:
+        """Build the cache key for a text under the current model name."""
+        digest: str = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _tick(self) -> int:
+        """Advance and return the logical clock used for LRU ordering."""
+        self._clock += 1
+        return self._clock
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for `keys` and mark them as recently used."""
+        found: Dict[str, List[float]] = {}
+        unique_keys: List[str] = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), self._SQLITE_MAX_VARIABLES):
+            group: List[str] = unique_keys[start : start + self._SQLITE_MAX_VARIABLES]
+            placeholders: str = ",".join("?" * len(group))
+            rows = self._connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",  # nosec B608
+                group,
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        for key in found:
+            self._accesses[key] = self._tick()
+        if len(self._accesses) >= self._MAX_PENDING_ACCESSES:
+            self._write_accesses()
+            self._connection.commit()
+        return found
+
+    def _write_accesses(self) -> None:
+        """Write the pending access times of cache hits, without committing."""
+        if self._accesses:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(tick, key) for key, tick in self._accesses.items()],
+            )
+            self._accesses.clear()
+
+    def _store(self, embeddings: Dict[str, List[float]]) -> None:
+        """Insert new vectors and evict least recently used entries over the limit."""
+        self._write_accesses()
+        # Keys stored since the lookup already hold the same vector
+        inserted: int = self._connection.executemany(
+            "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+            [
+                (key, np.asarray(vector, dtype=np.float32).tobytes(), self._tick())
+                for key, vector in embeddings.items()
+            ],
+        ).rowcount
+        self._count += inserted
+        if self._count > self.max_entries:
+            self._count -= self._connection.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                (self._count - self.max_entries,),
+            ).rowcount
+        self._connection.commit()
@@ -0,0 +1,134 @@
+from typing import Iterator, List
+from .base import GenerationChunk, LanguageModel
+
+
+class CompositeLanguageModel(LanguageModel):
+    """
+    LanguageModel that generates with one model and embeds with another.
+
+    Lets a small dedicated embedding model, such as an in-process
+    ONNXEmbeddingModel, be paired with any generation model.
+
+    Examples:
+        >>> model = CompositeLanguageModel(
+        ...     OllamaModel(OllamaConfig(llm_model="llama3.2:1b")),
+        ...     ONNXEmbeddingModel(onnx_config),
+        ... )
+        >>> response = model.generate("Your question here")
+        >>> embedding = model.get_embeddings("Hello, world!")
+    """
+
+    def __init__(self, generator: LanguageModel, embedder: LanguageModel) -> None:
+        """
+        Initialize the composite model.
+
+        Args:
+            generator (LanguageModel): Model used for text generation.
+            embedder (LanguageModel): Model used for embeddings.
+        """
+        self.generator: LanguageModel = generator
+        self.embedder: LanguageModel = embedder
+        self.model_name: str = getattr(
+            generator, "model_name", type(generator).__name__
+        )
+        self.embedding_model_name: str = getattr(
+            embedder,
+            "embedding_model_name",
+            getattr(embedder, "model_name", type(embedder).__name__),
+        )
+
+    def generate(self, prompt: str) -> str:
+        """
+        Generate text with the generation model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        return self.generator.generate(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[GenerationChunk]:
+        """
+        Stream generated text from the generation model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Yields:
+            GenerationChunk: Pieces of the generated text.
+        """
+        return self.generator.generate_stream(prompt)
+
+    def prewarm(self, prefix: str = "") -> None:
+        """
+        Prewarm the generation model.
+
+        The embedder is left alone: prewarming an Ollama model runs a
+        generation request, which Ollama rejects for an embedding model.
+
+        Args:
+            prefix (str): Text that every prompt starts with.
+        """
+        self.generator.prewarm(prefix)
+
+    def get_embeddings(self, text: str) -> List[float]:
+        """
+        Get the embedding of a text from the embedding model.
+
+        Args:
+            text (str): The input text to embed.
+
+        Returns:
+            List[float]: The embedding.
+        """
+        return self.embedder.get_embeddings(text)
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts from the embedding model.
+
+        Args:
+            texts (List[str]): The input texts to embed.
+
+        Returns:
+            List[List[float]]: One embedding per text, in input order.
+        """
+        return self.embedder.get_embeddings_batch(texts)
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Generate text asynchronously with the generation model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        return await self.generator.agenerate(prompt)
+
+    async def aget_embeddings(self, text: str) -> List[float]:
+        """
+        Get the embedding of a text asynchronously from the embedding model.
+
+        Args:
+            text (str): The input text to embed.
+
+        Returns:
+            List[float]: The embedding.
+        """
+        return await self.embedder.aget_embeddings(text)
+
+    async def aget_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts asynchronously from the embedding model.
+
+        Args:
+            texts (List[str]): The input texts to embed.
+
+        Returns:
+            List[List[float]]: One embedding per text, in input order.
+        """
+        return await self.embedder.aget_embeddings_batch(texts)
@@ -1,6 +1,9 @@
-from typing import List
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
 import ollama
-from .base import LanguageModel
+from .base import GenerationChunk, LanguageModel
 from ..config.model_config import OllamaConfig
 
 
@@ -9,6 +12,8 @@ class OllamaModel(LanguageModel):
     Ollama implementation of LanguageModel.
 
     This class provides methods to generate text and embeddings using Ollama models.
+    Embeddings come from `embedding_model` when it is configured, so a small
+    dedicated embedding model can be paired with a chat model.
 
     Examples:
         >>> from ..config.model_config import OllamaConfig
@@ -19,19 +24,33 @@ class OllamaModel(LanguageModel):
         'LLM response here.'
     """
 
-    def __init__(self, config: OllamaConfig) -> None:
+    def __init__(
+        self, config: OllamaConfig, system_message: Optional[str] = None
+    ) -> None:
         """
         Initialize Ollama model for generation and embedding.
 
         Args:
             config (OllamaConfig): Configuration object for the Ollama model.
+            system_message (Optional[str]): System message sent in the `system`
+                field of every generation request instead of in the prompt.
 
         Examples:
             >>> from ..config.model_config import OllamaConfig
             >>> config = OllamaConfig(llm_model="llama3.2")
             >>> model = OllamaModel(config)
+            >>> model = OllamaModel(config, system_message="You are a helpful AI assistant.")
         """
         self.model_name: str = config.llm_model
+        self.embedding_model_name: str = config.embedding_model or config.llm_model
+        self.embedding_batch_size: int = config.embedding_batch_size
+        self.max_concurrent_requests: int = config.max_concurrent_requests
+        self.keep_alive: Union[str, float] = config.keep_alive
+        self.options: Dict[str, Any] = (
+            {"num_ctx": config.num_ctx} if config.num_ctx is not None else {}
+        )
+        self.system_message: Optional[str] = system_message
+        self._async_client: Optional[ollama.AsyncClient] = None
 
     def generate(self, prompt: str) -> str:
         """
@@ -49,9 +68,105 @@ class OllamaModel(LanguageModel):
             >>> print(response)
             'The title "father of AI" is often attributed to John McCarthy, an American computer scientist who coined the term "artificial intelligence" in 1956....'
         """
-        response: dict[str, str] = ollama.generate(model=self.model_name, prompt=prompt)
+        response: dict[str, str] = ollama.generate(
+            model=self.model_name, prompt=prompt, **self._generate_options()
+        )
         return response["response"]
 
+    def _generate_options(self) -> Dict[str, Any]:
+        """
+        Keyword arguments sent with every generation request.
+
+        Every request resets how long Ollama keeps the model loaded, and a
+        request with a different `num_ctx` reloads it, so all requests must
+        send the same values. The model template places the system message
+        ahead of the prompt, so every request starts with the same tokens and
+        Ollama reuses their evaluation from the previous request.
+        """
+        options: Dict[str, Any] = {"keep_alive": self.keep_alive}
+        if self.system_message:
+            options["system"] = self.system_message
+        if self.options:
+            options["options"] = self.options
+        return options
+
+    def prewarm(self, prefix: str = "") -> None:
+        """
+        Load the model into memory and evaluate the system message and a prompt prefix.
+
+        Ollama reuses the evaluated tokens of the longest prefix shared with
+        the previous request, so the first query neither waits for the model
+        to load nor pays to prefill the system message. Ollama only loads the
+        model for an empty prompt, so `prefix` must be non-empty for the
+        system message to be evaluated.
+
+        Args:
+            prefix (str): Text that every prompt starts with.
+
+        Examples:
+            >>> model = OllamaModel(
+            ...     OllamaConfig(llm_model="llama2", keep_alive=-1),
+            ...     system_message="You are a helpful AI assistant.",
+            ... )
+            >>> model.prewarm("AI: Context:")
+        """
+        request: Dict[str, Any] = self._generate_options()
+        request["options"] = {**self.options, "num_predict": 1}
+        ollama.generate(model=self.model_name, prompt=prefix, **request)
+
+    def generate_stream(self, prompt: str) -> Iterator[GenerationChunk]:
+        """
+        Generate text using Ollama model, yielding tokens as Ollama produces them.
+
+        The final chunk reports time to first token, measured on the client, and
+        tokens per second from Ollama's `eval_count`/`eval_duration`.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Yields:
+            GenerationChunk: Pieces of the generated text, then a final chunk
+                with latency statistics.
+
+        Examples:
+            >>> model = OllamaModel(OllamaConfig(llm_model="llama2"))
+            >>> for chunk in model.generate_stream("Who is father of AI."):
+            ...     print(chunk.text, end="", flush=True)
+        """
+        start: float = time.perf_counter()
+        first_token: Optional[float] = None
+        tokens: int = 0
+        part: Mapping[str, Any]
+        for part in ollama.generate(
+            model=self.model_name,
+            prompt=prompt,
+            stream=True,
+            **self._generate_options(),
+        ):
+            text: str = part["response"]
+            if text and first_token is None:
+                first_token = time.perf_counter()
+            tokens += 1 if text else 0
+            if not part["done"]:
+                yield GenerationChunk(text=text)
+                continue
+
+            end: float = time.perf_counter()
+            eval_count: Optional[int] = part.get("eval_count")
+            eval_duration: Optional[int] = part.get("eval_duration")
+            if eval_count and eval_duration:
+                tokens_per_second: Optional[float] = eval_count / (eval_duration / 1e9)
+            elif first_token is not None and end > first_token:
+                tokens_per_second = tokens / (end - first_token)
+            else:
+                tokens_per_second = None
+            yield GenerationChunk(
+                text=text,
+                done=True,
+                time_to_first_token=(first_token or end) - start,
+                tokens_per_second=tokens_per_second,
+            )
+
     def get_embeddings(self, text: str) -> List[float]:
         """
         Get embeddings using Ollama model.
@@ -70,7 +185,137 @@ class OllamaModel(LanguageModel):
             >>> print(embeddings[:5])
             [0.023, -0.041, 0.017, 0.089, -0.032]  # Example values
         """
-        response: dict[str, List[float]] = ollama.embeddings(
-            model=self.model_name, prompt=text
+        response: dict[str, List[List[float]]] = ollama.embed(
+            model=self.embedding_model_name, input=text, keep_alive=self.keep_alive
+        )
+        return response["embeddings"][0]
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts using batched, concurrent Ollama requests.
+
+        Texts are grouped into requests of at most `embedding_batch_size` inputs,
+        and up to `max_concurrent_requests` requests are kept in flight at once.
+
+        Args:
+            texts (List[str]): The input texts to generate embeddings for.
+
+        Returns:
+            List[List[float]]: One embedding per input text, in input order.
+
+        Examples:
+            >>> model = OllamaModel(OllamaConfig(llm_model="llama2"))
+            >>> embeddings = model.get_embeddings_batch(["Hello", "World"])
+            >>> print(len(embeddings))
+            2
+        """
+        batches: List[List[str]] = [
+            texts[i : i + self.embedding_batch_size]
+            for i in range(0, len(texts), self.embedding_batch_size)
+        ]
+        if len(batches) <= 1 or self.max_concurrent_requests == 1:
+            results: List[List[List[float]]] = [
+                self._embed_batch(batch) for batch in batches
+            ]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=self.max_concurrent_requests
+            ) as executor:
+                results = list(executor.map(self._embed_batch, batches))
+        return [embedding for batch in results for embedding in batch]
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """
+        Send a single batched embedding request to Ollama.
+
+        Args:
+            batch (List[str]): The texts to embed in one request.
+
+        Returns:
+            List[List[float]]: One embedding per text in the batch.
+        """
+        response: dict[str, List[List[float]]] = ollama.embed(
+            model=self.embedding_model_name, input=batch, keep_alive=self.keep_alive
+        )
+        return response["embeddings"]
+
+    @property
+    def async_client(self) -> ollama.AsyncClient:
+        """
+        Ollama async client, created on first use inside the running event loop.
+        """
+        if self._async_client is None:
+            self._async_client = ollama.AsyncClient()
+        return self._async_client
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Generate text using Ollama model without blocking the event loop.
+
+        Cancelling the awaiting task closes the HTTP request, which stops
+        generation on the Ollama server.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+
+        Returns:
+            str: The generated text response.
+
+        Examples:
+            >>> model = OllamaModel(OllamaConfig(llm_model="llama2"))
+            >>> response = await model.agenerate("Who is father of AI.")
+        """
+        response: dict[str, str] = await self.async_client.generate(
+            model=self.model_name, prompt=prompt, **self._generate_options()
+        )
+        return response["response"]
+
+    async def aget_embeddings(self, text: str) -> List[float]:
+        """
+        Get embeddings using Ollama model without blocking the event loop.
+
+        Args:
+            text (str): The input text to generate embeddings for.
+
+        Returns:
+            List[float]: A list of floating-point numbers representing the embedding.
+
+        Examples:
+            >>> embeddings = await model.aget_embeddings("Hello, world!")
+        """
+        response: dict[str, List[List[float]]] = await self.async_client.embed(
+            model=self.embedding_model_name, input=text, keep_alive=self.keep_alive
+        )
+        return response["embeddings"][0]
+
+    async def aget_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts using batched, concurrent async requests.
+
+        Args:
+            texts (List[str]): The input texts to generate embeddings for.
+
+        Returns:
+            List[List[float]]: One embedding per input text, in input order.
+
+        Examples:
+            >>> embeddings = await model.aget_embeddings_batch(["Hello", "World"])
+        """
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response: dict[str, List[List[float]]] = await self.async_client.embed(
+                    model=self.embedding_model_name,
+                    input=batch,
+                    keep_alive=self.keep_alive,
+                )
+                return response["embeddings"]
+
+        results: List[List[List[float]]] = await asyncio.gather(
+            *(
+                embed_batch(texts[i : i + self.embedding_batch_size])
+                for i in range(0, len(texts), self.embedding_batch_size)
+            )
         )
-        return response["embedding"]
+        return [embedding for batch in results for embedding in batch]
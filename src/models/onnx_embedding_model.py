@@ -0,0 +1,149 @@
+from typing import Any, Dict, List
+import numpy as np
+from .base import LanguageModel
+from ..config.model_config import ONNXEmbeddingConfig
+
+
+class ONNXEmbeddingModel(LanguageModel):
+    """
+    In-process sentence embedding model running on CPU with ONNX Runtime.
+
+    Texts are tokenized with the model's Hugging Face tokenizer and embedded
+    in batches of up to `batch_size`. Batches are formed from texts of similar
+    length, so little padding is computed. Token embeddings are mean-pooled
+    over the attention mask and normalised to unit length. Models that output
+    a sentence embedding directly are normalised as is.
+
+    Small encoders such as all-MiniLM-L6-v2 produce 384-dimensional vectors,
+    far smaller than the hidden states of a chat model, with no network round
+    trip. The model only embeds text and cannot generate.
+
+    Requires the optional `onnxruntime` and `tokenizers` packages.
+
+    Examples:
+        >>> config = ONNXEmbeddingConfig(
+        ...     model_path="/models/all-MiniLM-L6-v2/model.onnx",
+        ...     tokenizer_path="/models/all-MiniLM-L6-v2/tokenizer.json",
+        ... )
+        >>> model = ONNXEmbeddingModel(config)
+        >>> embeddings = model.get_embeddings_batch(["Hello", "World"])
+        >>> print(len(embeddings[0]))
+        384
+    """
+
+    def __init__(self, config: ONNXEmbeddingConfig) -> None:
+        """
+        Load the ONNX model and its tokenizer.
+
+        Args:
+            config (ONNXEmbeddingConfig): Configuration object for the model.
+
+        Raises:
+            ImportError: If `onnxruntime` or `tokenizers` is not installed.
+        """
+        self.model_name: str = config.model_path
+        self.embedding_model_name: str = config.model_path
+        self.batch_size: int = config.batch_size
+        self.session: Any = self._load_session(config)
+        self.tokenizer: Any = self._load_tokenizer(config)
+        self._input_names: List[str] = [
+            model_input.name for model_input in self.session.get_inputs()
+        ]
+
+    @staticmethod
+    def _load_session(config: ONNXEmbeddingConfig) -> Any:
+        """Create a CPU inference session for the model."""
+        try:
+            import onnxruntime
+        except ImportError as error:  # pragma: no cover
+            raise ImportError(
+                "ONNXEmbeddingModel requires onnxruntime: pip install .[onnx]"
+            ) from error
+        options: Any = onnxruntime.SessionOptions()
+        if config.num_threads is not None:
+            options.intra_op_num_threads = config.num_threads
+        return onnxruntime.InferenceSession(
+            config.model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    @staticmethod
+    def _load_tokenizer(config: ONNXEmbeddingConfig) -> Any:
+        """Load the tokenizer, truncating and padding to the longest text."""
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as error:  # pragma: no cover
+            raise ImportError(
+                "ONNXEmbeddingModel requires tokenizers: pip install .[onnx]"
+            ) from error
+        tokenizer: Any = Tokenizer.from_file(config.tokenizer_path)
+        tokenizer.enable_truncation(max_length=config.max_length)
+        tokenizer.enable_padding()
+        return tokenizer
+
+    def generate(self, prompt: str) -> str:
+        """
+        Not supported: this model only computes embeddings.
+
+        Raises:
+            NotImplementedError: Always.
+        """
+        raise NotImplementedError(
+            "ONNXEmbeddingModel only computes embeddings; use it as the "
+            "embedding model next to a generation model"
+        )
+
+    def get_embeddings(self, text: str) -> List[float]:
+        """
+        Get the embedding of a text.
+
+        Args:
+            text (str): The input text to embed.
+
+        Returns:
+            List[float]: The unit-length embedding.
+        """
+        return self.get_embeddings_batch([text])[0]
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for many texts, in batches of similar length.
+
+        Args:
+            texts (List[str]): The input texts to embed.
+
+        Returns:
+            List[List[float]]: One unit-length embedding per text, in input order.
+        """
+        if not texts:
+            return []
+        order: List[int] = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings: List[np.ndarray] = [np.empty(0)] * len(texts)
+        for first in range(0, len(order), self.batch_size):
+            batch: List[int] = order[first : first + self.batch_size]
+            for i, embedding in zip(batch, self._embed([texts[i] for i in batch])):
+                embeddings[i] = embedding
+        return np.stack(embeddings).tolist()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Run one batch through the model and pool it into unit vectors."""
+        encodings: List[Any] = self.tokenizer.encode_batch(texts)
+        attention_mask: np.ndarray = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64
+        )
+        features: Dict[str, np.ndarray] = {
+            "input_ids": np.array(
+                [encoding.ids for encoding in encodings], dtype=np.int64
+            ),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array(
+                [encoding.type_ids for encoding in encodings], dtype=np.int64
+            ),
+        }
+        output: np.ndarray = self.session.run(
+            None, {name: features[name] for name in self._input_names}
+        )[0].astype(np.float32, copy=False)
+        if output.ndim == 3:
+            mask: np.ndarray = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms: np.ndarray = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.maximum(norms, 1e-12)
@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import faiss
+import numpy as np
+from .config.cache_config import QueryCacheConfig
+
+
+@dataclass
+class _Entry:
+    """A cached response and the id of its query embedding."""
+
+    response: str
+    embedding_id: int
+    expires_at: float
+
+
+class QueryCache:
+    """
+    In-memory cache of query responses with exact and semantic lookup.
+
+    A query is first looked up by its normalised text (lowercased, whitespace
+    collapsed, trailing punctuation removed). On a miss, its embedding is
+    compared with the embeddings of past queries in a small FAISS inner-product
+    index over unit vectors, and the response of the most similar one is reused
+    if its cosine similarity reaches `similarity_threshold`. Responses are only
+    reused for the same `k`. Entries expire after `ttl_seconds`, and the least
+    recently used ones are evicted beyond `max_entries`.
+
+    The cache does not observe the vector database; callers must `clear()` it
+    when the indexed corpus changes.
+
+    Examples:
+        >>> cache = QueryCache(QueryCacheConfig())
+        >>> cache.put("What is RAG?", 5, embedding, "RAG is ...")
+        >>> cache.get("what is rag", 5)
+        'RAG is ...'
+        >>> cache.get_similar(embedding_of_paraphrase, 5)
+        'RAG is ...'
+    """
+
+    _CANDIDATES: int = 8
+
+    def __init__(self, config: QueryCacheConfig) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            config (QueryCacheConfig): Configuration object for the cache.
+        """
+        self.similarity_threshold: float = config.similarity_threshold
+        self.max_entries: int = config.max_entries
+        self.ttl_seconds: float = config.ttl_seconds
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: "OrderedDict[Tuple[str, int], _Entry]" = OrderedDict()
+        self._keys: Dict[int, Tuple[str, int]] = {}
+        self._index: Optional[faiss.IndexIDMap] = None
+        self._next_id: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def normalise(query: str) -> str:
+        """
+        Normalise a query for exact matching.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            str: The query lowercased, with whitespace collapsed and trailing
+                punctuation removed.
+
+        Examples:
+            >>> QueryCache.normalise("  What is   RAG? ")
+            'what is rag'
+        """
+        return " ".join(query.lower().split()).rstrip("?!. ")
+
+    def get(self, query: str, k: int) -> Optional[str]:
+        """
+        Look a query up by its normalised text.
+
+        Args:
+            query (str): The user query.
+            k (int): Number of documents retrieved for the response.
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss.
+        """
+        with self._lock:
+            entry: Optional[_Entry] = self._live(
+                (self.normalise(query), k), time.monotonic()
+            )
+            if entry is None:
+                return None
+            self.hits += 1
+            return entry.response
+
+    def get_similar(self, embedding: List[float], k: int) -> Optional[str]:
+        """
+        Look a query up by the similarity of its embedding to past queries.
+
+        Args:
+            embedding (List[float]): Embedding of the user query.
+            k (int): Number of documents retrieved for the response.
+
+        Returns:
+            Optional[str]: The cached response of the most similar past query,
+                or None if none reaches the similarity threshold.
+        """
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+            vector: np.ndarray = self._unit(embedding)
+            if vector.shape[1] != self._index.d:
+                self.misses += 1
+                return None
+            scores, ids = self._index.search(
+                vector, min(self._CANDIDATES, self._index.ntotal)
+            )
+            now: float = time.monotonic()
+            for score, embedding_id in zip(scores[0], ids[0]):
+                if embedding_id < 0 or score < self.similarity_threshold:
+                    break
+                key: Tuple[str, int] = self._keys[int(embedding_id)]
+                entry: Optional[_Entry] = self._live(key, now) if key[1] == k else None
+                if entry is not None:
+                    self.hits += 1
+                    return entry.response
+            self.misses += 1
+            return None
+
+    def put(self, query: str, k: int, embedding: List[float], response: str) -> None:
+        """
+        Cache the response to a query.
+
+        Args:
+            query (str): The user query.
+            k (int): Number of documents retrieved for the response.
+            embedding (List[float]): Embedding of the user query.
+            response (str): The generated response.
+        """
+        key: Tuple[str, int] = (self.normalise(query), k)
+        vector: np.ndarray = self._unit(embedding)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self._index is None or self._index.ntotal == 0:
+                self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+            if vector.shape[1] != self._index.d:
+                return
+            embedding_id: int = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([embedding_id], dtype=np.int64))
+            self._keys[embedding_id] = key
+            self._entries[key] = _Entry(
+                response, embedding_id, time.monotonic() + self.ttl_seconds
+            )
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """
+        Drop every cached response.
+
+        Examples:
+            >>> cache.clear()
+            >>> len(cache)
+            0
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._index = None
+
+    def __len__(self) -> int:
+        """Return the number of cached responses, including expired ones."""
+        return len(self._entries)
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        """Return the embedding as a unit-length float32 row vector."""
+        vector: np.ndarray = np.array([embedding], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _live(self, key: Tuple[str, int], now: float) -> Optional[_Entry]:
+        """Return an unexpired entry and mark it recently used; drop it if expired."""
+        entry: Optional[_Entry] = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        """Remove an entry and its embedding."""
+        entry: _Entry = self._entries.pop(key)
+        del self._keys[entry.embedding_id]
+        self._index.remove_ids(np.array([entry.embedding_id], dtype=np.int64))
@@ -1,15 +1,50 @@
-from typing import List
-from .config.model_config import ModelConfig, OllamaConfig
-from .config.vector_db_config import VectorDBConfig, FAISSConfig
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+import numpy as np
+from .config.cache_config import EmbeddingCacheConfig, QueryCacheConfig
+from .config.context_config import ContextConfig
+from .config.dedup_config import DedupConfig
+from .config.metrics_config import MetricsConfig
+from .config.search_config import HybridSearchConfig
+from .config.rerank_config import (
+    CrossEncoderRerankerConfig,
+    LexicalRerankerConfig,
+    RerankerConfig,
+)
+from .config.model_config import ModelConfig, ONNXEmbeddingConfig, OllamaConfig
+from .config.vector_db_config import VectorDBConfig, FAISSConfig, ShardedFAISSConfig
 from .config.data_source_config import DataSourceConfig, PDFConfig
-from .models.base import LanguageModel
+from .models.base import GenerationChunk, LanguageModel
+from .models.cached_model import CachedLanguageModel
+from .models.composite_model import CompositeLanguageModel
+from .models.onnx_embedding_model import ONNXEmbeddingModel
 from .models.ollama_model import OllamaModel
 from .vector_db.base import VectorDB
 from .vector_db.faiss_db import FAISSVectorDB
+from .vector_db.metadata_columns import MetadataColumns, MetadataFilter
+from .vector_db.sharded_faiss_db import ShardedFAISSVectorDB
 from .data_source.base import DataSource
 from .data_source.pdf_source import PDFDataSource
 from .text_splitter.recursive_splitter import RecursiveTextSplitter
+from .context_builder import ContextBuilder
+from .dedup import ChunkDeduplicator
+from .ingestion import IngestionPipeline
+from .lexical_index import BM25Index
+from .manifest import IndexManifest
+from .metrics import Metrics, NullMetrics, PrometheusMetrics
 from .prompt import Prompt
+from .query_cache import QueryCache
+from .rerankers.base import Reranker
+from .rerankers.cross_encoder_reranker import CrossEncoderReranker
+from .rerankers.lexical_reranker import LexicalReranker
+
+# Sent in Ollama's `system` field and kept constant, so that every request
+# starts with the same tokens and the model server reuses their evaluation.
+SYSTEM_MESSAGE: str = (
+    "You are a helpful AI assistant. "
+    "Use the following context to answer the human's question."
+)
+CONTEXT_LABEL: str = "Context:"
 
 
 class RAGSystem:
@@ -32,6 +67,14 @@ class RAGSystem:
         model_config: ModelConfig,
         vector_db_config: VectorDBConfig,
         data_source_config: DataSourceConfig,
+        embedding_cache_config: Optional[EmbeddingCacheConfig] = None,
+        dedup_config: Optional[DedupConfig] = None,
+        query_cache_config: Optional[QueryCacheConfig] = None,
+        hybrid_search_config: Optional[HybridSearchConfig] = None,
+        context_config: Optional[ContextConfig] = None,
+        embedding_model_config: Optional[ModelConfig] = None,
+        reranker_config: Optional[RerankerConfig] = None,
+        metrics_config: Optional[MetricsConfig] = None,
     ) -> None:
         """
         Initialize RAG system.
@@ -40,6 +83,23 @@ class RAGSystem:
             model_config: Configuration for the language model
             vector_db_config: Configuration for the vector database
             data_source_config: Configuration for the data source
+            embedding_cache_config: Optional configuration for a persistent
+                embedding cache placed in front of the language model
+            dedup_config: Optional configuration for eliminating exact and
+                near-duplicate chunks before they are embedded
+            query_cache_config: Optional configuration for a cache of query
+                responses, looked up by exact and by semantic match
+            hybrid_search_config: Optional configuration for fusing BM25
+                keyword search with vector search
+            context_config: Optional configuration for packing retrieved
+                chunks into the prompt; defaults to `ContextConfig()`
+            embedding_model_config: Optional configuration for a separate
+                embedding model; by default `model_config` also embeds
+            reranker_config: Optional configuration for rescoring retrieved
+                chunks before the best `k` are put in the prompt
+            metrics_config: Optional configuration for recording stage
+                latencies and counters in `metrics`, exportable in the
+                Prometheus text format; disabled by default
 
         Returns:
             None
@@ -50,10 +110,61 @@ class RAGSystem:
             >>> pdf_config = PDFConfig(pdf_path="/path/to/documents.pdf")
             >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
         """
+        self.metrics: Metrics = NullMetrics()
+        if metrics_config is not None:
+            self.metrics = PrometheusMetrics(metrics_config)
         self.model: LanguageModel = self._initialize_model(model_config)
+        if embedding_model_config is not None:
+            self.model = CompositeLanguageModel(
+                self.model, self._initialize_embedding_model(embedding_model_config)
+            )
+        if embedding_cache_config is not None:
+            self.model = CachedLanguageModel(self.model, embedding_cache_config)
+        if isinstance(model_config, OllamaConfig) and model_config.prewarm:
+            self.model.prewarm(
+                Prompt(ai_message=CONTEXT_LABEL, human_message="").construct_prompt()
+            )
         self.vector_db: VectorDB = self._initialize_vector_db(vector_db_config)
         self.data_source: DataSource = self._initialize_data_source(data_source_config)
         self.text_splitter: RecursiveTextSplitter = RecursiveTextSplitter()
+        self.context_builder: ContextBuilder = ContextBuilder(
+            context_config or ContextConfig()
+        )
+        self.manifest_path: str = self._initialize_manifest_path(vector_db_config)
+        self.manifest: IndexManifest = IndexManifest.load(self.manifest_path)
+        # Ids and location metadata of the chunks shared by several documents,
+        # read from the manifest on the first filtered query after indexing
+        self._shared_chunks: Optional[Tuple[np.ndarray, MetadataColumns]] = None
+        self.dedup_path: Optional[str] = None
+        self.dedup: Optional[ChunkDeduplicator] = None
+        if dedup_config is not None:
+            self.dedup_path = self._initialize_dedup_path(vector_db_config)
+            self.dedup = ChunkDeduplicator.load(self.dedup_path, dedup_config)
+        self.query_cache: Optional[QueryCache] = None
+        if query_cache_config is not None:
+            self.query_cache = QueryCache(query_cache_config)
+        self.hybrid_search_config: Optional[HybridSearchConfig] = hybrid_search_config
+        self.lexical_index_path: Optional[str] = None
+        self.lexical_index: Optional[BM25Index] = None
+        if hybrid_search_config is not None:
+            self.lexical_index_path = self._initialize_lexical_index_path(
+                vector_db_config
+            )
+            self.lexical_index = BM25Index.load(
+                self.lexical_index_path, hybrid_search_config
+            )
+            if (
+                len(self.lexical_index) == 0
+                and isinstance(self.vector_db, (FAISSVectorDB, ShardedFAISSVectorDB))
+                and len(self.vector_db.ids)
+            ):
+                # Backfill an index built before hybrid search was enabled
+                self.lexical_index.add(
+                    self.vector_db.ids.tolist(), list(self.vector_db.texts)
+                )
+        self.reranker: Optional[Reranker] = None
+        if reranker_config is not None:
+            self.reranker = self._initialize_reranker(reranker_config)
 
     def _initialize_model(self, config: ModelConfig) -> LanguageModel:
         """
@@ -73,9 +184,34 @@ class RAGSystem:
             True
         """
         if isinstance(config, OllamaConfig):
-            return OllamaModel(config)
+            return OllamaModel(config, system_message=SYSTEM_MESSAGE)
         raise ValueError("Unsupported model configuration")
 
+    def _initialize_embedding_model(self, config: ModelConfig) -> LanguageModel:
+        """
+        Initialize the embedding model based on configuration.
+
+        Args:
+            config: Embedding model configuration object
+
+        Returns:
+            Initialized embedding model instance
+
+        Examples:
+            >>> onnx_config = ONNXEmbeddingConfig(
+            ...     model_path="/models/all-MiniLM-L6-v2/model.onnx",
+            ...     tokenizer_path="/models/all-MiniLM-L6-v2/tokenizer.json",
+            ... )
+            >>> model = rag._initialize_embedding_model(onnx_config)
+            >>> isinstance(model, ONNXEmbeddingModel)
+            True
+        """
+        if isinstance(config, ONNXEmbeddingConfig):
+            return ONNXEmbeddingModel(config)
+        if isinstance(config, OllamaConfig):
+            return OllamaModel(config)
+        raise ValueError("Unsupported embedding model configuration")
+
     def _initialize_vector_db(self, config: VectorDBConfig) -> VectorDB:
         """
         Initialize vector database based on configuration.
@@ -93,10 +229,34 @@ class RAGSystem:
             >>> isinstance(vector_db, FAISSVectorDB)
             True
         """
+        if isinstance(config, ShardedFAISSConfig):
+            return ShardedFAISSVectorDB(config)
         if isinstance(config, FAISSConfig):
             return FAISSVectorDB(config)
         raise ValueError("Unsupported vector database configuration")
 
+    def _initialize_reranker(self, config: RerankerConfig) -> Reranker:
+        """
+        Initialize reranker based on configuration.
+
+        Args:
+            config: Reranker configuration object
+
+        Returns:
+            Initialized reranker instance
+
+        Examples:
+            >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
+            >>> reranker = rag._initialize_reranker(LexicalRerankerConfig())
+            >>> isinstance(reranker, LexicalReranker)
+            True
+        """
+        if isinstance(config, CrossEncoderRerankerConfig):
+            return CrossEncoderReranker(config)
+        if isinstance(config, LexicalRerankerConfig):
+            return LexicalReranker(config)
+        raise ValueError("Unsupported reranker configuration")
+
     def _initialize_data_source(self, config: DataSourceConfig) -> DataSource:
         """
         Initialize data source based on configuration.
@@ -118,12 +278,83 @@ class RAGSystem:
             return PDFDataSource(config)
         raise ValueError("Unsupported data source configuration")
 
-    def index_data(self) -> None:
+    def _initialize_manifest_path(self, config: VectorDBConfig) -> str:
         """
-        Index data from the data source into the vector database.
+        Locate the indexing manifest for a vector database configuration.
+
+        Args:
+            config: Vector database configuration object
+
+        Returns:
+            Path of the manifest file kept next to the vector database
+
+        Examples:
+            >>> faiss_config = FAISSConfig(index_path="/path/to/faiss/index")
+            >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
+            >>> rag._initialize_manifest_path(faiss_config)
+            '/path/to/faiss/index.manifest.json'
+        """
+        if isinstance(config, FAISSConfig):
+            return f"{config.index_path}.manifest.json"
+        raise ValueError("Unsupported vector database configuration")
+
+    def _initialize_dedup_path(self, config: VectorDBConfig) -> str:
+        """
+        Locate the deduplication index for a vector database configuration.
 
         Args:
+            config: Vector database configuration object
 
+        Returns:
+            Path of the deduplication index kept next to the vector database
+
+        Examples:
+            >>> faiss_config = FAISSConfig(index_path="/path/to/faiss/index")
+            >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config, dedup_config=DedupConfig())
+            >>> rag._initialize_dedup_path(faiss_config)
+            '/path/to/faiss/index.dedup.npz'
+        """
+        if isinstance(config, FAISSConfig):
+            return f"{config.index_path}.dedup.npz"
+        raise ValueError("Unsupported vector database configuration")
+
+    def _initialize_lexical_index_path(self, config: VectorDBConfig) -> str:
+        """
+        Locate the BM25 index for a vector database configuration.
+
+        Args:
+            config: Vector database configuration object
+
+        Returns:
+            Path of the BM25 index kept next to the vector database
+
+        Examples:
+            >>> faiss_config = FAISSConfig(index_path="/path/to/faiss/index")
+            >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
+            >>> rag._initialize_lexical_index_path(faiss_config)
+            '/path/to/faiss/index.bm25.npz'
+        """
+        if isinstance(config, FAISSConfig):
+            return f"{config.index_path}.bm25.npz"
+        raise ValueError("Unsupported vector database configuration")
+
+    def index_data(self, batch_size: int = 256, queue_size: int = 4) -> None:
+        """
+        Index data from the data source into the vector database.
+
+        Indexing is incremental: only documents that are new or whose content
+        hash changed since the last run are split and embedded, and the chunks
+        of changed or deleted documents are removed from the vector database.
+        With deduplication enabled, chunks that duplicate an indexed chunk
+        share its embedding instead of being embedded again. The query cache
+        is cleared whenever chunks are added or deleted.
+        Documents stream through an `IngestionPipeline`, so reading, embedding
+        and adding to the index overlap and memory use stays bounded. The run
+        is timed as the `index` stage of `metrics`, and saving as `index.flush`.
+
+        Args:
+            batch_size: Number of chunks per embedding call
+            queue_size: Number of batches buffered between pipeline stages
 
         Returns:
             None
@@ -131,27 +362,57 @@ class RAGSystem:
         Examples:
             >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
             >>> rag.index_data()
-            >>> # Check if vector_db has embeddings
-            >>> len(rag.vector_db.get_all_embeddings()) > 0
-            True
+            >>> # Running again embeds nothing when the source is unchanged
+            >>> rag.index_data()
         """
-        documents: List[str] = self.data_source.load_data()
-        chunks: List[str] = []
-        for doc in documents:
-            chunks.extend(self.text_splitter.split_text(doc))
-        embeddings: List[List[float]] = [
-            self.model.get_embeddings(chunk) for chunk in chunks
-        ]
-        metadata: List[dict[str, str]] = [{"text": chunk} for chunk in chunks]
-        self.vector_db.add_embeddings(embeddings, metadata)
+        pipeline: IngestionPipeline = IngestionPipeline(
+            self.data_source,
+            self.text_splitter,
+            self.model,
+            self.vector_db,
+            self.manifest,
+            batch_size=batch_size,
+            queue_size=queue_size,
+            dedup=self.dedup,
+            lexical_index=self.lexical_index,
+            metrics=self.metrics,
+        )
+        try:
+            with self.metrics.span("index"):
+                pipeline.run()
+        finally:
+            # Whatever was indexed before a failure is kept and recorded
+            with self.metrics.span("index.flush"):
+                self.vector_db.flush()
+                self.manifest.save(self.manifest_path)
+                if self.dedup is not None:
+                    self.dedup.save(self.dedup_path)
+                if self.lexical_index is not None:
+                    self.lexical_index.save(self.lexical_index_path)
+            if self.query_cache is not None and (
+                pipeline.chunks_indexed or pipeline.chunks_deleted
+            ):
+                self.query_cache.clear()
+            self._shared_chunks = None
 
-    def query(self, query: str, k: int = 5) -> str:
+    def query(
+        self, query: str, k: int = 5, where: Optional[MetadataFilter] = None
+    ) -> str:
         """
         Process a query and return the response.
 
+        With a query cache, a response cached for the same or a semantically
+        similar query is returned without searching or generating. Filtered
+        queries bypass the cache. The whole query is timed as the `query`
+        stage of `metrics`, and its steps as `query.embed`, `query.search`,
+        `query.prompt`, `query.generate` and, when enabled, `query.fuse` and
+        `query.rerank`.
+
         Args:
             query: User question string
             k: Number of similar documents to retrieve
+            where: Optional filter restricting retrieval to chunks whose
+                metadata matches, e.g. `{"source": "/docs/manual.pdf"}`
 
         Returns:
             Generated response string
@@ -165,12 +426,365 @@ class RAGSystem:
             >>> len(response) > 0
             True
         """
-        query_embedding: List[float] = self.model.get_embeddings(query)
-        similar_docs: List[dict[str, str]] = self.vector_db.search(query_embedding, k)
-        context: str = "\n".join([doc["text"] for doc in similar_docs])
-        prompt: Prompt = Prompt(
-            system_message="You are a helpful AI assistant. Use the following context to answer the human's question.",
-            ai_message=f"Context: {context}",
-            human_message=query,
+        with self.metrics.span("query"):
+            self.metrics.increment("queries")
+            query_cache: Optional[QueryCache] = (
+                self.query_cache if where is None else None
+            )
+            if query_cache is not None:
+                cached: Optional[str] = query_cache.get(query, k)
+                if cached is not None:
+                    self.metrics.increment("query_cache_hits")
+                    return cached
+            with self.metrics.span("query.embed"):
+                query_embedding: List[float] = self.model.get_embeddings(query)
+            if query_cache is not None:
+                cached = query_cache.get_similar(query_embedding, k)
+                if cached is not None:
+                    self.metrics.increment("query_cache_hits")
+                    return cached
+                self.metrics.increment("query_cache_misses")
+            similar_docs: List[dict[str, str]] = self._retrieve(
+                query, query_embedding, k, where
+            )
+            prompt: str = self._build_prompt(query, similar_docs)
+            with self.metrics.span("query.generate"):
+                response: str = self.model.generate(prompt)
+            if query_cache is not None:
+                query_cache.put(query, k, query_embedding, response)
+            return response
+
+    def stream_query(
+        self, query: str, k: int = 5, where: Optional[MetadataFilter] = None
+    ) -> Iterator[GenerationChunk]:
+        """
+        Process a query and stream the response as it is generated.
+
+        Args:
+            query: User question string
+            k: Number of similar documents to retrieve
+            where: Optional filter restricting retrieval to chunks whose
+                metadata matches
+
+        Returns:
+            Iterator of generated chunks; the final one has `done=True` and
+            reports time to first token and tokens per second. A cached
+            response is yielded as a single final chunk. Stages are timed as
+            by `query`, except that `query.generate` and `query` include the
+            time the caller spends between chunks.
+
+        Examples:
+            >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
+            >>> for chunk in rag.stream_query("Your question here"):
+            ...     print(chunk.text, end="", flush=True)
+        """
+        with self.metrics.span("query"):
+            self.metrics.increment("queries")
+            query_cache: Optional[QueryCache] = (
+                self.query_cache if where is None else None
+            )
+            if query_cache is not None:
+                cached: Optional[str] = query_cache.get(query, k)
+                if cached is not None:
+                    self.metrics.increment("query_cache_hits")
+                    yield GenerationChunk(text=cached, done=True)
+                    return
+            with self.metrics.span("query.embed"):
+                query_embedding: List[float] = self.model.get_embeddings(query)
+            if query_cache is not None:
+                cached = query_cache.get_similar(query_embedding, k)
+                if cached is not None:
+                    self.metrics.increment("query_cache_hits")
+                    yield GenerationChunk(text=cached, done=True)
+                    return
+                self.metrics.increment("query_cache_misses")
+            similar_docs: List[dict[str, str]] = self._retrieve(
+                query, query_embedding, k, where
+            )
+            prompt: str = self._build_prompt(query, similar_docs)
+            pieces: List[str] = []
+            with self.metrics.span("query.generate"):
+                for chunk in self.model.generate_stream(prompt):
+                    pieces.append(chunk.text)
+                    yield chunk
+            if query_cache is not None:
+                query_cache.put(query, k, query_embedding, "".join(pieces))
+
+    def query_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        max_concurrent_generations: int = 4,
+        where: Optional[MetadataFilter] = None,
+    ) -> List[str]:
+        """
+        Process many queries and return their responses in input order.
+
+        All queries are embedded with batched requests and searched with a single
+        vectorised vector database call; generation requests are then sent
+        concurrently with at most `max_concurrent_generations` in flight.
+        Queries answered by the query cache are left out of every step. The
+        batch is timed as the `query_batch` stage of `metrics`, its batched
+        steps as `query_batch.embed`, `query_batch.search` and
+        `query_batch.generate`, and the per-query steps as by `query`.
+
+        Args:
+            queries: User question strings
+            k: Number of similar documents to retrieve per query
+            max_concurrent_generations: Maximum number of generation requests in flight
+            where: Optional filter restricting retrieval to chunks whose
+                metadata matches, for every query
+
+        Returns:
+            Generated response strings, one per query
+
+        Examples:
+            >>> rag = RAGSystem(ollama_config, faiss_config, pdf_config)
+            >>> responses = rag.query_batch(["First question", "Second question"])
+            >>> len(responses)
+            2
+        """
+        if not queries:
+            return []
+        with self.metrics.span("query_batch"):
+            self.metrics.increment("queries", len(queries))
+            query_cache: Optional[QueryCache] = (
+                self.query_cache if where is None else None
+            )
+            responses: List[Optional[str]] = [
+                query_cache.get(query, k) if query_cache is not None else None
+                for query in queries
+            ]
+            pending: List[int] = [
+                i for i, response in enumerate(responses) if response is None
+            ]
+            if query_cache is not None:
+                self.metrics.increment("query_cache_hits", len(queries) - len(pending))
+            if not pending:
+                return cast(List[str], responses)
+            with self.metrics.span("query_batch.embed"):
+                query_embeddings: List[List[float]] = self.model.get_embeddings_batch(
+                    [queries[i] for i in pending]
+                )
+            embeddings: Dict[int, List[float]] = dict(zip(pending, query_embeddings))
+            if query_cache is not None:
+                for i in pending:
+                    responses[i] = query_cache.get_similar(embeddings[i], k)
+                unanswered: List[int] = [i for i in pending if responses[i] is None]
+                self.metrics.increment(
+                    "query_cache_hits", len(pending) - len(unanswered)
+                )
+                self.metrics.increment("query_cache_misses", len(unanswered))
+                pending = unanswered
+                if not pending:
+                    return cast(List[str], responses)
+            with self.metrics.span("query_batch.search"):
+                where, ids = self._resolve_filter(where)
+                similar_docs: List[List[dict[str, str]]] = self.vector_db.search_batch(
+                    [embeddings[i] for i in pending],
+                    self._candidates(k),
+                    where=where,
+                    ids=ids,
+                )
+            similar_docs = [
+                self._rank(queries[i], docs, k, where, ids)
+                for i, docs in zip(pending, similar_docs)
+            ]
+            prompts: List[str] = [
+                self._build_prompt(queries[i], docs)
+                for i, docs in zip(pending, similar_docs)
+            ]
+            with self.metrics.span("query_batch.generate"):
+                with ThreadPoolExecutor(
+                    max_workers=max_concurrent_generations
+                ) as executor:
+                    for i, response in zip(
+                        pending, executor.map(self.model.generate, prompts)
+                    ):
+                        responses[i] = response
+                        if query_cache is not None:
+                            query_cache.put(queries[i], k, embeddings[i], response)
+            return cast(List[str], responses)
+
+    def _candidates(self, k: int) -> int:
+        """Number of results to take from each retriever for `k` final results."""
+        candidates: int = k
+        if self.hybrid_search_config is not None:
+            candidates = max(candidates, self.hybrid_search_config.candidates)
+        if self.reranker is not None:
+            candidates = max(candidates, self.reranker.candidates)
+        return candidates
+
+    def _retrieve(
+        self,
+        query: str,
+        query_embedding: List[float],
+        k: int,
+        where: Optional[MetadataFilter] = None,
+    ) -> List[dict[str, Any]]:
+        """
+        Retrieve the `k` most relevant chunks for a query.
+
+        Uses vector search alone, or fuses it with BM25 keyword search when
+        hybrid search is enabled, then reranks the candidates if a reranker
+        is configured.
+
+        Args:
+            query: User question string
+            query_embedding: Embedding of the question
+            k: Number of chunks to return
+            where: Optional filter on chunk metadata
+
+        Returns:
+            Retrieved chunks, most relevant first
+        """
+        with self.metrics.span("query.search"):
+            where, ids = self._resolve_filter(where)
+            dense: List[dict[str, Any]] = self.vector_db.search(
+                query_embedding, self._candidates(k), where=where, ids=ids
+            )
+        return self._rank(query, dense, k, where, ids)
+
+    def _resolve_filter(
+        self, where: Optional[MetadataFilter]
+    ) -> Tuple[Optional[MetadataFilter], Optional[np.ndarray]]:
+        """
+        Resolve a metadata filter into the restriction passed to the retrievers.
+
+        A deduplicated chunk is stored once, with the metadata of the first
+        document it was found in, so a filter on the source or page of another
+        document containing it would miss it. When the manifest records such
+        shared chunks, the filter is resolved to chunk ids instead: other
+        chunks match on their stored metadata, and shared ones if any of their
+        locations does.
+
+        Args:
+            where: Optional filter on chunk metadata
+
+        Returns:
+            The filter to apply and None, or None and the ids of the matching
+            chunks when shared chunks exist
+        """
+        if where is None:
+            return None, None
+        if self._shared_chunks is None:
+            shared: List[Tuple[int, Dict[str, Any]]] = self.manifest.shared_chunks()
+            self._shared_chunks = (
+                np.array([chunk for chunk, _ in shared], dtype=np.int64),
+                MetadataColumns.from_records([metadata for _, metadata in shared]),
+            )
+        shared_ids, locations = self._shared_chunks
+        if not len(shared_ids):
+            return where, None
+        stored: np.ndarray = self.vector_db.ids_matching(where)
+        return None, np.union1d(
+            stored[~np.isin(stored, shared_ids)], shared_ids[locations.mask(where)]
+        )
+
+    def _rank(
+        self,
+        query: str,
+        dense: List[dict[str, Any]],
+        k: int,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[np.ndarray] = None,
+    ) -> List[dict[str, Any]]:
+        """
+        Fuse and rerank vector search results down to the `k` chunks to use.
+
+        Args:
+            query: User question string
+            dense: Vector search results, most similar first
+            k: Number of chunks to return
+            where: Optional filter the dense results already satisfy
+            ids: Optional ids of the chunks allowed, which the dense results
+                already belong to
+
+        Returns:
+            Retrieved chunks, most relevant first
+        """
+        docs: List[dict[str, Any]] = dense
+        if self.lexical_index is not None:
+            fused: int = k if self.reranker is None else self._candidates(k)
+            with self.metrics.span("query.fuse"):
+                docs = self._fuse(query, dense, fused, where, ids)
+        if self.reranker is None:
+            return docs
+        with self.metrics.span("query.rerank"):
+            return self.reranker.rerank(query, docs, k)
+
+    def _fuse(
+        self,
+        query: str,
+        dense: List[dict[str, Any]],
+        k: int,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[np.ndarray] = None,
+    ) -> List[dict[str, Any]]:
+        """
+        Fuse vector and BM25 results by reciprocal rank fusion.
+
+        Each chunk scores `sum(1 / (rrf_k + rank))` over the result lists it
+        appears in. With a filter, keyword search only traverses the postings
+        of the chunks allowed by `ids`, or else reported by the vector
+        database as matching `where`. Chunks found only by keyword search are
+        fetched from the vector database.
+
+        Args:
+            query: User question string
+            dense: Vector search results, most similar first
+            k: Number of chunks to return
+            where: Optional filter the dense results already satisfy
+            ids: Optional ids of the chunks allowed, which the dense results
+                already belong to
+
+        Returns:
+            The `k` best fused chunks, each with its fusion `score`
+        """
+        rrf_k: int = self.hybrid_search_config.rrf_k
+        lexical: List[Tuple[int, float]] = self.lexical_index.search(
+            query,
+            self._candidates(k),
+            ids=ids if where is None else self.vector_db.ids_matching(where),
         )
-        return self.model.generate(prompt.construct_prompt())
+        scores: Dict[int, float] = {}
+        docs: Dict[int, dict[str, Any]] = {}
+        for rank, doc in enumerate(dense, start=1):
+            scores[doc["index"]] = scores.get(doc["index"], 0.0) + 1 / (rrf_k + rank)
+            docs[doc["index"]] = doc
+        for rank, (chunk, _) in enumerate(lexical, start=1):
+            scores[chunk] = scores.get(chunk, 0.0) + 1 / (rrf_k + rank)
+        top: List[int] = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+        missing: List[int] = [chunk for chunk in top if chunk not in docs]
+        if missing:
+            docs.update(
+                (doc["index"], doc) for doc in self.vector_db.get_by_ids(missing)
+            )
+        return [
+            {**docs[chunk], "score": scores[chunk]} for chunk in top if chunk in docs
+        ]
+
+    def _build_prompt(self, query: str, similar_docs: List[dict[str, str]]) -> str:
+        """
+        Build the generation prompt for a query from its retrieved documents.
+
+        The fixed `SYSTEM_MESSAGE` is not part of the prompt: the model sends
+        it in Ollama's `system` field, which the model template places ahead
+        of the prompt. The prompt holds the documents, packed into a context
+        of at most `context_builder.max_tokens` tokens with overlapping chunks
+        merged and near-duplicates dropped, followed by the query.
+
+        Args:
+            query: User question string
+            similar_docs: Retrieved documents, most similar first
+
+        Returns:
+            The constructed prompt string
+        """
+        with self.metrics.span("query.prompt"):
+            context: str = self.context_builder.build(similar_docs)
+            prompt: Prompt = Prompt(
+                ai_message=f"{CONTEXT_LABEL} {context}",
+                human_message=query,
+            )
+            return prompt.construct_prompt()
@@ -0,0 +1,87 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+from ..config.rerank_config import RerankerConfig
+
+
+class Reranker(ABC):
+    """
+    Abstract base class for rerankers.
+
+    A reranker rescores the chunks retrieved for a query, so that many
+    candidates can be retrieved and only the best few sent to the model.
+    Chunks are scored in batches. Before each batch after the first, the
+    time the previous one took is used to predict whether the next one fits
+    in the remaining budget; if not, scoring stops, and the chunks scored so
+    far are ranked ahead of the rest, which keep retrieval order. The first
+    batch is always scored, as there is no measurement to predict it from,
+    so a query is delayed by at most about `budget_ms` or one batch,
+    whichever is longer.
+    """
+
+    def __init__(self, config: RerankerConfig) -> None:
+        """
+        Initialize the reranker.
+
+        Args:
+            config (RerankerConfig): Configuration object for the reranker.
+        """
+        self.candidates: int = config.candidates
+        self.batch_size: int = config.batch_size
+        self.budget_seconds: float = config.budget_ms / 1000
+        self.fallbacks: int = 0
+
+    @abstractmethod
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        """
+        Score how relevant each text is to a query, larger being more relevant.
+
+        Examples:
+            >>> reranker.score_batch("replace the cartridge", ["Replace it.", "Hello"])
+            [1.0, 0.0]
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def rerank(
+        self, query: str, docs: List[Dict[str, Any]], k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder retrieved chunks by relevance and keep the best `k`.
+
+        Args:
+            query (str): User question.
+            docs (List[Dict[str, Any]]): Retrieved chunks, best first.
+            k (int): Number of chunks to return.
+
+        Returns:
+            List[Dict[str, Any]]: The `k` most relevant chunks, each with its
+                `rerank_score`; ties keep retrieval order. If the budget runs
+                out, the scored chunks come first by score, followed by the
+                unscored ones in retrieval order and without `rerank_score`.
+
+        Examples:
+            >>> docs = reranker.rerank("Your question here", retrieved, k=3)
+        """
+        started: float = time.monotonic()
+        last_batch: float = 0.0
+        scores: List[float] = []
+        for first in range(0, len(docs), self.batch_size):
+            batch_started: float = time.monotonic()
+            if (
+                self.budget_seconds
+                and batch_started + last_batch - started > self.budget_seconds
+            ):
+                self.fallbacks += 1
+                break
+            scores.extend(
+                self.score_batch(
+                    query,
+                    [doc["text"] for doc in docs[first : first + self.batch_size]],
+                )
+            )
+            last_batch = time.monotonic() - batch_started
+        order: List[int] = sorted(range(len(scores)), key=lambda i: -scores[i])
+        ranked: List[Dict[str, Any]] = [
+            {**docs[i], "rerank_score": scores[i]} for i in order[:k]
+        ]
+        return ranked + docs[len(scores) : len(scores) + k - len(ranked)]
@@ -0,0 +1,110 @@
+from typing import Any, Dict, List
+import numpy as np
+from .base import Reranker
+from ..config.rerank_config import CrossEncoderRerankerConfig
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Reranks chunks with a cross-encoder running on CPU with ONNX Runtime.
+
+    A cross-encoder reads the query and a chunk together and outputs one
+    relevance logit, which is more accurate than comparing separate
+    embeddings but costs a model pass per chunk. Query and chunk pairs are
+    tokenized with the model's Hugging Face tokenizer, truncating only the
+    chunk, and scored `batch_size` at a time within the latency budget.
+
+    Requires the optional `onnxruntime` and `tokenizers` packages.
+
+    Examples:
+        >>> config = CrossEncoderRerankerConfig(
+        ...     model_path="/models/ms-marco-MiniLM-L-6-v2/model.onnx",
+        ...     tokenizer_path="/models/ms-marco-MiniLM-L-6-v2/tokenizer.json",
+        ... )
+        >>> reranker = CrossEncoderReranker(config)
+        >>> docs = reranker.rerank("Your question here", retrieved, k=3)
+    """
+
+    def __init__(self, config: CrossEncoderRerankerConfig) -> None:
+        """
+        Load the ONNX model and its tokenizer.
+
+        Args:
+            config (CrossEncoderRerankerConfig): Configuration object for the reranker.
+
+        Raises:
+            ImportError: If `onnxruntime` or `tokenizers` is not installed.
+        """
+        super().__init__(config)
+        self.model_name: str = config.model_path
+        self.session: Any = self._load_session(config)
+        self.tokenizer: Any = self._load_tokenizer(config)
+        self._input_names: List[str] = [
+            model_input.name for model_input in self.session.get_inputs()
+        ]
+
+    @staticmethod
+    def _load_session(config: CrossEncoderRerankerConfig) -> Any:
+        """Create a CPU inference session for the model."""
+        try:
+            import onnxruntime
+        except ImportError as error:  # pragma: no cover
+            raise ImportError(
+                "CrossEncoderReranker requires onnxruntime: pip install .[onnx]"
+            ) from error
+        options: Any = onnxruntime.SessionOptions()
+        if config.num_threads is not None:
+            options.intra_op_num_threads = config.num_threads
+        return onnxruntime.InferenceSession(
+            config.model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    @staticmethod
+    def _load_tokenizer(config: CrossEncoderRerankerConfig) -> Any:
+        """Load the tokenizer, truncating chunks and padding to the longest pair."""
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as error:  # pragma: no cover
+            raise ImportError(
+                "CrossEncoderReranker requires tokenizers: pip install .[onnx]"
+            ) from error
+        tokenizer: Any = Tokenizer.from_file(config.tokenizer_path)
+        tokenizer.enable_truncation(
+            max_length=config.max_length, strategy="only_second"
+        )
+        tokenizer.enable_padding()
+        return tokenizer
+
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        """
+        Score each query and text pair with the cross-encoder.
+
+        Args:
+            query (str): User question.
+            texts (List[str]): Chunk texts.
+
+        Returns:
+            List[float]: The relevance logit of each text.
+        """
+        if not texts:
+            return []
+        encodings: List[Any] = self.tokenizer.encode_batch(
+            [(query, text) for text in texts]
+        )
+        features: Dict[str, np.ndarray] = {
+            name: np.array(
+                [getattr(encoding, attribute) for encoding in encodings],
+                dtype=np.int64,
+            )
+            for name, attribute in (
+                ("input_ids", "ids"),
+                ("attention_mask", "attention_mask"),
+                ("token_type_ids", "type_ids"),
+            )
+        }
+        logits: np.ndarray = self.session.run(
+            None, {name: features[name] for name in self._input_names}
+        )[0]
+        # Single-logit models score relevance directly; two-class models
+        # output (irrelevant, relevant)
+        return logits.reshape(len(texts), -1)[:, -1].astype(float).tolist()
@@ -0,0 +1,72 @@
+import math
+from typing import Dict, List, Set, Tuple
+from .base import Reranker
+from ..config.rerank_config import LexicalRerankerConfig
+from ..lexical_index import tokenize
+
+
+class LexicalReranker(Reranker):
+    """
+    Reranks chunks by how much of the query they contain.
+
+    A chunk scores the share of the query's distinct terms it contains, each
+    weighted by its inverse document frequency among the chunks of the batch,
+    plus `bigram_weight` times the share of the query's consecutive term
+    pairs it contains as consecutive terms. Terms are tokenized as for BM25
+    search. Scoring takes microseconds per chunk, so it fits any budget; keep
+    `batch_size` at least `candidates` so frequencies are counted over all
+    candidates at once.
+
+    Examples:
+        >>> reranker = LexicalReranker(LexicalRerankerConfig())
+        >>> reranker.score_batch(
+        ...     "replace the toner cartridge",
+        ...     ["To replace the toner cartridge, open the lid.", "The printer is off."],
+        ... )
+        [1.5, 0.08...]
+    """
+
+    def __init__(self, config: LexicalRerankerConfig) -> None:
+        """
+        Initialize the reranker.
+
+        Args:
+            config (LexicalRerankerConfig): Configuration object for the reranker.
+        """
+        super().__init__(config)
+        self.bigram_weight: float = config.bigram_weight
+
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        """
+        Score the query-term overlap of each text.
+
+        Args:
+            query (str): User question.
+            texts (List[str]): Chunk texts.
+
+        Returns:
+            List[float]: One score per text, between 0 and `1 + bigram_weight`.
+        """
+        query_terms: List[str] = tokenize(query)
+        if not query_terms:
+            return [0.0] * len(texts)
+        query_bigrams: Set[Tuple[str, str]] = set(zip(query_terms, query_terms[1:]))
+        text_terms: List[List[str]] = [tokenize(text) for text in texts]
+        text_sets: List[Set[str]] = [set(terms) for terms in text_terms]
+        weights: Dict[str, float] = {}
+        for term in set(query_terms):
+            frequency: int = sum(term in terms for terms in text_sets)
+            weights[term] = math.log(
+                1 + (len(texts) - frequency + 0.5) / (frequency + 0.5)
+            )
+        total: float = sum(weights.values())
+        scores: List[float] = []
+        for terms, term_set in zip(text_terms, text_sets):
+            score: float = sum(
+                weight for term, weight in weights.items() if term in term_set
+            ) / (total or 1.0)
+            if query_bigrams:
+                found: int = len(query_bigrams.intersection(zip(terms, terms[1:])))
+                score += self.bigram_weight * found / len(query_bigrams)
+            scores.append(score)
+        return scores
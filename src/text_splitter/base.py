@@ -1,11 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Tuple
 
 
 class TextSplitter(ABC):
     """Abstract base class for text splitters."""
 
     @abstractmethod
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split the input text into chunks, returned as `(start, end)` offsets.
+
+        Each chunk is `text[start:end]`, so callers can slice lazily and keep
+        the position of every chunk in the source text.
+
+        Examples:
+            >>> splitter = RecursiveTextSplitter(chunk_size=5, chunk_overlap=2)
+            >>> splitter.split_offsets("First sentence here. Second one follows.")
+            [(0, 20), (21, 40)]
+        """
+        raise NotImplementedError  # pragma: no cover
+
     def split_text(self, text: str) -> List[str]:
         """
         Split the input text into chunks.
@@ -15,6 +29,6 @@ class TextSplitter(ABC):
             >>> text = "This is a long piece of text that needs to be split into smaller chunks."
             >>> chunks = splitter.split_text(text)
             >>> print(len(chunks))
-            2
+            1
         """
-        raise NotImplementedError  # pragma: no cover
+        return [text[start:end] for start, end in self.split_offsets(text)]
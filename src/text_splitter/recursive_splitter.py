@@ -1,30 +1,56 @@
-from typing import List
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Pattern, Tuple
 from .base import TextSplitter
 
+# Word and punctuation tokens, a tokenizer-free approximation of model tokens.
+_TOKEN_PATTERN: Pattern[str] = re.compile(r"\w+|[^\w\s]")
+
+# Separators tried in order: paragraphs, then sentences, then words.
+_SEPARATORS: Tuple[Pattern[str], ...] = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+)
+
 
 class RecursiveTextSplitter(TextSplitter):
     """
     RecursiveTextSplitter implementation.
 
+    Text is split on paragraph breaks first; any paragraph longer than
+    `chunk_size` tokens is split on sentence ends, any sentence still too long
+    on whitespace, and any remaining run of tokens at token boundaries. The
+    pieces are then merged greedily into chunks of at most `chunk_size` tokens,
+    each starting with up to `chunk_overlap` tokens of whole pieces from the
+    end of the previous chunk.
+
+    Tokens are words and punctuation marks. The text is tokenized once and all
+    sizes are computed from token offsets, so splitting never copies the text.
+
     Examples:
         >>> splitter = RecursiveTextSplitter(chunk_size=100, chunk_overlap=20)
         >>> text = "This is a long piece of text that needs to be split into smaller chunks."
         >>> chunks = splitter.split_text(text)
         >>> print(len(chunks))
-        2
+        1
     """
 
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200) -> None:
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 32) -> None:
         """
         Initialize RecursiveTextSplitter.
 
         Args:
-            chunk_size: Maximum size of each text chunk
-            chunk_overlap: Number of characters to overlap between chunks
+            chunk_size: Maximum number of tokens in each text chunk
+            chunk_overlap: Maximum number of tokens to overlap between chunks
 
         Returns:
             None
 
+        Raises:
+            ValueError: If `chunk_size` is not positive, or `chunk_overlap` is
+                negative or not smaller than `chunk_size`.
+
         Examples:
             >>> splitter = RecursiveTextSplitter(chunk_size=500, chunk_overlap=50)
             >>> splitter.chunk_size
@@ -32,31 +58,102 @@ class RecursiveTextSplitter(TextSplitter):
             >>> splitter.chunk_overlap
             50
         """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(
+                f"chunk_overlap must be in [0, chunk_size), got {chunk_overlap}"
+            )
         self.chunk_size: int = chunk_size
         self.chunk_overlap: int = chunk_overlap
 
-    def split_text(self, text: str) -> List[str]:
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
         """
-        Split the input text into chunks recursively with overlap.
+        Split the input text recursively into overlapping chunks.
 
         Args:
             text: Input text string to split
 
         Returns:
-            List of text chunks as strings
+            List of `(start, end)` offsets of the chunks in `text`
 
         Examples:
-            >>> splitter = RecursiveTextSplitter(chunk_size=10, chunk_overlap=2)
-            >>> text = "This is a test text for splitting."
-            >>> chunks = splitter.split_text(text)
-            >>> print(chunks)
-            ['This is a ', 'a test tex', 'text for s', 'splitting.']
+            >>> splitter = RecursiveTextSplitter(chunk_size=5, chunk_overlap=2)
+            >>> splitter.split_offsets("First sentence here. Second one follows.")
+            [(0, 20), (21, 40)]
         """
-        chunks: List[str] = []
-        start: int = 0
-        while start < len(text):
-            end: int = start + self.chunk_size
-            chunk: str = text[start:end]
-            chunks.append(chunk)
-            start = end - self.chunk_overlap
+        starts: List[int] = []
+        ends: List[int] = []
+        for match in _TOKEN_PATTERN.finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        if not starts:
+            return []
+        pieces: List[Tuple[int, int]] = self._split(
+            text, starts, ends, starts[0], ends[-1], 0
+        )
+        return self._merge(starts, ends, pieces)
+
+    @staticmethod
+    def _count(starts: List[int], ends: List[int], start: int, end: int) -> int:
+        """Number of tokens lying entirely within `text[start:end]`."""
+        return max(0, bisect_right(ends, end) - bisect_left(starts, start))
+
+    def _split(
+        self,
+        text: str,
+        starts: List[int],
+        ends: List[int],
+        start: int,
+        end: int,
+        level: int,
+    ) -> List[Tuple[int, int]]:
+        """Split `text[start:end]` into pieces of at most `chunk_size` tokens."""
+        if self._count(starts, ends, start, end) <= self.chunk_size:
+            return [(start, end)]
+        if level == len(_SEPARATORS):
+            # No separator left: cut at token boundaries.
+            first: int = bisect_left(starts, start)
+            last: int = bisect_right(ends, end)
+            return [
+                (starts[index], ends[min(index + self.chunk_size, last) - 1])
+                for index in range(first, last, self.chunk_size)
+            ]
+
+        pieces: List[Tuple[int, int]] = []
+        position: int = start
+        for match in _SEPARATORS[level].finditer(text, start, end):
+            if match.start() > position:
+                pieces.extend(
+                    self._split(text, starts, ends, position, match.start(), level + 1)
+                )
+            position = match.end()
+        if position < end:
+            pieces.extend(self._split(text, starts, ends, position, end, level + 1))
+        return pieces
+
+    def _merge(
+        self, starts: List[int], ends: List[int], pieces: List[Tuple[int, int]]
+    ) -> List[Tuple[int, int]]:
+        """Greedily merge consecutive pieces into overlapping chunks."""
+        chunks: List[Tuple[int, int]] = []
+        current: List[Tuple[int, int]] = []
+        for piece in pieces:
+            if (
+                current
+                and self._count(starts, ends, current[0][0], piece[1]) > self.chunk_size
+            ):
+                chunks.append((current[0][0], current[-1][1]))
+                # Carry whole trailing pieces over as overlap, dropping them
+                # from the front until the new piece fits.
+                while current and (
+                    self._count(starts, ends, current[0][0], current[-1][1])
+                    > self.chunk_overlap
+                    or self._count(starts, ends, current[0][0], piece[1])
+                    > self.chunk_size
+                ):
+                    current.pop(0)
+            current.append(piece)
+        if current:
+            chunks.append((current[0][0], current[-1][1]))
         return chunks
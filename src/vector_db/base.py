@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
+import numpy as np
+from .metadata_columns import MetadataFilter
 
 
 class VectorDB(ABC):
@@ -7,27 +9,102 @@ class VectorDB(ABC):
 
     @abstractmethod
     def add_embeddings(
-        self, embeddings: List[List[float]], metadata: List[Dict[str, Any]]
+        self,
+        embeddings: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        ids: Optional[List[int]] = None,
     ) -> None:
         """
-        Add embeddings to the vector database.
+        Add embeddings to the vector database, optionally under stable ids.
 
         Examples:
             >>> embeddings = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
             >>> metadata = [{"text": "Hello"}, {"text": "World"}]
-            >>> vector_db.add_embeddings(embeddings, metadata)
+            >>> vector_db.add_embeddings(embeddings, metadata, ids=[10, 11])
         """
         raise NotImplementedError  # pragma: no cover
 
     @abstractmethod
-    def search(self, query_embedding: List[float], k: int) -> List[Dict[str, Any]]:
+    def delete_embeddings(self, ids: List[int]) -> None:
         """
-        Search for similar embeddings in the vector database.
+        Delete embeddings from the vector database by id.
+
+        Examples:
+            >>> vector_db.delete_embeddings([10])
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def flush(self) -> None:
+        """
+        Persist any buffered changes. The default implementation does nothing.
+
+        Examples:
+            >>> vector_db.flush()
+        """
+        return None
+
+    @abstractmethod
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar embeddings in the vector database, optionally only
+        among chunks whose metadata matches `where` and whose id is in `ids`.
 
         Examples:
             >>> query_embedding = [0.1, 0.2, 0.3]
             >>> results = vector_db.search(query_embedding, k=2)
             >>> print(results)
             [{'distance': 0.1, 'index': 0}, {'distance': 0.2, 'index': 1}]
+            >>> results = vector_db.search(query_embedding, k=2, where={"source": "a.pdf"})
+            >>> results = vector_db.search(query_embedding, k=2, ids=[10, 11])
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    @abstractmethod
+    def get_by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch stored chunks by id, in input order, skipping unknown ids.
+
+        Examples:
+            >>> vector_db.get_by_ids([10, 99])
+            [{'index': 10, 'text': 'Hello'}]
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    @abstractmethod
+    def ids_matching(self, where: MetadataFilter) -> np.ndarray:
+        """
+        Return the ids of the stored chunks whose metadata matches a filter.
+
+        Examples:
+            >>> vector_db.ids_matching({"source": "a.pdf"})
+            array([10, 11])
         """
         raise NotImplementedError  # pragma: no cover
+
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar embeddings for many queries, in input order.
+
+        The default implementation calls `search` once per query.
+
+        Examples:
+            >>> results = vector_db.search_batch([[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]], k=2)
+            >>> print(len(results))
+            2
+        """
+        return [
+            self.search(query_embedding, k, where=where, ids=ids)
+            for query_embedding in query_embeddings
+        ]
@@ -1,15 +1,44 @@
-from typing import List, Dict, Any, Optional
+import json
+import logging
+import os
+import time
+from typing import Callable, List, Dict, Any, Optional, Sequence, Set, Tuple, cast
 import faiss
 import numpy as np
 from .base import VectorDB
+from .mapped_sequence import MappedSequence, map_array
+from .metadata_columns import MetadataColumns, MetadataFilter
+from .write_ahead_log import WriteAheadLog
 from ..config.vector_db_config import FAISSConfig
 
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Scalar quantizer types of the reduced-precision storage options
+_SCALAR_QUANTIZERS: Dict[str, int] = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Training vectors per centroid below which FAISS warns of poor clustering
+_MIN_POINTS_PER_CENTROID: int = 39
+
 
 class FAISSVectorDB(VectorDB):
     """
     FAISS implementation of VectorDB
 
     This class provides methods to add embeddings and search for similar embeddings using FAISS.
+    With the `inner_product` and `cosine` metrics, the `distance` of a search
+    result is a similarity, so larger values are closer.
+
+    Deleting or replacing a chunk leaves a tombstone: its row stays in the
+    chunk store, and in flat and HNSW indexes, until a checkpoint compacts
+    them, and searches skip it through an `IDSelector`. Each change therefore
+    costs time in proportion to the chunks changed. IVF indexes remove
+    vectors at once through a hash-table direct map. Checkpoints compact
+    flat and IVF indexes every time, and rebuild HNSW graphs, which do not
+    support removal, only once more than `max_deleted_fraction` of their
+    vectors are deleted.
 
     Examples:
         >>> from ..config.vector_db_config import FAISSConfig
@@ -22,12 +51,25 @@ class FAISSVectorDB(VectorDB):
         >>> results = vector_db.search(query_embedding, k=1)
         >>> print(results)
         [{'distance': 0.0, 'index': 0, 'text': 'Hello'}]
+        >>> vector_db.delete_embeddings([1])
+        >>> vector_db.flush()
     """
 
     def __init__(self, config: FAISSConfig) -> None:
         """
         Initialize FAISS vector database.
 
+        If an index was previously saved at `index_path`, it is loaded together
+        with its chunk ids, texts and metadata, and any changes recorded in the
+        write-ahead log since that checkpoint are replayed, so the database can
+        serve queries without re-indexing.
+
+        With `read_only=True` the checkpoint is memory-mapped instead: the FAISS
+        index is opened with `IO_FLAG_MMAP`, and chunk texts, metadata and ids
+        are read lazily from their files. Several worker processes then share
+        one page-cache copy, and opening takes constant time. Logged changes
+        that have not been checkpointed are not visible in this mode.
+
         Args:
             config (FAISSConfig): Configuration object for the FAISS vector database.
 
@@ -36,66 +78,955 @@ class FAISSVectorDB(VectorDB):
             >>> config = FAISSConfig(index_path="/path/to/faiss/index")
             >>> vector_db = FAISSVectorDB(config)
         """
+        self.config: FAISSConfig = config
         self.file_path: str = config.index_path
+        self.texts_path: str = f"{config.index_path}.texts"
+        self.offsets_path: str = f"{config.index_path}.offsets"
+        self.metadata_codes_path: str = f"{config.index_path}.meta.codes"
+        self.metadata_values_path: str = f"{config.index_path}.meta.values.json"
+        # Checkpoints written before metadata columns held one JSON line per chunk
+        self.legacy_metadata_paths: Tuple[str, str] = (
+            f"{config.index_path}.meta.jsonl",
+            f"{config.index_path}.meta.offsets",
+        )
+        self.ids_path: str = f"{config.index_path}.ids"
+        self.deleted_path: str = f"{config.index_path}.deleted"
+        self.id_lookup_path: str = f"{config.index_path}.ids.lookup"
+        self.checkpoint_path: str = f"{config.index_path}.checkpoint"
+        self.log: WriteAheadLog = WriteAheadLog(f"{config.index_path}.wal")
         self.index: Optional[faiss.Index] = None
         self.dimension: Optional[int] = None
-        self.texts: List[str] = []
+        self._texts: Sequence[str] = []
+        self._metadata: MetadataColumns = MetadataColumns()
+        self._ids: np.ndarray = np.empty(0, dtype=np.int64)
+        # `ids` is a prefix view of this buffer, whose capacity grows
+        # geometrically so appending a batch does not copy every stored id
+        self._id_buffer: np.ndarray = self._ids
+        self._next_id: int = 0
+        # Writable databases map ids to chunk-store rows with a hash table kept
+        # up to date on every change; read-only ones search the sorted lookup
+        # saved with the checkpoint, in which row 0 holds the ids in ascending
+        # order and row 1 the chunk-store row of each
+        self._id_rows: Dict[int, int] = {}
+        self._id_lookup: np.ndarray = np.empty((2, 0), dtype=np.int64)
+        # Chunk-store rows of deleted and replaced chunks, and the cached mask
+        # of the other rows
+        self._deleted_rows: Set[int] = set()
+        self._live_rows: Optional[np.ndarray] = None
+        self._pending_changes: int = 0
+        self._last_checkpoint: float = time.monotonic()
+        self._load_or_create_index()
 
-    '''
     def _load_or_create_index(self) -> None:
         """
-        Load existing index or prepare for creating a new one.
+        Load the last checkpoint and replay the write-ahead log on top of it.
+
+        Raises:
+            ValueError: If the saved chunk store does not match the saved index.
 
         Examples:
             >>> vector_db = FAISSVectorDB(FAISSConfig(index_path="/path/to/faiss/index"))
             >>> vector_db._load_or_create_index()
         """
-        if os.path.exists(self.file_path):
-            self.index = faiss.read_index(self.file_path)
-            print(f"Loaded existing index from {self.file_path}")
+        if self.config.read_only:
+            self._map_checkpoint()
+            return
+        if os.path.exists(self.checkpoint_path):
+            self._commit_checkpoint()
+        self._load_checkpoint()
+        for record in self.log.replay():
+            if record[0] == "add":
+                _, ids, vectors, metadata = record
+                self._apply_add(vectors, metadata, ids)
+            else:
+                self._apply_delete(record[1])
+            self._pending_changes += len(record[1])
+        if self._pending_changes:
+            logger.info(
+                "Replayed %d logged changes onto %s",
+                self._pending_changes,
+                self.file_path,
+            )
+
+    def _load_checkpoint(self) -> None:
+        """
+        Load the index and chunk store written by the last checkpoint, if any.
+
+        Raises:
+            ValueError: If the saved chunk store does not match the saved index.
+        """
+        if not os.path.exists(self.file_path):
+            logger.info(
+                "Index file not found at %s. It will be created when adding embeddings.",
+                self.file_path,
+            )
+            return
+        if not os.path.exists(self.offsets_path):
+            logger.warning(
+                "No chunk store found next to %s. The index will be rebuilt when adding embeddings.",
+                self.file_path,
+            )
+            return
+
+        self._check_chunk_store_files()
+        self.index = faiss.read_index(self.file_path)
+        self.dimension = self.index.d
+        with self._open_texts() as texts:
+            self._texts = list(texts)
+        self._metadata = self._open_metadata(mmap=False)
+        self._ids = self._id_buffer = np.fromfile(self.ids_path, dtype=np.int64)
+        self._deleted_rows = set(self._load_deleted_rows().tolist())
+        self._check_checkpoint()
+        self._index_ids()
+        ivf: Optional[faiss.IndexIVF] = self._ivf()
+        if ivf is not None and ivf.direct_map.type != faiss.DirectMap.Hashtable:
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        logger.info("Loaded existing index from %s", self.file_path)
+
+    def _map_checkpoint(self) -> None:
+        """
+        Memory-map the last checkpoint read-only, without copying it into memory.
+
+        Raises:
+            FileNotFoundError: If no checkpoint has been written at `index_path`.
+            ValueError: If the saved chunk store does not match the saved index.
+        """
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"Index file not found at {self.file_path}")
+        self._check_chunk_store_files()
+        # IVF inverted lists are mapped by IO_FLAG_MMAP; flat codes (also used as
+        # HNSW storage) need IO_FLAG_MMAP_IFC, and the two cannot be combined.
+        # IVF databases still staging vectors in a small flat index are read
+        # into memory by IO_FLAG_MMAP.
+        if self.config.index_type in ("ivf_flat", "ivf_pq"):
+            mmap_flag: int = faiss.IO_FLAG_MMAP
+        else:
+            mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        self.index = faiss.read_index(
+            self.file_path, mmap_flag | faiss.IO_FLAG_READ_ONLY
+        )
+        self.dimension = self.index.d
+        self._texts = self._open_texts()
+        self._metadata = self._open_metadata(mmap=True)
+        self._ids = map_array(self.ids_path, np.int64)
+        self._id_lookup = map_array(self.id_lookup_path, np.int64, (2, -1))
+        self._deleted_rows = set(self._load_deleted_rows().tolist())
+        self._check_checkpoint()
+        logger.info("Memory-mapped existing index from %s read-only", self.file_path)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Ids of the stored chunks, in chunk-store order."""
+        live: Optional[np.ndarray] = self._live()
+        return self._ids if live is None else self._ids[live]
+
+    @property
+    def texts(self) -> Sequence[str]:
+        """Texts of the stored chunks, in chunk-store order."""
+        live: Optional[np.ndarray] = self._live()
+        if live is None:
+            return self._texts
+        return [text for text, kept in zip(self._texts, live) if kept]
+
+    @property
+    def metadata(self) -> MetadataColumns:
+        """Metadata of the stored chunks, in chunk-store order."""
+        live: Optional[np.ndarray] = self._live()
+        return self._metadata if live is None else self._metadata.select(live)
+
+    def _live(self) -> Optional[np.ndarray]:
+        """
+        Mask of the chunk-store rows that are not deleted.
+
+        Returns:
+            Optional[np.ndarray]: Boolean mask over the rows, or None when no
+                row is deleted.
+        """
+        if not self._deleted_rows:
+            return None
+        if self._live_rows is None or len(self._live_rows) != len(self._ids):
+            live: np.ndarray = np.ones(len(self._ids), dtype=bool)
+            live[list(self._deleted_rows)] = False
+            self._live_rows = live
+        return self._live_rows
+
+    def _ivf(self) -> Optional[faiss.IndexIVF]:
+        """The IVF index, or None for the flat and HNSW indexes behind an id map."""
+        if isinstance(self.index, faiss.IndexIDMap):
+            return None
+        return faiss.extract_index_ivf(self.index)
+
+    def _load_deleted_rows(self) -> np.ndarray:
+        """Read the tombstoned rows saved by `_save`; older checkpoints have none."""
+        if not os.path.exists(self.deleted_path):
+            return np.empty(0, dtype=np.int64)
+        return np.fromfile(self.deleted_path, dtype=np.int64)
+
+    def _open_texts(self) -> MappedSequence[str]:
+        """Map the chunk texts saved by `_save`."""
+        return MappedSequence(
+            self.texts_path, self.offsets_path, lambda data: data.decode("utf-8")
+        )
+
+    def _open_metadata(self, mmap: bool) -> MetadataColumns:
+        """Load or map the metadata columns saved by `_save`."""
+        if self._has_legacy_metadata():
+            with MappedSequence(*self.legacy_metadata_paths, json.loads) as records:
+                return MetadataColumns.from_records(records)
+        return MetadataColumns.load(
+            self.metadata_codes_path, self.metadata_values_path, mmap=mmap
+        )
+
+    def _has_legacy_metadata(self) -> bool:
+        """Whether a writable checkpoint still has JSON-lines metadata to convert."""
+        return (
+            not self.config.read_only
+            and not os.path.exists(self.metadata_codes_path)
+            and os.path.exists(self.legacy_metadata_paths[0])
+        )
+
+    def _check_chunk_store_files(self) -> None:
+        """
+        Check that every chunk-store file of the checkpoint exists.
+
+        Raises:
+            ValueError: If any chunk-store file is missing.
+        """
+        paths: List[str] = [
+            self.texts_path,
+            self.offsets_path,
+            *(
+                self.legacy_metadata_paths
+                if self._has_legacy_metadata()
+                else (self.metadata_codes_path, self.metadata_values_path)
+            ),
+            self.ids_path,
+            self.id_lookup_path,
+        ]
+        missing: List[str] = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise ValueError(
+                f"Chunk store next to {self.file_path} is incomplete, missing: "
+                + ", ".join(missing)
+            )
+
+    def _check_checkpoint(self) -> None:
+        """
+        Check that the chunk store has one record per indexed vector, and that
+        the index was built with the configured metric.
+
+        Raises:
+            ValueError: If the saved chunk store does not match the saved index,
+                or the index uses a different metric.
+        """
+        if self.index.metric_type != self._metric_type():
+            raise ValueError(
+                f"Index at {self.file_path} was built with a different metric "
+                f"than {self.config.metric!r}; re-index to change it"
+            )
+        # IVF indexes drop deleted vectors at once, the others keep them
+        vectors: int = len(self._ids) - (
+            0 if isinstance(self.index, faiss.IndexIDMap) else len(self._deleted_rows)
+        )
+        if not (
+            self.index.ntotal == vectors
+            and len(self._texts) == len(self._metadata) == len(self._ids)
+        ):
+            raise ValueError(
+                f"Chunk store next to {self.file_path} does not match the index: "
+                f"{self.index.ntotal} vectors, {len(self._texts)} texts, "
+                f"{len(self._metadata)} metadata records, {len(self._ids)} ids"
+            )
+
+    def _check_writable(self) -> None:
+        """
+        Raises:
+            ValueError: If the database was opened with `read_only=True`.
+        """
+        if self.config.read_only:
+            raise ValueError(f"Index at {self.file_path} is opened read-only")
+
+    def _save(self) -> None:
+        """
+        Atomically save the index, chunk ids, texts and metadata next to `index_path`.
+
+        Texts are stored as one UTF-8 blob plus an int64 array of byte
+        offsets, and metadata as an int32 matrix of column codes plus a JSON
+        file of column vocabularies, so both can be memory-mapped.
+        Ids are stored as a raw int64 array, next to a sorted copy of the live
+        ones built here that read-only readers use to map search results back
+        to rows, and an int64 array of the rows of deleted chunks that are
+        kept until the next compaction. Every file is first written and
+        fsync'ed under a `.tmp` name.
+        A checkpoint marker listing them is then renamed into place, and the
+        files are renamed over the previous ones. A crash before the marker
+        exists leaves the old checkpoint intact, and a crash after it is rolled
+        forward on the next load.
+        """
+        encoded_texts: List[bytes] = [text.encode("utf-8") for text in self._texts]
+        metadata_codes, metadata_values = self._metadata.encode()
+
+        def offsets(encoded: List[bytes]) -> np.ndarray:
+            result: np.ndarray = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(blob) for blob in encoded], out=result[1:])
+            return result
+
+        def write_blob(encoded: List[bytes]) -> Callable[[str], None]:
+            def write(path: str) -> None:
+                with open(path, "wb") as file:
+                    file.write(b"".join(encoded))
+
+            return write
+
+        def write_json(value: Any) -> Callable[[str], None]:
+            def write(path: str) -> None:
+                with open(path, "w", encoding="utf-8") as file:
+                    json.dump(value, file, separators=(",", ":"))
+
+            return write
+
+        writers: Dict[str, Callable[[str], None]] = {
+            self.file_path: lambda path: faiss.write_index(self.index, path),
+            self.ids_path: self._ids.tofile,
+            self.id_lookup_path: self._sorted_id_lookup().tofile,
+            self.deleted_path: np.array(
+                sorted(self._deleted_rows), dtype=np.int64
+            ).tofile,
+            self.texts_path: write_blob(encoded_texts),
+            self.offsets_path: offsets(encoded_texts).tofile,
+            self.metadata_codes_path: metadata_codes.tofile,
+            self.metadata_values_path: write_json(metadata_values),
+        }
+        for path, write in writers.items():
+            write(f"{path}.tmp")
+            self._fsync(f"{path}.tmp")
+
+        with open(f"{self.checkpoint_path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(list(writers), file)
+        self._fsync(f"{self.checkpoint_path}.tmp")
+        os.replace(f"{self.checkpoint_path}.tmp", self.checkpoint_path)
+        self._commit_checkpoint()
+
+    def _commit_checkpoint(self) -> None:
+        """Move the files listed in the checkpoint marker into place, then drop it."""
+        with open(self.checkpoint_path, encoding="utf-8") as file:
+            paths: List[str] = json.load(file)
+        for path in paths:
+            if os.path.exists(f"{path}.tmp"):
+                os.replace(f"{path}.tmp", path)
+        self._fsync_directory()
+        os.remove(self.checkpoint_path)
+
+    def _fsync(self, path: str) -> None:
+        """Force a file's contents to disk."""
+        with open(path, "rb") as file:
+            os.fsync(file.fileno())
+
+    def _fsync_directory(self) -> None:
+        """Force renames in the index directory to disk, where the OS supports it."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return  # pragma: no cover
+        descriptor: int = os.open(
+            os.path.dirname(os.path.abspath(self.file_path)),
+            os.O_RDONLY | os.O_DIRECTORY,
+        )
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def _create_index(self, dimension: int) -> faiss.Index:
+        """
+        Build an empty index for the first vectors added.
+
+        Indexes with quantizers to train (IVF, and `sq8` storage) start with a
+        flat staging index, replaced by `_train_staged` once enough vectors
+        are stored to train them.
+
+        Args:
+            dimension (int): Dimension of the vectors.
+
+        Returns:
+            faiss.Index: An empty index that accepts `add_with_ids`.
+        """
+        if self._requires_training():
+            return faiss.IndexIDMap(faiss.IndexFlat(dimension, self._metric_type()))
+        return self._create_id_mapped_index(np.empty((0, dimension), np.float32))
+
+    def _create_id_mapped_index(self, vectors: np.ndarray) -> faiss.Index:
+        """
+        Build an empty flat or HNSW index behind an id map, training it if required.
+
+        8-bit scalar quantizer ranges are trained on a random sample of at most
+        `training_sample_size` vectors from `vectors`.
+
+        Args:
+            vectors (np.ndarray): Stored vectors to train on; only their
+                dimension is used if the index needs no training.
+
+        Returns:
+            faiss.Index: An empty index that accepts `add_with_ids`.
+        """
+        dimension: int = vectors.shape[1]
+        metric: int = self._metric_type()
+        quantizer_type: Optional[int] = _SCALAR_QUANTIZERS.get(self.config.storage)
+        if self.config.index_type == "flat" and quantizer_type is None:
+            base: faiss.Index = faiss.IndexFlat(dimension, metric)
+        elif self.config.index_type == "flat":
+            base = faiss.IndexScalarQuantizer(dimension, quantizer_type, metric)
+        elif quantizer_type is None:
+            base = faiss.IndexHNSWFlat(dimension, self.config.hnsw_m, metric)
+        else:
+            base = faiss.IndexHNSWSQ(
+                dimension, quantizer_type, self.config.hnsw_m, metric
+            )
+        if self.config.index_type == "hnsw":
+            base.hnsw.efConstruction = self.config.ef_construction
+        if not base.is_trained:
+            base.train(self._training_sample(vectors, self.config.training_sample_size))
+        return faiss.IndexIDMap(base)
+
+    def _create_ivf_index(self, vectors: np.ndarray) -> faiss.Index:
+        """
+        Build an empty IVF index of the configured type and train it.
+
+        The coarse quantizer, PQ codebooks and 8-bit scalar quantizer ranges
+        are trained on a random sample of at most `training_sample_size`
+        vectors, and never fewer than there are centroids. `nlist` is never
+        reduced: a sample of fewer than 39 vectors per centroid, the minimum
+        FAISS recommends, is trained anyway and logged as a warning.
+
+        Args:
+            vectors (np.ndarray): Stored vectors to train on, at least as many
+                as `_ivf_clusters()`.
+
+        Returns:
+            faiss.Index: An empty trained index that accepts `add_with_ids`.
+        """
+        dimension: int = vectors.shape[1]
+        index_type: str = self.config.index_type
+        metric: int = self._metric_type()
+        quantizer_type: Optional[int] = _SCALAR_QUANTIZERS.get(self.config.storage)
+        nlist: int = self.config.nlist
+        quantizer: faiss.IndexFlat = faiss.IndexFlat(dimension, metric)
+        if index_type == "ivf_pq":
+            index: faiss.Index = faiss.IndexIVFPQ(
+                quantizer,
+                dimension,
+                nlist,
+                self.config.pq_m,
+                self.config.pq_nbits,
+                metric,
+            )
+        elif quantizer_type is None:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dimension, nlist, quantizer_type, metric
+            )
+
+        clusters: int = self._ivf_clusters()
+        sample: np.ndarray = self._training_sample(
+            vectors, max(self.config.training_sample_size, clusters)
+        )
+        if len(sample) < _MIN_POINTS_PER_CENTROID * clusters:
+            logger.warning(
+                "Training %s index with %d centroids on only %d vectors; "
+                "at least %d are recommended",
+                index_type,
+                clusters,
+                len(sample),
+                _MIN_POINTS_PER_CENTROID * clusters,
+            )
+        index.train(sample)
+        # Lets `remove_ids` find deleted vectors without scanning every list
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        logger.info(
+            "Trained %s index with nlist=%d on %d vectors",
+            index_type,
+            nlist,
+            len(sample),
+        )
+        return index
+
+    def _requires_training(self) -> bool:
+        """Whether the configured index has quantizers trained on stored vectors."""
+        return (
+            self.config.index_type in ("ivf_flat", "ivf_pq")
+            or self.config.storage == "sq8"
+        )
+
+    def _is_staging(self) -> bool:
+        """Whether vectors are still kept in the flat index awaiting training."""
+        return (
+            self._requires_training()
+            and isinstance(self.index, faiss.IndexIDMap)
+            and isinstance(faiss.downcast_index(self.index.index), faiss.IndexFlat)
+        )
+
+    def _ivf_clusters(self) -> int:
+        """Largest number of centroids trained for the IVF index: cells or PQ codes."""
+        if self.config.index_type == "ivf_pq":
+            return max(self.config.nlist, 2**self.config.pq_nbits)
+        return self.config.nlist
+
+    def _training_sample(self, vectors: np.ndarray, size: int) -> np.ndarray:
+        """Draw a reproducible random sample of at most `size` vectors, in order."""
+        if len(vectors) <= size:
+            return np.ascontiguousarray(vectors)
+        rows: np.ndarray = np.random.default_rng(0).choice(
+            len(vectors), size=size, replace=False
+        )
+        return np.ascontiguousarray(vectors[np.sort(rows)])
+
+    def _train_staged(self, checkpoint: bool = False) -> None:
+        """
+        Replace the flat staging index by the trained index configured.
+
+        Vectors are added in small batches, too few to train quantizers on:
+        IVF cells and codebooks, or the value ranges of `sq8` storage, which
+        clip any value outside them. Vectors are therefore kept in a flat
+        index, searched exactly, until `training_sample_size` vectors (and
+        for IVF at least one per centroid) are stored. A checkpoint trains an
+        IVF index as soon as the recommended 39 vectors per centroid are
+        stored, smaller corpora staying in the flat index, and `sq8` storage
+        on whatever is stored, so saved `sq8` indexes are always quantized.
+
+        Args:
+            checkpoint (bool): Whether a checkpoint is about to be written.
+        """
+        if self.index is None or not self._is_staging():
+            return
+        ivf: bool = self.config.index_type in ("ivf_flat", "ivf_pq")
+        if ivf:
+            clusters: int = self._ivf_clusters()
+            required: int = max(self.config.training_sample_size, clusters)
+            if checkpoint:
+                required = min(required, _MIN_POINTS_PER_CENTROID * clusters)
+        else:
+            required = 1 if checkpoint else self.config.training_sample_size
+        stored: int = len(self._ids) - len(self._deleted_rows)
+        if stored < required:
+            if checkpoint:
+                logger.info(
+                    "Keeping %d vectors in a flat index until %d are stored "
+                    "to train the %s index",
+                    stored,
+                    required,
+                    self.config.index_type,
+                )
+            return
+        rows: np.ndarray = self._live_row_numbers()
+        vectors: np.ndarray = self.index.index.reconstruct_n(0, self.index.ntotal)
+        if ivf:
+            self.index = self._create_ivf_index(vectors[rows])
+            self.index.add_with_ids(vectors[rows], self._ids[rows])
+            return
+        # Deleted rows are kept, as rows behind an id map are chunk-store rows
+        index: faiss.Index = self._create_id_mapped_index(vectors[rows])
+        index.add_with_ids(vectors, self._ids)
+        self.index = index
+
+    def _metric_type(self) -> int:
+        """FAISS metric of the configured `metric`; cosine is inner product."""
+        if self.config.metric == "l2":
+            return faiss.METRIC_L2
+        return faiss.METRIC_INNER_PRODUCT
+
+    def _as_vectors(self, embeddings: Any) -> np.ndarray:
+        """
+        Convert embeddings to a contiguous float32 array in a single copy.
+
+        With the cosine metric the vectors are normalised in place.
+        """
+        vectors: np.ndarray = np.array(embeddings, dtype=np.float32, order="C", ndmin=2)
+        if self.config.metric == "cosine":
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _search_parameters(
+        self,
+        nprobe: Optional[int],
+        ef_search: Optional[int],
+        selector: Optional[faiss.IDSelector] = None,
+    ) -> Optional[faiss.SearchParameters]:
+        """
+        Build per-query FAISS search parameters, falling back to the configured ones.
+
+        Args:
+            nprobe (Optional[int]): IVF cells to probe for this query.
+            ef_search (Optional[int]): HNSW search breadth for this query.
+            selector (Optional[faiss.IDSelector]): Restricts the search to the
+                vectors it selects.
+
+        Returns:
+            Optional[faiss.SearchParameters]: Parameters for approximate or
+                filtered searches, or None for unfiltered exact search.
+        """
+        if self._ivf() is not None:
+            params: faiss.SearchParameters = faiss.SearchParametersIVF(
+                nprobe=nprobe or self.config.nprobe
+            )
+        elif self.config.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(
+                efSearch=ef_search or self.config.ef_search
+            )
+        elif selector is None:
+            return None
         else:
-            print(
-                f"Index file not found at {self.file_path}. It will be created when adding embeddings."
+            params = faiss.SearchParameters()
+        if selector is not None:
+            params.sel = selector
+        return params
+
+    def _search_rows(
+        self,
+        queries: np.ndarray,
+        k: int,
+        nprobe: Optional[int],
+        ef_search: Optional[int],
+        where: Optional[MetadataFilter],
+        ids: Optional[Sequence[int]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the live chunks, optionally only those matching a filter or ids.
+
+        Deleted rows and rows outside the filter or ids are handed to FAISS as an
+        `IDSelector`, so they are skipped inside the search rather than removed
+        from its results. Flat and HNSW indexes hold vectors in chunk-store row
+        order behind their id map, including deleted ones, so the wrapped index
+        is searched with an `IDSelectorBitmap` over rows. IVF lists store chunk
+        ids, which are too sparse for a bitmap, and no longer hold deleted
+        vectors, so a filter gets an `IDSelectorBatch` of the matching ids.
+
+        Args:
+            queries (np.ndarray): float32 query vectors, one per row.
+            k (int): The number of nearest neighbors to return per query.
+            nprobe (Optional[int]): IVF cells to probe.
+            ef_search (Optional[int]): HNSW search breadth.
+            where (Optional[MetadataFilter]): Filter on chunk metadata.
+            ids (Optional[Sequence[int]]): Chunk ids to search among.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Distances and chunk-store rows of the
+                results, padded with -1 rows.
+
+        Raises:
+            ValueError: If the filter uses an unknown operator.
+        """
+        live: Optional[np.ndarray] = self._live()
+        selected: Optional[np.ndarray] = None
+        if where is not None:
+            selected = self._metadata.mask(where)
+        if ids is not None:
+            rows: np.ndarray = self._rows_for(np.asarray(ids, dtype=np.int64))
+            listed: np.ndarray = np.zeros(len(self._ids), dtype=bool)
+            listed[rows[rows >= 0]] = True
+            selected = listed if selected is None else selected & listed
+        if selected is not None and live is not None:
+            selected &= live
+        if isinstance(self.index, faiss.IndexIDMap):
+            if selected is None:
+                selected = live
+            selector: Optional[faiss.IDSelector] = None
+            if selected is not None:
+                bitmap: np.ndarray = np.packbits(selected, bitorder="little")
+                selector = faiss.IDSelectorBitmap(bitmap)
+            return self.index.index.search(
+                queries, k, params=self._search_parameters(nprobe, ef_search, selector)
             )
-    '''
+        selector = (
+            None if selected is None else faiss.IDSelectorBatch(self._ids[selected])
+        )
+        distances, indices = self.index.search(
+            queries, k, params=self._search_parameters(nprobe, ef_search, selector)
+        )
+        return distances, self._rows_for(indices.ravel()).reshape(indices.shape)
+
+    def _rows_for(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Map chunk ids to row positions in the chunk store.
+
+        Args:
+            ids (np.ndarray): Chunk ids, as returned by a FAISS search.
+
+        Returns:
+            np.ndarray: The row of each id, or -1 for ids that are not stored.
+        """
+        if not self.config.read_only:
+            return np.fromiter(
+                (self._id_rows.get(chunk_id, -1) for chunk_id in ids.tolist()),
+                dtype=np.int64,
+                count=len(ids),
+            )
+        sorted_ids, rows = self._id_lookup
+        if len(sorted_ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        positions: np.ndarray = np.searchsorted(sorted_ids, ids)
+        positions = np.minimum(positions, len(sorted_ids) - 1)
+        return np.where(sorted_ids[positions] == ids, rows[positions], -1).astype(
+            np.int64
+        )
+
+    def _live_row_numbers(self) -> np.ndarray:
+        """Chunk-store rows that are not deleted, in ascending order."""
+        live: Optional[np.ndarray] = self._live()
+        if live is None:
+            return np.arange(len(self._ids), dtype=np.int64)
+        return np.flatnonzero(live)
+
+    def _index_ids(self) -> None:
+        """Rebuild the id-to-row hash table from the live ids."""
+        rows: np.ndarray = self._live_row_numbers()
+        self._id_rows = dict(zip(self._ids[rows].tolist(), rows.tolist()))
+        self._next_id = int(self._ids.max()) + 1 if len(self._ids) else 0
+
+    def _append_ids(self, ids_array: np.ndarray) -> None:
+        """Append ids to the stored ids and index their new rows."""
+        first_row: int = len(self._ids)
+        end: int = first_row + len(ids_array)
+        if end > len(self._id_buffer):
+            buffer: np.ndarray = np.empty(
+                max(end, 2 * len(self._id_buffer), 1024), dtype=np.int64
+            )
+            buffer[:first_row] = self._ids
+            self._id_buffer = buffer
+        self._id_buffer[first_row:end] = ids_array
+        self._ids = self._id_buffer[:end]
+        self._id_rows.update(zip(ids_array.tolist(), range(first_row, end)))
+        if len(ids_array):
+            self._next_id = max(self._next_id, int(ids_array.max()) + 1)
+
+    def _sorted_id_lookup(self) -> np.ndarray:
+        """Build the sorted lookup of live ids saved for read-only readers."""
+        rows: np.ndarray = self._live_row_numbers()
+        order: np.ndarray = rows[np.argsort(self._ids[rows], kind="stable")]
+        return np.stack([self._ids[order], order])
+
+    def _apply_delete(self, ids: np.ndarray) -> None:
+        """
+        Remove chunk ids from the index, leaving tombstones in the chunk store.
+
+        Args:
+            ids (np.ndarray): Chunk ids to remove. Unknown ids are ignored.
+        """
+        rows: np.ndarray = self._rows_for(ids)
+        rows = np.unique(rows[rows >= 0])
+        if not len(rows):
+            return
+        removed: np.ndarray = np.ascontiguousarray(self._ids[rows])
+        if self._ivf() is not None:
+            # The hash-table direct map needs the ids as an `IDSelectorArray`
+            self.index.remove_ids(
+                faiss.IDSelectorArray(len(removed), faiss.swig_ptr(removed))
+            )
+        for chunk_id in removed.tolist():
+            del self._id_rows[chunk_id]
+        self._deleted_rows.update(rows.tolist())
+        self._live_rows = None
+
+    def _compact(self) -> None:
+        """
+        Drop the rows of deleted chunks from the index and the chunk store.
+
+        Flat indexes, including staging ones, remove the vectors by position
+        and IVF indexes already removed them; HNSW graphs do not support
+        removal, so they are rebuilt from the live vectors.
+        """
+        live: np.ndarray = cast(np.ndarray, self._live())
+        if self.config.index_type == "hnsw" and not self._is_staging():
+            vectors: np.ndarray = self.index.index.reconstruct_n(0, self.index.ntotal)
+            vectors = vectors[live]
+            self.index = self._create_id_mapped_index(vectors)
+            self.index.add_with_ids(vectors, self._ids[live])
+        elif isinstance(self.index, faiss.IndexIDMap):
+            self.index.index.remove_ids(faiss.IDSelectorBatch(np.flatnonzero(~live)))
+            faiss.copy_array_to_vector(self._ids[live], self.index.id_map)
+            self.index.ntotal = self.index.index.ntotal
+        self._texts = [text for text, kept in zip(self._texts, live) if kept]
+        self._metadata.retain(live)
+        self._ids = self._id_buffer = self._ids[live]
+        self._deleted_rows = set()
+        self._live_rows = None
+        self._index_ids()
+        logger.info(
+            "Compacted %s index to %d vectors", self.config.index_type, len(self._ids)
+        )
 
     def add_embeddings(
-        self, embeddings: List[List[float]], metadata: List[Dict[str, Any]]
+        self,
+        embeddings: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        ids: Optional[List[int]] = None,
     ) -> None:
         """
         Add embeddings to FAISS index.
 
+        Vectors are stored under stable int64 chunk ids. Adding an id that is
+        already stored replaces the previous vector and metadata. The change is
+        appended to the write-ahead log; the index files are only rewritten by
+        `flush`.
+
         Args:
             embeddings (List[List[float]]): List of embedding vectors to add.
             metadata (List[Dict[str, Any]]): List of metadata dictionaries corresponding to the embeddings.
+            ids (Optional[List[int]]): Chunk ids for the embeddings. Defaults to
+                sequential ids following the largest id added so far.
 
         Examples:
             >>> vector_db = FAISSVectorDB(FAISSConfig(index_path="/path/to/faiss/index"))
             >>> embeddings = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
             >>> metadata = [{"text": "Hello"}, {"text": "World"}]
             >>> vector_db.add_embeddings(embeddings, metadata)
+            >>> vector_db.add_embeddings([[0.7, 0.8, 0.9]], [{"text": "Again"}], ids=[42])
         """
-        embeddings_array: np.ndarray = np.array(embeddings).astype("float32")
+        self._check_writable()
+        embeddings_array: np.ndarray = self._as_vectors(embeddings)
+        if ids is None:
+            ids_array: np.ndarray = np.arange(
+                self._next_id, self._next_id + len(embeddings_array), dtype=np.int64
+            )
+        else:
+            ids_array = np.asarray(ids, dtype=np.int64)
 
+        self.log.append_add(ids_array, embeddings_array, metadata)
+        self._apply_add(embeddings_array, metadata, ids_array)
+        self._record_changes(len(ids_array))
+
+    def _apply_add(
+        self,
+        embeddings_array: np.ndarray,
+        metadata: List[Dict[str, Any]],
+        ids_array: np.ndarray,
+    ) -> None:
+        """
+        Add vectors to the in-memory index and chunk store, replacing existing ids.
+
+        Args:
+            embeddings_array (np.ndarray): float32 vectors to add.
+            metadata (List[Dict[str, Any]]): One metadata dictionary per vector.
+            ids_array (np.ndarray): int64 chunk ids of the vectors.
+        """
         if self.index is None:
             self.dimension = embeddings_array.shape[1]
-            self.index = faiss.IndexFlatL2(self.dimension)
-            print(f"Created new index with dimension {self.dimension}")
+            self.index = self._create_index(self.dimension)
+            logger.info(
+                "Created new %s index with dimension %d",
+                self.config.index_type,
+                self.dimension,
+            )
+        elif any(chunk_id in self._id_rows for chunk_id in ids_array.tolist()):
+            # Only replacements of stored ids pay for a removal
+            self._apply_delete(ids_array)
+
+        self.index.add_with_ids(embeddings_array, ids_array)
+        # Only writable databases reach this point, so the chunk store is in lists
+        cast(List[str], self._texts).extend([m["text"] for m in metadata])
+        self._metadata.extend(
+            [
+                {key: value for key, value in m.items() if key != "text"}
+                for m in metadata
+            ]
+        )
+        self._append_ids(ids_array)
+        self._train_staged()
+
+    def _record_changes(self, count: int) -> None:
+        """
+        Count logged changes and checkpoint once an autosave threshold is reached.
+
+        Args:
+            count (int): Number of vectors added or deleted by the last change.
+        """
+        self._pending_changes += count
+        autosave_vectors: int = self.config.autosave_vectors
+        autosave_seconds: float = self.config.autosave_seconds
+        if (autosave_vectors and self._pending_changes >= autosave_vectors) or (
+            autosave_seconds
+            and time.monotonic() - self._last_checkpoint >= autosave_seconds
+        ):
+            self.flush()
 
-        self.index.add(embeddings_array)
-        self.texts.extend([m["text"] for m in metadata])  # Store the text content
+    def flush(self) -> None:
+        """
+        Checkpoint the index: save it atomically and truncate the write-ahead log.
+
+        IVF databases still staging their vectors in a flat index first train
+        the IVF index if enough vectors are stored (see `_train_staged`).
+        Deleted chunks are then compacted out of the chunk store and index,
+        except in HNSW indexes holding at most `max_deleted_fraction` deleted
+        vectors, which keep them as tombstones.
 
-        # Save the updated index
-        faiss.write_index(self.index, self.file_path)
-        print(f"Saved index to {self.file_path}")
+        Changes are durable as soon as they are logged, so flushing only bounds
+        the time needed to replay the log on the next load. It is called
+        automatically once `autosave_vectors` changes are pending or
+        `autosave_seconds` have passed since the last checkpoint.
 
-    def search(self, query_embedding: List[float], k: int) -> List[Dict[str, Any]]:
+        Examples:
+            >>> vector_db = FAISSVectorDB(FAISSConfig(index_path="/path/to/faiss/index"))
+            >>> vector_db.add_embeddings([[0.1, 0.2, 0.3]], [{"text": "Hello"}])
+            >>> vector_db.flush()
+        """
+        if self.config.read_only:
+            return
+        if self.index is not None and self._pending_changes:
+            self._train_staged(checkpoint=True)
+            # Rebuilding an HNSW graph costs far more than a checkpoint, so
+            # deleted vectors are kept until they are a large enough fraction
+            if self._deleted_rows and (
+                self.config.index_type != "hnsw"
+                or len(self._deleted_rows)
+                > self.config.max_deleted_fraction * len(self._ids)
+            ):
+                self._compact()
+            self._save()
+            self.log.truncate()
+            logger.info("Saved index to %s", self.file_path)
+        self._pending_changes = 0
+        self._last_checkpoint = time.monotonic()
+
+    def delete_embeddings(self, ids: List[int]) -> None:
+        """
+        Delete embeddings from FAISS index by chunk id.
+
+        Args:
+            ids (List[int]): Chunk ids to delete. Unknown ids are ignored.
+
+        Examples:
+            >>> vector_db = FAISSVectorDB(FAISSConfig(index_path="/path/to/faiss/index"))
+            >>> vector_db.delete_embeddings([0, 1])
+        """
+        self._check_writable()
+        if self.index is None or not len(ids):
+            return
+        ids_array: np.ndarray = np.asarray(ids, dtype=np.int64)
+        self.log.append_delete(ids_array)
+        self._apply_delete(ids_array)
+        self._record_changes(len(ids_array))
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Search for similar embeddings in FAISS index.
 
         Args:
             query_embedding (List[float]): The query embedding vector.
             k (int): The number of nearest neighbors to return.
+            nprobe (Optional[int]): IVF cells to probe for this query. Defaults
+                to `FAISSConfig.nprobe`.
+            ef_search (Optional[int]): HNSW search breadth for this query.
+                Defaults to `FAISSConfig.ef_search`.
+            where (Optional[MetadataFilter]): Only return chunks whose metadata
+                matches this filter, e.g. `{"source": "a.pdf", "page": {"$lte": 3}}`.
+                See `MetadataColumns` for the syntax.
+            ids (Optional[Sequence[int]]): Only return chunks with these ids.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries containing search results.
@@ -106,13 +1037,99 @@ class FAISSVectorDB(VectorDB):
             >>> results = vector_db.search(query_embedding, k=1)
             >>> print(results)
             [{'distance': 0.0, 'index': 0, 'text': 'Hello'}]
+            >>> results = vector_db.search(query_embedding, k=1, where={"page": 2})
+        """
+        return self.search_batch([query_embedding], k, nprobe, ef_search, where, ids)[0]
+
+    def ids_matching(self, where: MetadataFilter) -> np.ndarray:
+        """
+        Return the ids of the stored chunks whose metadata matches a filter.
+
+        Args:
+            where (MetadataFilter): Filter on chunk metadata.
+
+        Returns:
+            np.ndarray: int64 chunk ids, in chunk-store order.
+
+        Raises:
+            ValueError: If the filter uses an unknown operator.
+
+        Examples:
+            >>> vector_db.ids_matching({"page": {"$lte": 3}})
+            array([0, 1])
+        """
+        selected: np.ndarray = self._metadata.mask(where)
+        live: Optional[np.ndarray] = self._live()
+        if live is not None:
+            selected &= live
+        return self._ids[selected]
+
+    def get_by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch stored chunks by id, in input order, skipping unknown ids.
+
+        Args:
+            ids (List[int]): Chunk ids to fetch.
+
+        Returns:
+            List[Dict[str, Any]]: The metadata, id and text of each stored chunk.
+
+        Examples:
+            >>> vector_db.get_by_ids([0, 99])
+            [{'index': 0, 'text': 'Hello'}]
+        """
+        rows: np.ndarray = self._rows_for(np.asarray(ids, dtype=np.int64))
+        return [
+            {**self._metadata[row], "index": int(index), "text": self._texts[row]}
+            for index, row in zip(ids, rows)
+            if row >= 0
+        ]
+
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar embeddings for many queries with one FAISS call.
+
+        Args:
+            query_embeddings (List[List[float]]): The query embedding vectors.
+            k (int): The number of nearest neighbors to return per query.
+            nprobe (Optional[int]): IVF cells to probe. Defaults to `FAISSConfig.nprobe`.
+            ef_search (Optional[int]): HNSW search breadth. Defaults to `FAISSConfig.ef_search`.
+            where (Optional[MetadataFilter]): Only return chunks whose metadata
+                matches this filter, for every query.
+            ids (Optional[Sequence[int]]): Only return chunks with these ids.
+
+        Returns:
+            List[List[Dict[str, Any]]]: Search results for each query, in input order.
+
+        Examples:
+            >>> vector_db = FAISSVectorDB(FAISSConfig(index_path="/path/to/faiss/index"))
+            >>> results = vector_db.search_batch([[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]], k=1)
+            >>> print(results)
+            [[{'distance': 0.0, 'index': 0, 'text': 'Hello'}], [{'distance': 0.0, 'index': 1, 'text': 'World'}]]
         """
-        distances, indices = self.index.search(np.array([query_embedding]), k)
+        queries: np.ndarray = self._as_vectors(query_embeddings).reshape(
+            -1, self.index.d
+        )
+        distances, rows = self._search_rows(queries, k, nprobe, ef_search, where, ids)
+        # FAISS pads with -1 when fewer than k vectors exist or match
         return [
-            {
-                "distance": float(distances[0][i]),
-                "index": int(indices[0][i]),
-                "text": self.texts[indices[0][i]],
-            }
-            for i in range(k)
+            [
+                {
+                    **self._metadata[row],
+                    "distance": float(distance),
+                    "index": int(self._ids[row]),
+                    "text": self._texts[row],
+                }
+                for distance, row in zip(query_distances, query_rows)
+                if row >= 0
+            ]
+            for query_distances, query_rows in zip(distances, rows)
         ]
@@ -0,0 +1,102 @@
+import mmap
+import os
+from typing import Callable, Generic, Iterator, List, Sequence, TypeVar, Union, overload
+import numpy as np
+
+
+T = TypeVar("T")
+
+
+def map_array(path: str, dtype: np.dtype, shape: tuple = (-1,)) -> np.ndarray:
+    """
+    Memory-map a raw array file read-only.
+
+    Args:
+        path (str): Path to a file written with `np.ndarray.tofile`.
+        dtype (np.dtype): Element type of the array.
+        shape (tuple): Shape to give the mapped array, with -1 for the length.
+
+    Returns:
+        np.ndarray: A read-only view of the file, or an empty array for an empty file.
+
+    Examples:
+        >>> ids = map_array("/path/to/faiss/index.ids", np.int64)
+    """
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype).reshape(shape)
+    return np.memmap(path, dtype=dtype, mode="r").reshape(shape)
+
+
+class MappedSequence(Sequence[T], Generic[T]):
+    """
+    Read-only sequence of records stored as one blob plus int64 byte offsets.
+
+    Both files are memory-mapped, so opening is O(1) and records are only
+    decoded when accessed. Processes mapping the same files share a single
+    page-cache copy.
+
+    Examples:
+        >>> texts = MappedSequence(
+        ...     "/path/to/faiss/index.texts",
+        ...     "/path/to/faiss/index.offsets",
+        ...     lambda data: data.decode("utf-8"),
+        ... )
+        >>> print(len(texts), texts[0])
+        2 Hello
+    """
+
+    def __init__(
+        self, blob_path: str, offsets_path: str, decode: Callable[[bytes], T]
+    ) -> None:
+        """
+        Map the blob and offsets files.
+
+        Args:
+            blob_path (str): Path to the concatenated encoded records.
+            offsets_path (str): Path to the int64 offsets, one more than records.
+            decode (Callable[[bytes], T]): Converts one record's bytes to a value.
+        """
+        self.decode: Callable[[bytes], T] = decode
+        self.offsets: np.ndarray = map_array(offsets_path, np.int64)
+        self._file = open(blob_path, "rb")
+        self.blob: Union[mmap.mmap, bytes] = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.path.getsize(blob_path)
+            else b""
+        )
+
+    def __len__(self) -> int:
+        return max(len(self.offsets) - 1, 0)
+
+    @overload
+    def __getitem__(self, position: int) -> T: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> List[T]: ...
+
+    def __getitem__(self, position: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("MappedSequence index out of range")
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.decode(self.blob[start:end])
+
+    def __iter__(self) -> Iterator[T]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def close(self) -> None:
+        """Unmap the files."""
+        if isinstance(self.blob, mmap.mmap):
+            self.blob.close()
+        self._file.close()
+        self.offsets = np.empty(0, dtype=np.int64)
+
+    def __enter__(self) -> "MappedSequence[T]":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
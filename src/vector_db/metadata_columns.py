@@ -0,0 +1,309 @@
+import json
+import operator
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import numpy as np
+from .mapped_sequence import map_array
+
+# A filter maps metadata keys to conditions, e.g. {"page": {"$gte": 3}}
+MetadataFilter = Dict[str, Any]
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": operator.eq,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda value, operand: value in operand,
+}
+# Negated operators match rows where the positive one does not, including
+# rows without the key
+_NEGATIONS: Dict[str, str] = {"$ne": "$eq", "$nin": "$in"}
+
+
+def _test(comparison: str, value: Any, operand: Any) -> bool:
+    """Compare a stored value, or any element of a stored list, with an operand."""
+    compare: Callable[[Any, Any], bool] = _COMPARISONS[comparison]
+    candidates: List[Any] = [value] + (value if isinstance(value, list) else [])
+    for candidate in candidates:
+        try:
+            if compare(candidate, operand):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+class MetadataColumns:
+    """
+    Column store of chunk metadata with vectorised filter evaluation.
+
+    Each metadata key is a column of int32 codes, one per row, into a
+    vocabulary of the distinct values stored under that key (-1 where a row
+    lacks the key). Filters are evaluated once per distinct value and then
+    mapped to a boolean row mask with a single `np.isin` per condition, so
+    selecting rows does not touch per-row dictionaries.
+
+    Filters follow the usual document-store syntax: `{"key": value}` tests
+    equality, `{"key": {"$op": operand}}` applies `$eq`, `$ne`, `$gt`,
+    `$gte`, `$lt`, `$lte`, `$in` or `$nin`, and conditions are combined with
+    `$and`, `$or` and `$not`; several keys in one dictionary must all match.
+    A condition on a list value, such as tags, matches if any element does.
+
+    Examples:
+        >>> columns = MetadataColumns()
+        >>> columns.extend([
+        ...     {"source": "a.pdf", "page": 1, "tags": ["intro"]},
+        ...     {"source": "b.pdf", "page": 3},
+        ... ])
+        >>> columns.mask({"page": {"$gte": 2}})
+        array([False,  True])
+        >>> columns.mask({"$or": [{"source": "b.pdf"}, {"tags": "intro"}]})
+        array([ True,  True])
+        >>> columns[0]
+        {'source': 'a.pdf', 'page': 1, 'tags': ['intro']}
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty column store."""
+        self._rows: int = 0
+        self._codes: Dict[str, np.ndarray] = {}
+        self._values: Dict[str, List[Any]] = {}
+        self._lookup: Dict[str, Dict[str, int]] = {}
+        # Columns are prefix views of these buffers, whose capacity grows
+        # geometrically so appending rows does not copy every column
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._capacity: int = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "MetadataColumns":
+        """
+        Build a column store from metadata dictionaries.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): One metadata dictionary per row.
+
+        Returns:
+            MetadataColumns: The column store.
+        """
+        columns: MetadataColumns = cls()
+        columns.extend(list(records))
+        return columns
+
+    @classmethod
+    def load(
+        cls, codes_path: str, values_path: str, mmap: bool = False
+    ) -> "MetadataColumns":
+        """
+        Load a column store written from `encode`.
+
+        Args:
+            codes_path (str): Path to the raw int32 code matrix, one row per key.
+            values_path (str): Path to the JSON row count and vocabularies.
+            mmap (bool): Memory-map the codes read-only instead of reading them.
+
+        Returns:
+            MetadataColumns: The column store.
+        """
+        with open(values_path, encoding="utf-8") as file:
+            header: Dict[str, Any] = json.load(file)
+        columns: MetadataColumns = cls()
+        columns._rows = header["rows"]
+        values: Dict[str, List[Any]] = header["columns"]
+        shape: Tuple[int, int] = (len(values), columns._rows)
+        codes: np.ndarray = (
+            map_array(codes_path, np.int32, shape)
+            if mmap
+            else np.fromfile(codes_path, dtype=np.int32).reshape(shape)
+        )
+        for key, key_codes in zip(values, codes):
+            columns._codes[key] = key_codes
+            columns._values[key] = values[key]
+        return columns
+
+    def encode(self) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Encode the store for saving, dropping values no row refers to.
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, Any]]: The `(keys, rows)` int32 code
+                matrix, and the JSON-serialisable row count and vocabularies.
+        """
+        codes: List[np.ndarray] = []
+        values: Dict[str, List[Any]] = {}
+        for key, key_codes in self._codes.items():
+            used: np.ndarray = np.unique(key_codes[key_codes >= 0])
+            if not len(used):
+                continue
+            remap: np.ndarray = np.full(len(self._values[key]) + 1, -1, dtype=np.int32)
+            remap[used] = np.arange(len(used), dtype=np.int32)
+            codes.append(remap[key_codes])
+            values[key] = [self._values[key][code] for code in used.tolist()]
+        matrix: np.ndarray = (
+            np.stack(codes) if codes else np.empty((0, self._rows), dtype=np.int32)
+        )
+        return matrix, {"rows": self._rows, "columns": values}
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return self._rows
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        """
+        Return the metadata of one row as a dictionary.
+
+        Args:
+            row (int): Row position.
+
+        Returns:
+            Dict[str, Any]: The keys the row has, with their values.
+        """
+        record: Dict[str, Any] = {}
+        for key, key_codes in self._codes.items():
+            code: int = int(key_codes[row])
+            if code >= 0:
+                record[key] = self._values[key][code]
+        return record
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield the metadata of every row, in order."""
+        for row in range(self._rows):
+            yield self[row]
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append rows.
+
+        Args:
+            records (List[Dict[str, Any]]): One metadata dictionary per new row.
+        """
+        end: int = self._rows + len(records)
+        if end > self._capacity:
+            self._capacity = max(end, 2 * self._capacity, 1024)
+            for key, key_codes in self._codes.items():
+                self._buffers[key] = self._grow(key_codes)
+        for row, record in enumerate(records, start=self._rows):
+            for key, value in record.items():
+                if key not in self._buffers:
+                    self._buffers[key] = self._grow(self._codes.get(key, []))
+                self._buffers[key][row] = self._code(key, value)
+        self._rows = end
+        for key, buffer in self._buffers.items():
+            self._codes[key] = buffer[:end]
+
+    def _grow(self, key_codes: Sequence[int]) -> np.ndarray:
+        """Copy a column into a new buffer of the current capacity, padded with -1."""
+        buffer: np.ndarray = np.full(self._capacity, -1, dtype=np.int32)
+        buffer[: len(key_codes)] = key_codes
+        return buffer
+
+    def _code(self, key: str, value: Any) -> int:
+        """Return the code of a value in a key's vocabulary, adding it if new."""
+        if key not in self._lookup:
+            self._values.setdefault(key, [])
+            self._lookup[key] = {
+                json.dumps(known, sort_keys=True): code
+                for code, known in enumerate(self._values[key])
+            }
+        token: str = json.dumps(value, sort_keys=True)
+        code: Optional[int] = self._lookup[key].get(token)
+        if code is None:
+            code = len(self._values[key])
+            self._lookup[key][token] = code
+            self._values[key].append(value)
+        return code
+
+    def retain(self, keep: np.ndarray) -> None:
+        """
+        Keep only the selected rows, in order.
+
+        Args:
+            keep (np.ndarray): Boolean mask over the rows.
+        """
+        for key in self._codes:
+            self._codes[key] = self._codes[key][keep]
+        self._rows = int(np.count_nonzero(keep))
+        self._buffers = {}
+        self._capacity = 0
+
+    def select(self, keep: np.ndarray) -> "MetadataColumns":
+        """
+        Copy the selected rows into a new column store.
+
+        Args:
+            keep (np.ndarray): Boolean mask over the rows.
+
+        Returns:
+            MetadataColumns: The selected rows, in order.
+        """
+        columns: MetadataColumns = MetadataColumns()
+        columns._codes = {key: codes[keep] for key, codes in self._codes.items()}
+        columns._values = {key: list(values) for key, values in self._values.items()}
+        columns._lookup = {key: dict(lookup) for key, lookup in self._lookup.items()}
+        columns._rows = int(np.count_nonzero(keep))
+        return columns
+
+    def mask(self, where: MetadataFilter) -> np.ndarray:
+        """
+        Evaluate a filter over every row.
+
+        Args:
+            where (MetadataFilter): The filter expression.
+
+        Returns:
+            np.ndarray: Boolean mask of the rows that match.
+
+        Raises:
+            ValueError: If the filter uses an unknown operator.
+        """
+        selected: np.ndarray = np.ones(self._rows, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    selected &= self.mask(clause)
+            elif key == "$or":
+                alternatives: np.ndarray = np.zeros(self._rows, dtype=bool)
+                for clause in condition:
+                    alternatives |= self.mask(clause)
+                selected &= alternatives
+            elif key == "$not":
+                selected &= ~self.mask(condition)
+            elif key.startswith("$"):
+                raise ValueError(f"Unknown filter operator {key!r}")
+            else:
+                selected &= self._field_mask(key, condition)
+        return selected
+
+    def _field_mask(self, key: str, condition: Any) -> np.ndarray:
+        """Evaluate the conditions on one key over every row."""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        selected: np.ndarray = np.ones(self._rows, dtype=bool)
+        for comparison, operand in condition.items():
+            if comparison in _NEGATIONS:
+                selected &= ~self._compare(key, _NEGATIONS[comparison], operand)
+            elif comparison in _COMPARISONS:
+                selected &= self._compare(key, comparison, operand)
+            else:
+                raise ValueError(f"Unknown filter operator {comparison!r}")
+        return selected
+
+    def _compare(self, key: str, comparison: str, operand: Any) -> np.ndarray:
+        """Select the rows whose value under `key` passes one comparison."""
+        if key not in self._codes:
+            return np.zeros(self._rows, dtype=bool)
+        matching: List[int] = [
+            code
+            for code, value in enumerate(self._values[key])
+            if _test(comparison, value, operand)
+        ]
+        return np.isin(self._codes[key], matching)
@@ -0,0 +1,309 @@
+import heapq
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+from .base import VectorDB
+from .faiss_db import FAISSVectorDB
+from .metadata_columns import MetadataFilter
+from ..config.vector_db_config import FAISSConfig, ShardedFAISSConfig
+
+# Odd 64-bit constant of Fibonacci hashing, which spreads sequential ids evenly
+_GOLDEN_RATIO: np.uint64 = np.uint64(0x9E3779B97F4A7C15)
+
+
+class ShardedFAISSVectorDB(VectorDB):
+    """
+    Vector database split across several FAISSVectorDB shards.
+
+    Each chunk id is assigned to a shard by hashing it, so a chunk is always
+    found, replaced and deleted in the same shard without a lookup table.
+    Every shard keeps its own index, chunk store and write-ahead log next to
+    `index_path`, so shards can be saved, loaded or later moved independently.
+
+    Adds, deletes and searches fan out to the shards on a thread pool; FAISS
+    releases the GIL, so they run on several cores. Each shard returns its own
+    top-k, and the sorted lists are merged with a heap.
+
+    Examples:
+        >>> config = ShardedFAISSConfig(index_path="/path/to/faiss/index", num_shards=4)
+        >>> vector_db = ShardedFAISSVectorDB(config)
+        >>> vector_db.add_embeddings([[0.1, 0.2], [0.3, 0.4]], [{"text": "Hello"}, {"text": "World"}])
+        >>> vector_db.search([0.1, 0.2], k=1)
+        [{'distance': 0.0, 'index': 0, 'text': 'Hello'}]
+    """
+
+    def __init__(self, config: ShardedFAISSConfig) -> None:
+        """
+        Open or create every shard.
+
+        Args:
+            config (ShardedFAISSConfig): Configuration object for the sharded database.
+
+        Raises:
+            ValueError: If the database was created with a different number of shards.
+        """
+        self.config: ShardedFAISSConfig = config
+        self.file_path: str = config.index_path
+        self.num_shards: int = config.num_shards
+        self._check_layout()
+        shard_fields: Dict[str, Any] = config.model_dump(
+            exclude={"num_shards", "max_workers"}
+        )
+        self.shards: List[FAISSVectorDB] = [
+            FAISSVectorDB(
+                FAISSConfig(**{**shard_fields, "index_path": self.shard_path(shard)})
+            )
+            for shard in range(self.num_shards)
+        ]
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=config.max_workers or self.num_shards,
+            thread_name_prefix="faiss-shard",
+        )
+
+    def shard_path(self, shard: int) -> str:
+        """
+        Return the index path of a shard.
+
+        Args:
+            shard (int): Shard number.
+
+        Returns:
+            str: `<index_path>.shard<shard>`.
+        """
+        return f"{self.file_path}.shard{shard}"
+
+    def _check_layout(self) -> None:
+        """
+        Record the number of shards, or check it against the recorded one.
+
+        Raises:
+            ValueError: If the database was created with a different number of shards.
+        """
+        layout_path: str = f"{self.file_path}.shards.json"
+        if os.path.exists(layout_path):
+            with open(layout_path, encoding="utf-8") as file:
+                num_shards: int = json.load(file)["num_shards"]
+            if num_shards != self.num_shards:
+                raise ValueError(
+                    f"Index at {self.file_path} has {num_shards} shards, "
+                    f"not {self.num_shards}; re-index to change the shard count"
+                )
+        elif not self.config.read_only:
+            with open(f"{layout_path}.tmp", "w", encoding="utf-8") as file:
+                json.dump({"num_shards": self.num_shards}, file)
+            os.replace(f"{layout_path}.tmp", layout_path)
+
+    def shard_of(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Assign chunk ids to shards.
+
+        Args:
+            ids (np.ndarray): int64 chunk ids.
+
+        Returns:
+            np.ndarray: The shard number of each id.
+        """
+        hashed: np.ndarray = ids.astype(np.uint64) * _GOLDEN_RATIO
+        return ((hashed >> np.uint64(32)) % np.uint64(self.num_shards)).astype(np.int64)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Chunk ids stored in all shards, shard by shard."""
+        return np.concatenate([shard.ids for shard in self.shards])
+
+    @property
+    def texts(self) -> Iterator[str]:
+        """Chunk texts stored in all shards, in the order of `ids`."""
+        return itertools.chain.from_iterable(shard.texts for shard in self.shards)
+
+    def add_embeddings(
+        self,
+        embeddings: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        ids: Optional[List[int]] = None,
+    ) -> None:
+        """
+        Add embeddings to their shards, replacing existing ids.
+
+        Args:
+            embeddings (List[List[float]]): List of embedding vectors to add.
+            metadata (List[Dict[str, Any]]): One metadata dictionary per embedding.
+            ids (Optional[List[int]]): Chunk ids for the embeddings. Defaults to
+                sequential ids following the largest stored id.
+
+        Examples:
+            >>> vector_db.add_embeddings([[0.7, 0.8]], [{"text": "Again"}], ids=[42])
+        """
+        if ids is None:
+            stored: np.ndarray = self.ids
+            start: int = int(stored.max()) + 1 if len(stored) else 0
+            ids_array: np.ndarray = np.arange(
+                start, start + len(embeddings), dtype=np.int64
+            )
+        else:
+            ids_array = np.asarray(ids, dtype=np.int64)
+        vectors: np.ndarray = np.asarray(embeddings, dtype=np.float32)
+        shards: np.ndarray = self.shard_of(ids_array)
+
+        def add(shard: int) -> None:
+            rows: np.ndarray = np.flatnonzero(shards == shard)
+            if len(rows):
+                self.shards[shard].add_embeddings(
+                    vectors[rows], [metadata[row] for row in rows], ids_array[rows]
+                )
+
+        list(self._executor.map(add, range(self.num_shards)))
+
+    def delete_embeddings(self, ids: List[int]) -> None:
+        """
+        Delete embeddings from their shards by chunk id.
+
+        Args:
+            ids (List[int]): Chunk ids to delete. Unknown ids are ignored.
+
+        Examples:
+            >>> vector_db.delete_embeddings([0, 1])
+        """
+        ids_array: np.ndarray = np.asarray(ids, dtype=np.int64)
+        shards: np.ndarray = self.shard_of(ids_array)
+
+        def delete(shard: int) -> None:
+            shard_ids: np.ndarray = ids_array[shards == shard]
+            if len(shard_ids):
+                self.shards[shard].delete_embeddings(shard_ids)
+
+        list(self._executor.map(delete, range(self.num_shards)))
+
+    def flush(self) -> None:
+        """
+        Checkpoint every shard.
+
+        Examples:
+            >>> vector_db.flush()
+        """
+        list(self._executor.map(FAISSVectorDB.flush, self.shards))
+
+    def ids_matching(self, where: MetadataFilter) -> np.ndarray:
+        """
+        Return the ids of the chunks whose metadata matches a filter, shard by shard.
+
+        Args:
+            where (MetadataFilter): Filter on chunk metadata.
+
+        Returns:
+            np.ndarray: int64 chunk ids.
+        """
+        return np.concatenate([shard.ids_matching(where) for shard in self.shards])
+
+    def get_by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch stored chunks by id, in input order, skipping unknown ids.
+
+        Args:
+            ids (List[int]): Chunk ids to fetch.
+
+        Returns:
+            List[Dict[str, Any]]: The metadata, id and text of each stored chunk.
+        """
+        shards: np.ndarray = self.shard_of(np.asarray(ids, dtype=np.int64))
+        found: Dict[int, Dict[str, Any]] = {}
+        for shard in np.unique(shards).tolist():
+            shard_ids: List[int] = [
+                chunk_id for chunk_id, owner in zip(ids, shards) if owner == shard
+            ]
+            found.update(
+                (doc["index"], doc) for doc in self.shards[shard].get_by_ids(shard_ids)
+            )
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search every shard in parallel and merge their results.
+
+        Args:
+            query_embedding (List[float]): The query embedding vector.
+            k (int): The number of nearest neighbors to return.
+            nprobe (Optional[int]): IVF cells to probe in each shard.
+            ef_search (Optional[int]): HNSW search breadth in each shard.
+            where (Optional[MetadataFilter]): Only return chunks whose metadata
+                matches this filter; each shard applies it inside its search.
+            ids (Optional[Sequence[int]]): Only return chunks with these ids.
+
+        Returns:
+            List[Dict[str, Any]]: The `k` closest chunks over all shards.
+
+        Examples:
+            >>> results = vector_db.search([0.1, 0.2], k=1)
+        """
+        return self.search_batch([query_embedding], k, nprobe, ef_search, where, ids)[0]
+
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search every shard for many queries in parallel and merge the results.
+
+        Args:
+            query_embeddings (List[List[float]]): The query embedding vectors.
+            k (int): The number of nearest neighbors to return per query.
+            nprobe (Optional[int]): IVF cells to probe in each shard.
+            ef_search (Optional[int]): HNSW search breadth in each shard.
+            where (Optional[MetadataFilter]): Only return chunks whose metadata
+                matches this filter, for every query.
+            ids (Optional[Sequence[int]]): Only return chunks with these ids.
+
+        Returns:
+            List[List[Dict[str, Any]]]: The `k` closest chunks over all shards,
+                for each query in input order.
+
+        Examples:
+            >>> results = vector_db.search_batch([[0.1, 0.2], [0.3, 0.4]], k=1)
+            >>> print(len(results))
+            2
+        """
+        queries: np.ndarray = np.asarray(query_embeddings, dtype=np.float32)
+        shards: List[FAISSVectorDB] = [
+            shard for shard in self.shards if shard.index is not None
+        ]
+        if not shards:
+            return [[] for _ in range(len(queries))]
+        per_shard: List[List[List[Dict[str, Any]]]] = list(
+            self._executor.map(
+                lambda shard: shard.search_batch(
+                    queries, k, nprobe, ef_search, where, ids
+                ),
+                shards,
+            )
+        )
+        # L2 distances grow with distance; inner products and cosines shrink
+        descending: bool = self.config.metric != "l2"
+        return [
+            list(
+                itertools.islice(
+                    heapq.merge(
+                        *results,
+                        key=lambda result: result["distance"],
+                        reverse=descending,
+                    ),
+                    k,
+                )
+            )
+            for results in zip(*per_shard)
+        ]
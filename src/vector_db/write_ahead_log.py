@@ -0,0 +1,129 @@
+import json
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Tuple, Union
+import numpy as np
+
+
+LogRecord = Union[
+    Tuple[str, np.ndarray, np.ndarray, List[Dict[str, Any]]],
+    Tuple[str, np.ndarray],
+]
+
+
+class WriteAheadLog:
+    """
+    Append-only log of vector additions and deletions.
+
+    Each record is a fixed header (operation byte and payload length) followed
+    by the payload, and is flushed and fsync'ed before the change is applied in
+    memory. Replaying the log on top of the last checkpoint restores every
+    change made since. A torn record at the end of the file, left by a crash
+    mid-append, is ignored and cut off.
+
+    Examples:
+        >>> log = WriteAheadLog("/path/to/faiss/index.wal")
+        >>> log.append_add(np.array([1]), np.zeros((1, 3), dtype="float32"), [{"text": "Hello"}])
+        >>> log.append_delete(np.array([1]))
+        >>> [record[0] for record in log.replay()]
+        ['add', 'delete']
+    """
+
+    _HEADER: struct.Struct = struct.Struct("<cQ")
+    _ADD: bytes = b"A"
+    _DELETE: bytes = b"D"
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the log.
+
+        Args:
+            path (str): Path to the log file. It is created on first append.
+        """
+        self.path: str = path
+
+    def append_add(
+        self, ids: np.ndarray, vectors: np.ndarray, metadata: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Record that `vectors` were added under `ids` with `metadata`.
+
+        Args:
+            ids (np.ndarray): int64 chunk ids.
+            vectors (np.ndarray): float32 array of shape (len(ids), dimension).
+            metadata (List[Dict[str, Any]]): One metadata dictionary per vector.
+        """
+        encoded_metadata: bytes = json.dumps(metadata, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        payload: bytes = b"".join(
+            [
+                struct.pack("<qq", len(ids), vectors.shape[1]),
+                np.ascontiguousarray(ids, dtype=np.int64).tobytes(),
+                np.ascontiguousarray(vectors, dtype=np.float32).tobytes(),
+                encoded_metadata,
+            ]
+        )
+        self._append(self._ADD, payload)
+
+    def append_delete(self, ids: np.ndarray) -> None:
+        """
+        Record that `ids` were deleted.
+
+        Args:
+            ids (np.ndarray): int64 chunk ids.
+        """
+        self._append(self._DELETE, np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+
+    def replay(self) -> Iterator[LogRecord]:
+        """
+        Yield the logged changes in order.
+
+        Yields:
+            `("add", ids, vectors, metadata)` or `("delete", ids)` tuples.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            data: bytes = file.read()
+
+        position: int = 0
+        while position + self._HEADER.size <= len(data):
+            operation, length = self._HEADER.unpack_from(data, position)
+            start: int = position + self._HEADER.size
+            if start + length > len(data):
+                break
+            payload: memoryview = memoryview(data)[start : start + length]
+            if operation == self._ADD:
+                count, dimension = struct.unpack_from("<qq", payload)
+                ids_end: int = 16 + 8 * count
+                vectors_end: int = ids_end + 4 * count * dimension
+                yield (
+                    "add",
+                    np.frombuffer(payload[16:ids_end], dtype=np.int64),
+                    np.frombuffer(
+                        payload[ids_end:vectors_end], dtype=np.float32
+                    ).reshape(count, dimension),
+                    json.loads(bytes(payload[vectors_end:])),
+                )
+            else:
+                yield "delete", np.frombuffer(payload, dtype=np.int64)
+            position = start + length
+
+        if position < len(data):
+            with open(self.path, "r+b") as file:
+                file.truncate(position)
+
+    def truncate(self) -> None:
+        """
+        Discard all records, after they have been made durable by a checkpoint.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _append(self, operation: bytes, payload: bytes) -> None:
+        """Append one record and force it to disk."""
+        with open(self.path, "ab") as file:
+            file.write(self._HEADER.pack(operation, len(payload)) + payload)
+            file.flush()
+            os.fsync(file.fileno())
@@ -6,6 +6,7 @@ from src.config.vector_db_config import FAISSConfig
 from src.config.data_source_config import PDFConfig
 from src.models.ollama_model import OllamaModel
 from src.vector_db.faiss_db import FAISSVectorDB
+from src.data_source.base import Document
 from src.data_source.pdf_source import PDFDataSource
 from src.text_splitter.recursive_splitter import RecursiveTextSplitter
 
@@ -16,8 +17,8 @@ def mock_ollama_config():
 
 
 @pytest.fixture
-def mock_faiss_config():
-    return FAISSConfig(index_path="/tmp/test.index")
+def mock_faiss_config(tmp_path):
+    return FAISSConfig(index_path=str(tmp_path / "test.index"))
 
 
 @pytest.fixture
@@ -31,6 +32,9 @@ def mock_ollama_model(mock_ollama_config):
     model.model_name = mock_ollama_config.llm_model
     model.generate.return_value = "Test response"
     model.get_embeddings.return_value = np.random.rand(384).tolist()
+    model.get_embeddings_batch.side_effect = lambda texts: [
+        np.random.rand(384).tolist() for _ in texts
+    ]
     return model
 
 
@@ -43,6 +47,9 @@ def mock_faiss_db(mock_faiss_config):
         {"distance": 0.1, "index": 0, "text": "Test document 1"},
         {"distance": 0.2, "index": 1, "text": "Test document 2"},
     ]
+    db.search_batch.side_effect = lambda query_embeddings, k, where=None, ids=None: [
+        db.search.return_value for _ in query_embeddings
+    ]
     return db
 
 
@@ -51,6 +58,14 @@ def mock_pdf_source(mock_pdf_config):
     source = Mock(spec=PDFDataSource)
     source.pdf_path = mock_pdf_config.pdf_path
     source.load_data.return_value = ["Test document 1", "Test document 2"]
+    source.load_documents.return_value = {
+        "doc#page=1": "Test document 1",
+        "doc#page=2": "Test document 2",
+    }
+    source.iter_documents.side_effect = lambda: (
+        Document(id=document_id, text=text)
+        for document_id, text in source.load_documents.return_value.items()
+    )
     return source
 
 
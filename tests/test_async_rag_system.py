@@ -0,0 +1,126 @@
+import asyncio
+from src.async_rag_system import AsyncRAGSystem
+
+
+def _async_rag(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    max_concurrent_queries=64,
+):
+    rag = AsyncRAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        max_concurrent_queries=max_concurrent_queries,
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    return rag
+
+
+def test_async_rag_system_query(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = _async_rag(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        mock_ollama_model,
+        mock_faiss_db,
+    )
+    mock_ollama_model.aget_embeddings.return_value = [0.1, 0.2]
+    mock_ollama_model.agenerate.return_value = "Test response"
+
+    response = asyncio.run(rag.aquery("Test question", k=2))
+
+    assert response == "Test response"
+    mock_faiss_db.search.assert_called_once_with([0.1, 0.2], 2, where=None, ids=None)
+    assert "Test document 1" in mock_ollama_model.agenerate.call_args.args[0]
+    mock_ollama_model.generate.assert_not_called()
+
+
+def test_async_rag_system_limits_concurrency(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = _async_rag(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        mock_ollama_model,
+        mock_faiss_db,
+        max_concurrent_queries=3,
+    )
+    in_flight = 0
+    max_in_flight = 0
+
+    async def generate(prompt):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return prompt.rsplit("Human: ", 1)[1]
+
+    mock_ollama_model.aget_embeddings.return_value = [0.1, 0.2]
+    mock_ollama_model.agenerate.side_effect = generate
+    queries = [f"Question {i}" for i in range(10)]
+
+    responses = asyncio.run(rag.aquery_batch(queries))
+
+    assert responses == queries
+    assert max_in_flight == 3
+
+
+def test_async_rag_system_propagates_cancellation(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = _async_rag(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        mock_ollama_model,
+        mock_faiss_db,
+        max_concurrent_queries=1,
+    )
+    cancelled = asyncio.Event()
+
+    async def generate(prompt):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    mock_ollama_model.aget_embeddings.return_value = [0.1, 0.2]
+    mock_ollama_model.agenerate.side_effect = generate
+
+    async def run():
+        task = asyncio.create_task(rag.aquery("Slow question"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert cancelled.is_set()
+        # The concurrency slot was released, so a new query can proceed
+        mock_ollama_model.agenerate.side_effect = None
+        mock_ollama_model.agenerate.return_value = "Fast response"
+        return await asyncio.wait_for(rag.aquery("Fast question"), timeout=1)
+
+    assert asyncio.run(run()) == "Fast response"
@@ -1,5 +1,12 @@
-from src.config.model_config import OllamaConfig
-from src.config.vector_db_config import FAISSConfig
+import pytest
+from pydantic import ValidationError
+from src.config.cache_config import EmbeddingCacheConfig, QueryCacheConfig
+from src.config.context_config import ContextConfig
+from src.config.dedup_config import DedupConfig
+from src.config.model_config import ONNXEmbeddingConfig, OllamaConfig
+from src.config.search_config import HybridSearchConfig
+from src.config.rerank_config import CrossEncoderRerankerConfig, LexicalRerankerConfig
+from src.config.vector_db_config import FAISSConfig, ShardedFAISSConfig
 from src.config.data_source_config import PDFConfig
 
 
@@ -16,3 +23,98 @@ def test_faiss_config():
 def test_pdf_config():
     config = PDFConfig(pdf_path="/tmp/test.pdf")
     assert config.pdf_path == "/tmp/test.pdf"
+    assert config.pages_per_task == 16
+    with pytest.raises(ValidationError):
+        PDFConfig(pdf_path="/tmp/test.pdf", max_workers=0)
+    with pytest.raises(ValidationError):
+        PDFConfig(pdf_path="/tmp/test.pdf", pages_per_task=-1)
+
+
+def test_ollama_config_batching_defaults():
+    config = OllamaConfig(llm_model="llama2")
+    assert config.embedding_batch_size == 32
+    assert config.max_concurrent_requests == 4
+
+
+def test_ollama_config_keep_alive_defaults():
+    config = OllamaConfig(llm_model="llama2")
+    assert config.keep_alive == "30m"
+    assert config.num_ctx is None
+    assert config.prewarm is False
+    with pytest.raises(ValidationError):
+        OllamaConfig(llm_model="llama2", num_ctx=0)
+
+
+def test_onnx_embedding_config():
+    config = ONNXEmbeddingConfig(model_path="model.onnx", tokenizer_path="tok.json")
+    assert config.batch_size == 32
+    assert config.max_length == 256
+    assert config.num_threads is None
+    assert OllamaConfig(llm_model="llama2").embedding_model is None
+
+
+def test_embedding_cache_config():
+    config = EmbeddingCacheConfig(cache_path="/tmp/cache.sqlite")
+    assert config.cache_path == "/tmp/cache.sqlite"
+    assert config.max_entries == 100_000
+
+
+def test_query_cache_config():
+    config = QueryCacheConfig()
+    assert config.similarity_threshold == 0.95
+    assert config.max_entries == 1024
+    assert config.ttl_seconds == 3600.0
+
+
+def test_dedup_config():
+    config = DedupConfig()
+    assert config.threshold == 0.85
+    assert config.num_perm == 128
+    with pytest.raises(ValidationError):
+        DedupConfig(threshold=1.5)
+
+
+def test_hybrid_search_config():
+    config = HybridSearchConfig()
+    assert (config.k1, config.b) == (1.2, 0.75)
+    assert config.rrf_k == 60
+    assert config.candidates == 50
+    with pytest.raises(ValidationError):
+        HybridSearchConfig(b=2.0)
+
+
+def test_context_config():
+    config = ContextConfig()
+    assert config.max_tokens == 2048
+    assert config.duplicate_threshold == 0.8
+    assert config.merge_gap == 2
+    with pytest.raises(ValidationError):
+        ContextConfig(max_tokens=0)
+
+
+def test_faiss_config_index_type_defaults():
+    config = FAISSConfig(index_path="/tmp/test.index")
+    assert config.index_type == "flat"
+    assert config.nprobe == 16
+    assert config.ef_search == 64
+
+
+def test_sharded_faiss_config():
+    config = ShardedFAISSConfig(index_path="/tmp/test.index", index_type="hnsw")
+    assert isinstance(config, FAISSConfig)
+    assert config.num_shards == 4
+    assert config.max_workers is None
+    with pytest.raises(ValidationError):
+        ShardedFAISSConfig(index_path="/tmp/test.index", num_shards=0)
+
+
+def test_reranker_configs():
+    config = LexicalRerankerConfig()
+    assert (config.candidates, config.batch_size, config.budget_ms) == (50, 64, 100.0)
+    config = CrossEncoderRerankerConfig(
+        model_path="model.onnx", tokenizer_path="tokenizer.json"
+    )
+    assert config.batch_size == 16
+    assert config.max_length == 512
+    with pytest.raises(ValidationError):
+        LexicalRerankerConfig(budget_ms=-1)
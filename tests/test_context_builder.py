@@ -0,0 +1,65 @@
+from src.config.context_config import ContextConfig
+from src.context_builder import ContextBuilder
+
+DOCUMENT = (
+    "Filters must be replaced every six months. Use only genuine parts. "
+    "The housing is cleaned with warm water. Dry it before reassembly."
+)
+
+
+def chunk(start, end, document_id="manual.pdf#page=1", **metadata):
+    return {
+        "text": DOCUMENT[start:end],
+        "document_id": document_id,
+        "start": start,
+        "end": end,
+        **metadata,
+    }
+
+
+def test_context_builder_merges_overlapping_and_adjacent_chunks():
+    builder = ContextBuilder(ContextConfig())
+    second = DOCUMENT.index("Use only")
+    third = DOCUMENT.index("Dry it")
+    docs = [
+        chunk(second, third - 1, index=2),
+        chunk(0, second + 8, index=1),
+        chunk(third, len(DOCUMENT), index=3),
+        chunk(0, 20, document_id="other.pdf#page=1", index=4),
+    ]
+
+    packed = builder.pack(docs)
+
+    assert [doc["index"] for doc in packed] == [2, 4]
+    assert packed[0]["text"] == DOCUMENT
+    assert (packed[0]["start"], packed[0]["end"]) == (0, len(DOCUMENT))
+
+
+def test_context_builder_drops_near_duplicates():
+    builder = ContextBuilder(ContextConfig(duplicate_threshold=0.7))
+    docs = [
+        {"text": "Copyright 2024 ACME Corp. All rights reserved. Page one."},
+        {"text": "Replace filters every six months."},
+        {"text": "Copyright 2024 ACME Corp. All rights reserved. Page two."},
+    ]
+
+    assert builder.build(docs) == (
+        "Copyright 2024 ACME Corp. All rights reserved. Page one.\n\n"
+        "Replace filters every six months."
+    )
+
+
+def test_context_builder_fits_budget_greedily():
+    builder = ContextBuilder(ContextConfig(max_tokens=8))
+    docs = [
+        {"text": "one two three four five"},
+        {"text": "six seven eight nine ten"},
+        {"text": "eleven twelve"},
+    ]
+
+    assert [doc["text"] for doc in builder.pack(docs)] == [
+        "one two three four five",
+        "eleven twelve",
+    ]
+    assert ContextBuilder(ContextConfig(max_tokens=3)).build(docs) == "one two three"
+    assert builder.build([]) == ""
@@ -1,8 +1,24 @@
+import os
+import subprocess
+import sys
+import textwrap
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from unittest.mock import mock_open, patch
 from unittest.mock import Mock
+import PyPDF2
+from src.config.data_source_config import PDFConfig
 from src.data_source.pdf_source import PDFDataSource
 
 
+def _write_pdf(path, pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=72, height=72)
+    with open(path, "wb") as file:
+        writer.write(file)
+    return str(path)
+
+
 def test_pdf_source_init(mock_pdf_config):
     source = PDFDataSource(mock_pdf_config)
     assert source.pdf_path == "/tmp/test.pdf"
@@ -27,3 +43,110 @@ def test_pdf_source_load_data(mock_pdf_reader, mock_pdf_config):
     assert len(documents) == 2
     assert documents[0] == "Test content 1"
     assert documents[1] == "Test content 2"
+
+
+def test_pdf_source_load_documents(mock_pdf_config):
+    source = PDFDataSource(mock_pdf_config)
+    with patch(
+        "src.data_source.pdf_source._iter_pages", return_value=["Page 1", "Page 2"]
+    ):
+        documents = source.load_documents()
+
+    assert documents == {
+        "/tmp/test.pdf#page=1": "Page 1",
+        "/tmp/test.pdf#page=2": "Page 2",
+    }
+
+
+def test_pdf_source_resolve_paths(tmp_path):
+    (tmp_path / "manuals" / "nested").mkdir(parents=True)
+    a = _write_pdf(tmp_path / "a.pdf", 1)
+    b = _write_pdf(tmp_path / "manuals" / "b.pdf", 1)
+    c = _write_pdf(tmp_path / "manuals" / "nested" / "c.PDF", 1)
+    (tmp_path / "manuals" / "notes.txt").write_text("not a pdf")
+
+    source = PDFDataSource(
+        PDFConfig(pdf_path=[str(tmp_path / "*.pdf"), str(tmp_path / "manuals"), a])
+    )
+
+    assert source.resolve_paths() == [a, b, c]
+
+
+def test_pdf_source_iter_documents_across_processes(tmp_path):
+    a = _write_pdf(tmp_path / "a.pdf", 3)
+    b = _write_pdf(tmp_path / "b.pdf", 2)
+    source = PDFDataSource(
+        PDFConfig(pdf_path=str(tmp_path), max_workers=2, pages_per_task=2)
+    )
+
+    # Iterated off the main thread, as the ingestion pipeline does, and with
+    # pages counted by the workers only
+    with (
+        patch(
+            "src.data_source.pdf_source.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        ) as pool,
+        patch("PyPDF2.PdfReader", side_effect=AssertionError("read in the parent")),
+        ThreadPoolExecutor(1) as thread,
+    ):
+        pages = thread.submit(list, source.iter_documents()).result()
+
+    assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+    assert [page.id for page in pages] == [
+        f"{a}#page=1",
+        f"{a}#page=2",
+        f"{a}#page=3",
+        f"{b}#page=1",
+        f"{b}#page=2",
+    ]
+    assert pages[2].metadata == {"source": a, "page": 3, "offset": 0}
+    assert source.load_data() == [page.text for page in pages]
+
+
+def test_pdf_source_unguarded_script_extracts_in_process(tmp_path):
+    _write_pdf(tmp_path / "a.pdf", 2)
+    _write_pdf(tmp_path / "b.pdf", 1)
+    script = tmp_path / "unguarded.py"
+    script.write_text(
+        textwrap.dedent(
+            """
+            import sys
+            from src.config.data_source_config import PDFConfig
+            from src.data_source.pdf_source import PDFDataSource
+
+            source = PDFDataSource(PDFConfig(pdf_path=sys.argv[1], max_workers=2))
+            print(len(list(source.iter_documents())))
+            """
+        )
+    )
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, str(script), str(tmp_path)],
+        capture_output=True,
+        text=True,
+        timeout=120,
+        env={**os.environ, "PYTHONPATH": root},
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "3"
+    assert "extracting in-process" in result.stderr
+
+
+@patch("PyPDF2.PdfReader")
+def test_pdf_source_iter_documents_is_lazy(mock_pdf_reader, mock_pdf_config):
+    pages = [Mock(), Mock(), Mock()]
+    for number, page in enumerate(pages, start=1):
+        page.extract_text.return_value = f"Page {number}"
+    mock_pdf_reader.return_value.pages = pages
+
+    source = PDFDataSource(mock_pdf_config)
+    with patch("builtins.open", mock_open()):
+        documents = source.iter_documents()
+        first = next(documents)
+        pages[1].extract_text.assert_not_called()
+        second = next(documents)
+
+    assert first.metadata == {"source": "/tmp/test.pdf", "page": 1, "offset": 0}
+    assert second.metadata == {"source": "/tmp/test.pdf", "page": 2, "offset": 6}
+    pages[2].extract_text.assert_not_called()
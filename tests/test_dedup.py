@@ -0,0 +1,55 @@
+from src.config.dedup_config import DedupConfig
+from src.dedup import ChunkDeduplicator
+from src.manifest import DocumentRecord, IndexManifest
+
+FOOTER = "Copyright 2024 ACME Corporation. All rights reserved. Confidential and proprietary."
+TEXT = (
+    "The Nobel Prize in Physics 2024 was awarded for foundational discoveries and "
+    "inventions that enable machine learning with artificial neural networks, "
+    "building on tools from statistical physics and the study of spin glasses."
+)
+
+
+def test_dedup_finds_exact_and_near_duplicates():
+    dedup = ChunkDeduplicator(DedupConfig(threshold=0.7))
+    dedup.add(FOOTER, 1)
+    dedup.add(TEXT, 2)
+
+    assert (
+        dedup.find(
+            "  copyright 2024 ACME corporation. All rights reserved.\n"
+            "Confidential and proprietary."
+        )
+        == 1
+    )
+    assert dedup.find(TEXT.replace("building on", "and built on")) == 2
+    assert dedup.find("An entirely different sentence about chemistry.") is None
+
+
+def test_dedup_reference_counting():
+    dedup = ChunkDeduplicator(DedupConfig())
+    dedup.add(FOOTER, 1)
+    dedup.acquire(1)
+
+    assert dedup.release([1]) == []
+    assert dedup.find(FOOTER) == 1
+    assert dedup.release([1]) == [1]
+    assert dedup.find(FOOTER) is None
+
+
+def test_dedup_round_trip_counts_references_from_manifest(tmp_path):
+    path = str(tmp_path / "index.dedup.npz")
+    dedup = ChunkDeduplicator(DedupConfig())
+    dedup.add(FOOTER, 1)
+    dedup.add(TEXT, 2)
+    dedup.release([2])
+    dedup.save(path)
+
+    loaded = ChunkDeduplicator.load(path, DedupConfig())
+    assert loaded.find(FOOTER) is None
+
+    manifest = IndexManifest()
+    manifest.documents["a"] = DocumentRecord(content_hash="x", chunk_ids=[1])
+    loaded.count_references(manifest)
+    assert loaded.find(FOOTER) == 1
+    assert loaded.find(TEXT) is None
@@ -0,0 +1,173 @@
+from unittest.mock import Mock
+import pytest
+from src.data_source.base import Document
+from src.data_source.pdf_source import PDFDataSource
+from src.config.dedup_config import DedupConfig
+from src.config.metrics_config import MetricsConfig
+from src.dedup import ChunkDeduplicator
+from src.ingestion import IngestionPipeline
+from src.manifest import IndexManifest
+from src.metrics import PrometheusMetrics
+from src.models.ollama_model import OllamaModel
+from src.text_splitter.recursive_splitter import RecursiveTextSplitter
+from src.vector_db.faiss_db import FAISSVectorDB
+
+
+def _pipeline(documents, batch_size=4, manifest=None, dedup=None, metrics=None):
+    source = Mock(spec=PDFDataSource)
+    source.iter_documents.side_effect = lambda: (
+        Document(id=document_id, text=text, metadata={"page": 1})
+        for document_id, text in documents.items()
+    )
+    model = Mock(spec=OllamaModel)
+    model.get_embeddings_batch.side_effect = lambda texts: [[0.0] for _ in texts]
+    vector_db = Mock(spec=FAISSVectorDB)
+    pipeline = IngestionPipeline(
+        source,
+        RecursiveTextSplitter(chunk_size=10, chunk_overlap=0),
+        model,
+        vector_db,
+        manifest or IndexManifest(),
+        batch_size=batch_size,
+        queue_size=2,
+        dedup=dedup,
+        metrics=metrics,
+    )
+    return pipeline, model, vector_db
+
+
+def test_ingestion_pipeline_batches_all_chunks():
+    documents = {f"doc{i}": "x" * (10 * (i % 3 + 1)) for i in range(20)}
+    pipeline, model, vector_db = _pipeline(documents)
+
+    expected = sum(
+        len(pipeline.text_splitter.split_text(text)) for text in documents.values()
+    )
+
+    pipeline.run()
+
+    batch_sizes = [
+        len(call.args[0]) for call in model.get_embeddings_batch.call_args_list
+    ]
+    assert all(size <= 4 for size in batch_sizes)
+    assert sum(batch_sizes) == pipeline.chunks_indexed == expected
+    added = [
+        chunk_id
+        for call in vector_db.add_embeddings.call_args_list
+        for chunk_id in call.args[2]
+    ]
+    assert len(set(added)) == expected
+    metadata = vector_db.add_embeddings.call_args_list[0].args[1][0]
+    assert metadata["page"] == 1 and metadata["document_id"] == "doc0"
+    assert set(pipeline.manifest.documents) == set(documents)
+    assert sorted(added) == sorted(
+        chunk_id
+        for record in pipeline.manifest.documents.values()
+        for chunk_id in record.chunk_ids
+    )
+
+
+def test_ingestion_pipeline_skips_unchanged_and_deletes_missing():
+    pipeline, _, _ = _pipeline({"a": "first", "b": "second"})
+    pipeline.run()
+    manifest = pipeline.manifest
+    b_ids = manifest.documents["b"].chunk_ids
+
+    pipeline, model, vector_db = _pipeline({"a": "first"}, manifest=manifest)
+    pipeline.run()
+
+    model.get_embeddings_batch.assert_not_called()
+    vector_db.delete_embeddings.assert_called_once_with(b_ids)
+    assert pipeline.documents_deleted == 1
+    assert list(manifest.documents) == ["a"]
+
+
+def test_ingestion_pipeline_propagates_errors_and_keeps_manifest_consistent():
+    documents = {f"doc{i}": "x" * 10 for i in range(10)}
+    pipeline, model, vector_db = _pipeline(documents, batch_size=2)
+    calls = 0
+
+    def embed(texts):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise RuntimeError("embedding failed")
+        return [[0.0] for _ in texts]
+
+    model.get_embeddings_batch.side_effect = embed
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        pipeline.run()
+
+    added = {
+        chunk_id
+        for call in vector_db.add_embeddings.call_args_list
+        for chunk_id in call.args[2]
+    }
+    recorded = {
+        chunk_id
+        for record in pipeline.manifest.documents.values()
+        for chunk_id in record.chunk_ids
+    }
+    assert recorded and recorded <= added
+    assert len(pipeline.manifest.documents) < len(documents)
+
+
+def test_ingestion_pipeline_embeds_duplicate_chunks_once():
+    footer = "All rights reserved by the ACME corporation."
+    dedup = ChunkDeduplicator(DedupConfig())
+    pipeline, model, vector_db = _pipeline(
+        {
+            "a": "Alpha page text with a few more words.\n\n" + footer,
+            "b": "Beta page text with a few more words.\n\n" + footer,
+        },
+        dedup=dedup,
+    )
+    pipeline.run()
+
+    embedded = [
+        text
+        for call in model.get_embeddings_batch.call_args_list
+        for text in call.args[0]
+    ]
+    assert embedded.count(footer) == 1
+    assert pipeline.chunks_deduplicated == 1
+    manifest = pipeline.manifest
+    shared = set(manifest.documents["a"].chunk_ids) & set(
+        manifest.documents["b"].chunk_ids
+    )
+    assert len(shared) == 1
+    (footer_id,) = shared
+    assert len(manifest.locations()[footer_id]) == 2
+
+    pipeline, _, vector_db = _pipeline(
+        {"b": "Beta page text with a few more words.\n\n" + footer},
+        manifest=manifest,
+        dedup=dedup,
+    )
+    pipeline.run()
+    deleted = vector_db.delete_embeddings.call_args.args[0]
+    assert footer_id not in deleted
+
+    pipeline, _, vector_db = _pipeline({}, manifest=manifest, dedup=dedup)
+    pipeline.run()
+    assert footer_id in vector_db.delete_embeddings.call_args.args[0]
+
+
+def test_ingestion_pipeline_records_metrics():
+    metrics = PrometheusMetrics(MetricsConfig())
+    pipeline, _, _ = _pipeline({"a": "first", "b": "second"}, metrics=metrics)
+    pipeline.run()
+    manifest = pipeline.manifest
+    pipeline, _, _ = _pipeline(
+        {"a": "first", "b": "second, changed"}, manifest=manifest, metrics=metrics
+    )
+    pipeline.run()
+
+    assert metrics.count("index.split") == 3
+    assert metrics.count("index.delete") == 1
+    assert metrics.counter("chunks_embedded") == metrics.counter("vectors_added")
+    assert metrics.counter("vectors_added") == len(
+        manifest.documents["a"].chunk_ids
+    ) + (len(manifest.documents["b"].chunk_ids) + pipeline.chunks_deleted)
+    assert metrics.counter("vectors_deleted") == pipeline.chunks_deleted > 0
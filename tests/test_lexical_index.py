@@ -0,0 +1,138 @@
+import numpy as np
+from src.config.search_config import HybridSearchConfig
+from src.lexical_index import BM25Index, tokenize
+
+TEXTS = [
+    "Replace the filter cartridge AB-1234 every six months.",
+    "Clean the filter housing with warm water.",
+    "The pump and the filter are covered by the warranty.",
+    "Part AB-1235 is the seal kit for the pump.",
+]
+
+
+def build_index(texts=TEXTS):
+    index = BM25Index(HybridSearchConfig())
+    index.add(list(range(10, 10 + len(texts))), texts)
+    return index
+
+
+def brute_force(index, query, k):
+    """Score every live document for every query term."""
+    average_length = index._total_length / index._alive_count
+    scores = np.zeros(index._size)
+    for term in set(tokenize(query)):
+        term_id = index._vocabulary.get(term, -1)
+        if term_id < 0:
+            continue
+        rows, frequencies = index._postings_for(term_id)
+        if len(rows):
+            idf = np.log(1 + (index._size - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += index._term_scores(idf, frequencies, rows, average_length)
+    scores[~index._alive[: index._size]] = 0
+    top = [row for row in np.argsort(-scores, kind="stable")[:k] if scores[row] > 0]
+    return [(int(index._doc_ids[row]), float(scores[row])) for row in top]
+
+
+def test_tokenize_keeps_compound_terms_and_parts():
+    assert tokenize("Replace part AB-1234 (v2.1).") == [
+        "replace",
+        "part",
+        "ab-1234",
+        "ab",
+        "1234",
+        "v2.1",
+        "v2",
+        "1",
+    ]
+
+
+def test_bm25_ranks_exact_part_number_first():
+    index = build_index()
+
+    assert index.search("AB-1234", k=2)[0][0] == 10
+    assert index.search("seal kit ab-1235", k=1)[0][0] == 13
+    assert index.search("unknown words", k=3) == []
+    assert [chunk for chunk, _ in index.search("filter", k=5)] == [11, 10, 12]
+
+
+def test_bm25_remove_and_upsert():
+    index = build_index()
+
+    index.remove([10, 99])
+    assert len(index) == 3
+    assert 10 not in [chunk for chunk, _ in index.search("filter cartridge", k=5)]
+
+    index.add([11], ["Replacement cartridge AB-1234"])
+    assert len(index) == 3
+    assert [chunk for chunk, _ in index.search("ab-1234", k=5)] == [11, 13]
+    assert index.search("housing", k=5) == []
+
+
+def test_bm25_compact_and_round_trip(tmp_path):
+    index = build_index()
+    index.remove([12])
+    before = index.search("filter pump ab-1234", k=5)
+
+    path = str(tmp_path / "index.bm25.npz")
+    index.save(path)
+    loaded = BM25Index.load(path, HybridSearchConfig())
+
+    assert len(loaded) == 3
+    assert [chunk for chunk, _ in loaded.search("filter pump ab-1234", k=5)] == [
+        chunk for chunk, _ in before
+    ]
+    assert len(BM25Index.load(str(tmp_path / "missing.npz"), HybridSearchConfig())) == 0
+
+
+def test_bm25_pruned_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vocabulary = [f"w{i}" for i in range(500)]
+    texts = [
+        " ".join(vocabulary[min(word, 500) - 1] for word in rng.zipf(1.3, size=30))
+        for _ in range(2000)
+    ]
+    index = build_index(texts)
+    index.remove(list(range(10, 60)))
+    index._CHAMPION_MIN = 10**9
+
+    for query in ["w0 w1 w250", "w3 w40", "w0 w1 w2 w3", "w7"]:
+        expected = brute_force(index, query, 10)
+        result = index.search(query, 10)
+        # Compare scores rather than ids, which may differ between ties
+        assert np.allclose([s for _, s in result], [s for _, s in expected])
+
+
+def test_bm25_search_restricted_to_ids():
+    rng = np.random.default_rng(0)
+    vocabulary = [f"w{i}" for i in range(500)]
+    texts = [
+        " ".join(vocabulary[min(word, 500) - 1] for word in rng.zipf(1.3, size=30))
+        for _ in range(2000)
+    ]
+    index = build_index(texts)
+    index.remove([12, 14])
+
+    for allowed in (np.arange(10, 30), np.arange(10, 2010, 2)):
+        expected = [
+            (chunk, score)
+            for chunk, score in index.search("w0 w3 w40", index._size)
+            if chunk in set(allowed.tolist())
+        ][:5]
+        result = index.search("w0 w3 w40", 5, ids=allowed)
+        # Compare scores rather than ids, which may differ between ties
+        assert set(chunk for chunk, _ in result) <= set(allowed.tolist())
+        assert np.allclose([s for _, s in result], [s for _, s in expected])
+    assert index.search("w0", 5, ids=np.array([12, 14, 99999])) == []
+
+
+def test_bm25_champion_lists_score_candidates_exactly():
+    index = build_index([f"common filler {i}" for i in range(300)] + TEXTS)
+    index._CHAMPION_MIN = 100
+    index._CHAMPIONS = 20
+    index.compact()
+
+    result = index.search("common filter", k=10)
+    expected = dict(brute_force(index, "common filter", index._size))
+    assert len(result) == 10
+    for chunk, score in result:
+        assert np.isclose(score, expected[chunk])
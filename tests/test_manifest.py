@@ -0,0 +1,58 @@
+from src.manifest import DocumentRecord, IndexManifest, chunk_id, content_hash
+
+
+def test_chunk_id_is_stable_and_non_negative():
+    document_hash = content_hash("Hello")
+    first = chunk_id("doc#page=1", document_hash, 0)
+    assert first == chunk_id("doc#page=1", document_hash, 0)
+    assert first != chunk_id("doc#page=1", document_hash, 1)
+    assert first != chunk_id("doc#page=1", content_hash("Hello!"), 0)
+    assert 0 <= first < 2**63
+
+
+def test_manifest_round_trip(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    assert IndexManifest.load(path).documents == {}
+
+    manifest = IndexManifest()
+    manifest.documents["doc"] = DocumentRecord(content_hash="abc", chunk_ids=[1, 2])
+    manifest.save(path)
+
+    assert IndexManifest.load(path) == manifest
+
+
+def test_manifest_locations_map_shared_chunks_to_every_source():
+    manifest = IndexManifest()
+    manifest.documents["a"] = DocumentRecord(
+        content_hash="x", chunk_ids=[1, 2], chunk_offsets=[(0, 10), (11, 20)]
+    )
+    manifest.documents["b"] = DocumentRecord(
+        content_hash="y", chunk_ids=[2], chunk_offsets=[(5, 14)]
+    )
+
+    locations = manifest.locations()
+
+    assert [location.document_id for location in locations[2]] == ["a", "b"]
+    assert (locations[2][1].start, locations[2][1].end) == (5, 14)
+    assert len(locations[1]) == 1
+
+
+def test_manifest_shared_chunks_carry_each_location_metadata():
+    manifest = IndexManifest()
+    manifest.documents["a"] = DocumentRecord(
+        content_hash="x",
+        chunk_ids=[1, 2],
+        chunk_offsets=[(0, 10), (11, 20)],
+        metadata={"source": "a.pdf"},
+    )
+    manifest.documents["b"] = DocumentRecord(
+        content_hash="y",
+        chunk_ids=[2],
+        chunk_offsets=[(5, 14)],
+        metadata={"source": "b.pdf"},
+    )
+
+    assert manifest.shared_chunks() == [
+        (2, {"source": "a.pdf", "document_id": "a", "start": 11, "end": 20}),
+        (2, {"source": "b.pdf", "document_id": "b", "start": 5, "end": 14}),
+    ]
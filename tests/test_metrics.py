@@ -0,0 +1,65 @@
+from unittest.mock import patch
+import pytest
+from src.config.metrics_config import MetricsConfig
+from src.metrics import NullMetrics, PrometheusMetrics
+
+
+def test_prometheus_metrics_export():
+    metrics = PrometheusMetrics(MetricsConfig(buckets=[0.1, 0.01, 1.0]))
+    with patch("src.metrics.time.perf_counter", side_effect=[0.0, 0.05]):
+        with metrics.span("query.search"):
+            pass
+    metrics.observe("query.search", 2.0)
+    metrics.observe('odd "stage"', 0.01)
+    metrics.increment("vectors_added", 3)
+    metrics.increment("vectors_added")
+
+    assert metrics.count("query.search") == 2
+    assert metrics.total_seconds("query.search") == pytest.approx(2.05)
+    assert metrics.counter("vectors_added") == 4
+    assert metrics.counter("chunks_embedded") == 0
+    lines = metrics.export().splitlines()
+    assert lines[:2] == [
+        "# HELP rag_stage_seconds Wall-clock duration of RAG pipeline stages.",
+        "# TYPE rag_stage_seconds histogram",
+    ]
+    assert 'rag_stage_seconds_bucket{stage="odd \\"stage\\"",le="0.01"} 1' in lines
+    assert [line for line in lines if 'stage="query.search"' in line] == [
+        'rag_stage_seconds_bucket{stage="query.search",le="0.01"} 0',
+        'rag_stage_seconds_bucket{stage="query.search",le="0.1"} 1',
+        'rag_stage_seconds_bucket{stage="query.search",le="1"} 1',
+        'rag_stage_seconds_bucket{stage="query.search",le="+Inf"} 2',
+        'rag_stage_seconds_sum{stage="query.search"} 2.05',
+        'rag_stage_seconds_count{stage="query.search"} 2',
+    ]
+    assert lines[-2:] == [
+        "# TYPE rag_vectors_added_total counter",
+        "rag_vectors_added_total 4",
+    ]
+
+    metrics.reset()
+    assert metrics.export() == ""
+
+
+def test_prometheus_metrics_span_records_failures_and_writes_file(tmp_path):
+    metrics = PrometheusMetrics(MetricsConfig(namespace="docs_qa"))
+    with pytest.raises(RuntimeError):
+        with metrics.span("query.generate"):
+            raise RuntimeError("model unavailable")
+
+    path = tmp_path / "rag.prom"
+    metrics.write(str(path))
+
+    assert metrics.count("query.generate") == 1
+    assert 'docs_qa_stage_seconds_count{stage="query.generate"} 1' in (
+        path.read_text().splitlines()
+    )
+
+
+def test_null_metrics_records_nothing():
+    metrics = NullMetrics()
+    with patch("src.metrics.time.perf_counter") as perf_counter:
+        with metrics.span("query"):
+            metrics.increment("queries")
+    perf_counter.assert_not_called()
+    assert metrics.span("query") is metrics.span("index")
@@ -1,4 +1,16 @@
-from unittest.mock import patch
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from src.config.cache_config import EmbeddingCacheConfig
+from src.config.model_config import ONNXEmbeddingConfig, OllamaConfig
+from src.models.base import LanguageModel
+from src.models.cached_model import CachedLanguageModel
+from src.models.composite_model import CompositeLanguageModel
+from src.models.onnx_embedding_model import ONNXEmbeddingModel
 from src.models.ollama_model import OllamaModel
 
 
@@ -13,13 +25,378 @@ def test_ollama_model_generate(mock_generate, mock_ollama_config):
     model = OllamaModel(mock_ollama_config)
     response = model.generate("Test prompt")
     assert response == "Test response"
-    mock_generate.assert_called_once_with(model="llama2", prompt="Test prompt")
+    mock_generate.assert_called_once_with(
+        model="llama2", prompt="Test prompt", keep_alive="30m"
+    )
 
 
-@patch("ollama.embeddings")
-def test_ollama_model_embeddings(mock_embeddings, mock_ollama_config):
-    mock_embeddings.return_value = {"embedding": [0.1, 0.2, 0.3]}
+@patch("ollama.embed")
+def test_ollama_model_embeddings(mock_embed, mock_ollama_config):
+    mock_embed.return_value = {"embeddings": [[0.1, 0.2, 0.3]]}
     model = OllamaModel(mock_ollama_config)
     embeddings = model.get_embeddings("Test text")
     assert embeddings == [0.1, 0.2, 0.3]
-    mock_embeddings.assert_called_once_with(model="llama2", prompt="Test text")
+    mock_embed.assert_called_once_with(
+        model="llama2", input="Test text", keep_alive="30m"
+    )
+
+
+@patch("ollama.generate")
+def test_ollama_model_sends_keep_alive_and_num_ctx(mock_generate):
+    mock_generate.return_value = {"response": "Test response"}
+    model = OllamaModel(OllamaConfig(llm_model="llama2", keep_alive=-1, num_ctx=8192))
+
+    model.generate("Test prompt")
+    model.prewarm("AI: Context:")
+
+    assert mock_generate.call_args_list[0].kwargs == {
+        "model": "llama2",
+        "prompt": "Test prompt",
+        "keep_alive": -1,
+        "options": {"num_ctx": 8192},
+    }
+    assert mock_generate.call_args_list[1].kwargs == {
+        "model": "llama2",
+        "prompt": "AI: Context:",
+        "keep_alive": -1,
+        "options": {"num_ctx": 8192, "num_predict": 1},
+    }
+
+
+@patch("ollama.generate")
+def test_ollama_model_sends_system_message(mock_generate):
+    mock_generate.return_value = iter([{"response": "Hi", "done": True}])
+    model = OllamaModel(OllamaConfig(llm_model="llama2"), system_message="Be brief.")
+
+    list(model.generate_stream("Test prompt"))
+    mock_generate.return_value = {"response": "Hi"}
+    model.generate("Test prompt")
+    model.prewarm("AI: Context:")
+
+    assert [call.kwargs["system"] for call in mock_generate.call_args_list] == [
+        "Be brief."
+    ] * 3
+    assert mock_generate.call_args_list[1].kwargs["prompt"] == "Test prompt"
+    assert mock_generate.call_args_list[2].kwargs["keep_alive"] == "30m"
+
+
+class MockOllamaServer:
+    """Stand-in for the Ollama embed endpoint that records batching and concurrency."""
+
+    def __init__(self, delay: float = 0.02) -> None:
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def embed(self, model, input, keep_alive=None):
+        with self.lock:
+            self.batches.append(list(input))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return {"embeddings": [[float(text.split("-")[1])] for text in input]}
+
+
+def test_ollama_model_embeddings_batch():
+    server = MockOllamaServer()
+    config = OllamaConfig(
+        llm_model="llama2", embedding_batch_size=3, max_concurrent_requests=2
+    )
+    model = OllamaModel(config)
+    texts = [f"text-{i}" for i in range(10)]
+
+    with patch("ollama.embed", side_effect=server.embed):
+        embeddings = model.get_embeddings_batch(texts)
+
+    assert embeddings == [[float(i)] for i in range(10)]
+    assert sorted(len(batch) for batch in server.batches) == [1, 3, 3, 3]
+    assert server.max_in_flight == 2
+
+
+def test_ollama_model_embeddings_batch_empty(mock_ollama_config):
+    model = OllamaModel(mock_ollama_config)
+    with patch("ollama.embed") as mock_embed:
+        assert model.get_embeddings_batch([]) == []
+    mock_embed.assert_not_called()
+
+
+def _cached_model(tmp_path, max_entries=100):
+    inner = Mock(spec=OllamaModel)
+    inner.model_name = "llama2"
+    inner.get_embeddings_batch.side_effect = lambda texts: [
+        [float(len(text)), 1.0] for text in texts
+    ]
+    config = EmbeddingCacheConfig(
+        cache_path=str(tmp_path / "cache.sqlite"), max_entries=max_entries
+    )
+    return inner, CachedLanguageModel(inner, config)
+
+
+def test_cached_model_hits_and_misses(tmp_path):
+    inner, model = _cached_model(tmp_path)
+    assert model.get_embeddings_batch(["a", "bb", "a"]) == [
+        [1.0, 1.0],
+        [2.0, 1.0],
+        [1.0, 1.0],
+    ]
+    inner.get_embeddings_batch.assert_called_once_with(["a", "bb"])
+    assert (model.hits, model.misses) == (0, 3)
+
+    assert model.get_embeddings("bb") == [2.0, 1.0]
+    assert inner.get_embeddings_batch.call_count == 1
+    assert model.hits == 1
+
+
+def test_cached_model_persists_across_instances(tmp_path):
+    inner, model = _cached_model(tmp_path)
+    model.get_embeddings_batch(["a", "bb"])
+    model.close()
+
+    inner, model = _cached_model(tmp_path)
+    assert model.get_embeddings_batch(["a", "bb"]) == [[1.0, 1.0], [2.0, 1.0]]
+    inner.get_embeddings_batch.assert_not_called()
+    assert model.hits == 2
+
+
+def test_cached_model_lru_eviction(tmp_path):
+    inner, model = _cached_model(tmp_path, max_entries=2)
+    model.get_embeddings_batch(["a", "bb"])
+    model.get_embeddings("a")
+    model.get_embeddings("ccc")
+    assert len(model) == 2
+
+    inner.get_embeddings_batch.reset_mock()
+    model.get_embeddings_batch(["a", "ccc"])
+    inner.get_embeddings_batch.assert_not_called()
+    model.get_embeddings("bb")
+    inner.get_embeddings_batch.assert_called_once_with(["bb"])
+
+
+def test_cached_model_defers_access_times_to_next_write(tmp_path):
+    inner, model = _cached_model(tmp_path, max_entries=2)
+    model.get_embeddings_batch(["a", "bb"])
+    changes = model._connection.total_changes
+    model.get_embeddings("a")
+    assert model._connection.total_changes == changes
+    model.close()
+
+    inner, model = _cached_model(tmp_path, max_entries=2)
+    assert len(model) == 2
+    model.get_embeddings("ccc")
+    assert len(model) == 2
+    model.get_embeddings_batch(["a", "ccc"])
+    inner.get_embeddings_batch.assert_called_once_with(["ccc"])
+
+
+def test_cached_model_delegates_generate(tmp_path):
+    inner, model = _cached_model(tmp_path)
+    inner.generate.return_value = "Test response"
+    assert model.generate("Test prompt") == "Test response"
+
+
+def test_ollama_model_async_methods(mock_ollama_config):
+    client = Mock()
+    client.generate = AsyncMock(return_value={"response": "Test response"})
+    client.embed = AsyncMock(
+        side_effect=lambda model, input, keep_alive: {
+            "embeddings": [[float(len(text))] for text in input]
+            if isinstance(input, list)
+            else [[0.1, 0.2]]
+        }
+    )
+    config = OllamaConfig(
+        llm_model="llama2", embedding_batch_size=2, max_concurrent_requests=2
+    )
+
+    with patch("ollama.AsyncClient", return_value=client):
+        model = OllamaModel(config)
+        assert asyncio.run(model.agenerate("Test prompt")) == "Test response"
+        assert asyncio.run(model.aget_embeddings("Test text")) == [0.1, 0.2]
+        embeddings = asyncio.run(model.aget_embeddings_batch(["a", "bb", "ccc"]))
+
+    assert embeddings == [[1.0], [2.0], [3.0]]
+    client.generate.assert_awaited_once_with(
+        model="llama2", prompt="Test prompt", keep_alive="30m"
+    )
+    assert client.embed.await_count == 3
+
+
+def test_cached_model_async_embeddings(tmp_path):
+    inner, model = _cached_model(tmp_path)
+    inner.aget_embeddings_batch = AsyncMock(
+        side_effect=lambda texts: [[float(len(text)), 1.0] for text in texts]
+    )
+    # SQLite is only queried off the event loop's thread
+    threads = []
+    lookup, store = model._lookup, model._store
+    model._lookup = lambda keys: (
+        threads.append(threading.current_thread()) or lookup(keys)
+    )
+    model._store = lambda vectors: (
+        threads.append(threading.current_thread()) or store(vectors)
+    )
+
+    assert asyncio.run(model.aget_embeddings_batch(["a", "bb"])) == [
+        [1.0, 1.0],
+        [2.0, 1.0],
+    ]
+    assert asyncio.run(model.aget_embeddings("a")) == [1.0, 1.0]
+    inner.aget_embeddings_batch.assert_awaited_once_with(["a", "bb"])
+    assert model.hits == 1
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
+
+
+@patch("ollama.generate")
+def test_ollama_model_generate_stream(mock_generate, mock_ollama_config):
+    mock_generate.return_value = iter(
+        [
+            {"response": "Hello", "done": False},
+            {"response": " world", "done": False},
+            {
+                "response": "",
+                "done": True,
+                "eval_count": 20,
+                "eval_duration": 500_000_000,
+            },
+        ]
+    )
+    model = OllamaModel(mock_ollama_config)
+
+    chunks = list(model.generate_stream("Test prompt"))
+
+    assert "".join(chunk.text for chunk in chunks) == "Hello world"
+    assert [chunk.done for chunk in chunks] == [False, False, True]
+    assert chunks[-1].time_to_first_token >= 0
+    assert chunks[-1].tokens_per_second == 40.0
+    mock_generate.assert_called_once_with(
+        model="llama2", prompt="Test prompt", stream=True, keep_alive="30m"
+    )
+
+
+def test_language_model_default_generate_stream(tmp_path):
+    inner, model = _cached_model(tmp_path)
+    inner.generate_stream.side_effect = lambda prompt: LanguageModel.generate_stream(
+        inner, prompt
+    )
+    inner.generate.return_value = "Test response"
+
+    chunks = list(model.generate_stream("Test prompt"))
+
+    assert len(chunks) == 1
+    assert chunks[0].text == "Test response"
+    assert chunks[0].done
+    assert chunks[0].time_to_first_token is not None
+
+
+@patch("ollama.embed")
+def test_ollama_model_separate_embedding_model(mock_embed):
+    mock_embed.return_value = {"embeddings": [[0.1, 0.2]]}
+    model = OllamaModel(
+        OllamaConfig(llm_model="llama3.2:1b", embedding_model="nomic-embed-text")
+    )
+
+    model.get_embeddings("Test text")
+
+    assert mock_embed.call_args.kwargs["model"] == "nomic-embed-text"
+    assert model.model_name == "llama3.2:1b"
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer padding each batch to its longest text."""
+
+    def encode_batch(self, texts):
+        lengths = [len(text.split()) for text in texts]
+        width = max(lengths)
+        return [
+            SimpleNamespace(
+                ids=[1] * length + [0] * (width - length),
+                attention_mask=[1] * length + [0] * (width - length),
+                type_ids=[0] * width,
+            )
+            for length in lengths
+        ]
+
+
+class FakeSession:
+    """Encoder whose token embeddings are [position + 1, 1] for real tokens."""
+
+    def __init__(self):
+        self.batch_widths = []
+
+    def get_inputs(self):
+        return [
+            SimpleNamespace(name="input_ids"),
+            SimpleNamespace(name="attention_mask"),
+        ]
+
+    def run(self, outputs, feeds):
+        assert set(feeds) == {"input_ids", "attention_mask"}
+        batch, width = feeds["input_ids"].shape
+        self.batch_widths.append(width)
+        positions = np.arange(1, width + 1, dtype=np.float64)
+        hidden = np.stack([positions, np.ones(width)], axis=1)
+        # Padding positions get large values that pooling must ignore
+        hidden = np.where(feeds["attention_mask"][:, :, None] == 1, hidden, 100.0)
+        return [hidden]
+
+
+def test_onnx_embedding_model_pools_batches_by_length():
+    session = FakeSession()
+    config = ONNXEmbeddingConfig(
+        model_path="model.onnx", tokenizer_path="tokenizer.json", batch_size=2
+    )
+    with (
+        patch.object(ONNXEmbeddingModel, "_load_session", return_value=session),
+        patch.object(
+            ONNXEmbeddingModel, "_load_tokenizer", return_value=FakeTokenizer()
+        ),
+    ):
+        model = ONNXEmbeddingModel(config)
+
+    texts = ["a b c d", "a", "a b c", "a b"]
+    embeddings = np.array(model.get_embeddings_batch(texts))
+
+    # Mean of positions 1..n is (n + 1) / 2, paired with 1, then normalised
+    expected = np.array([[(len(t.split()) + 1) / 2, 1.0] for t in texts])
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(embeddings, expected)
+    assert session.batch_widths == [2, 4]
+    assert model.get_embeddings_batch([]) == []
+    with pytest.raises(NotImplementedError):
+        model.generate("Test prompt")
+
+
+def test_composite_model_delegates():
+    generator = Mock(spec=OllamaModel)
+    generator.model_name = "llama3.2:1b"
+    generator.generate.return_value = "Test response"
+    embedder = Mock(spec=OllamaModel)
+    embedder.get_embeddings_batch.return_value = [[1.0, 0.0]]
+    model = CompositeLanguageModel(generator, embedder)
+
+    assert model.generate("Test prompt") == "Test response"
+    assert model.get_embeddings_batch(["text"]) == [[1.0, 0.0]]
+    model.prewarm("prefix")
+    generator.prewarm.assert_called_once_with("prefix")
+    embedder.prewarm.assert_not_called()
+    embedder.generate.assert_not_called()
+    generator.get_embeddings_batch.assert_not_called()
+    assert model.model_name == "llama3.2:1b"
+
+
+@patch("ollama.generate")
+def test_composite_model_prewarms_only_generator(mock_generate):
+    model = CompositeLanguageModel(
+        OllamaModel(OllamaConfig(llm_model="llama3.2:1b")),
+        OllamaModel(OllamaConfig(llm_model="nomic-embed-text")),
+    )
+
+    model.prewarm("prefix")
+
+    mock_generate.assert_called_once()
+    assert mock_generate.call_args.kwargs["model"] == "llama3.2:1b"
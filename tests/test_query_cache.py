@@ -0,0 +1,35 @@
+from unittest.mock import patch
+from src.config.cache_config import QueryCacheConfig
+from src.query_cache import QueryCache
+
+
+def test_query_cache_exact_and_semantic_lookup():
+    cache = QueryCache(QueryCacheConfig(similarity_threshold=0.9))
+    cache.put("What is RAG?", 5, [1.0, 0.0, 0.0], "RAG is retrieval")
+
+    assert cache.get("  what is   rag ", 5) == "RAG is retrieval"
+    assert cache.get("What is RAG?", 3) is None
+    assert cache.get_similar([0.99, 0.05, 0.0], 5) == "RAG is retrieval"
+    assert cache.get_similar([0.99, 0.05, 0.0], 3) is None
+    assert cache.get_similar([0.0, 1.0, 0.0], 5) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_query_cache_expires_and_evicts():
+    cache = QueryCache(QueryCacheConfig(max_entries=2, ttl_seconds=10))
+    with patch("src.query_cache.time.monotonic", return_value=0.0):
+        cache.put("first", 5, [1.0, 0.0], "1")
+        cache.put("second", 5, [0.0, 1.0], "2")
+        assert cache.get("first", 5) == "1"
+        cache.put("third", 5, [1.0, 1.0], "3")
+
+    assert len(cache) == 2
+    with patch("src.query_cache.time.monotonic", return_value=5.0):
+        assert cache.get("second", 5) is None
+        assert cache.get("first", 5) == "1"
+    with patch("src.query_cache.time.monotonic", return_value=11.0):
+        assert cache.get("first", 5) is None
+        assert cache.get_similar([1.0, 1.0], 5) is None
+
+    cache.clear()
+    assert len(cache) == 0
@@ -1,4 +1,18 @@
-from src.rag_system import RAGSystem
+import os
+import time
+from unittest.mock import patch
+import numpy as np
+from src.config.cache_config import QueryCacheConfig
+from src.config.context_config import ContextConfig
+from src.config.dedup_config import DedupConfig
+from src.config.metrics_config import MetricsConfig
+from src.config.model_config import OllamaConfig
+from src.config.rerank_config import LexicalRerankerConfig
+from src.config.search_config import HybridSearchConfig
+from src.manifest import DocumentRecord
+from src.models.base import GenerationChunk
+from src.models.composite_model import CompositeLanguageModel
+from src.rag_system import SYSTEM_MESSAGE, RAGSystem
 from src.text_splitter.recursive_splitter import RecursiveTextSplitter
 
 
@@ -14,6 +28,31 @@ def test_rag_system_init(
     assert isinstance(rag.text_splitter, RecursiveTextSplitter)
 
 
+def test_rag_system_prewarms_model(mock_faiss_config, mock_pdf_config):
+    config = OllamaConfig(llm_model="llama2", prewarm=True)
+    with patch("src.rag_system.OllamaModel.prewarm") as prewarm:
+        rag = RAGSystem(config, mock_faiss_config, mock_pdf_config)
+    prewarm.assert_called_once_with("AI: Context:\nHuman: ")
+    assert rag.model.system_message == SYSTEM_MESSAGE
+    prompt = rag._build_prompt("Question?", [{"text": "Passage"}])
+    assert SYSTEM_MESSAGE not in prompt
+    assert prompt.startswith("AI: Context:")
+
+
+def test_rag_system_separate_embedding_model(
+    mock_ollama_config, mock_faiss_config, mock_pdf_config
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        embedding_model_config=OllamaConfig(llm_model="nomic-embed-text"),
+    )
+    assert isinstance(rag.model, CompositeLanguageModel)
+    assert rag.model.model_name == "llama2"
+    assert rag.model.embedding_model_name == "nomic-embed-text"
+
+
 def test_rag_system_index_data(
     mock_ollama_config,
     mock_faiss_config,
@@ -29,8 +68,8 @@ def test_rag_system_index_data(
 
     rag.index_data()
 
-    mock_pdf_source.load_data.assert_called_once()
-    assert mock_ollama_model.get_embeddings.call_count > 0
+    mock_pdf_source.iter_documents.assert_called_once()
+    mock_ollama_model.get_embeddings_batch.assert_called_once()
     mock_faiss_db.add_embeddings.assert_called_once()
 
 
@@ -53,3 +92,376 @@ def test_rag_system_query(
     mock_faiss_db.search.assert_called_once()
     mock_ollama_model.generate.assert_called_once()
     assert isinstance(response, str)
+
+
+def test_rag_system_index_data_is_incremental(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(mock_ollama_config, mock_faiss_config, mock_pdf_config)
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.data_source = mock_pdf_source
+
+    rag.index_data()
+    first_ids = rag.manifest.documents["doc#page=1"].chunk_ids
+    mock_ollama_model.get_embeddings_batch.reset_mock()
+    mock_faiss_db.add_embeddings.reset_mock()
+
+    rag = RAGSystem(mock_ollama_config, mock_faiss_config, mock_pdf_config)
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.data_source = mock_pdf_source
+    rag.index_data()
+    mock_ollama_model.get_embeddings_batch.assert_not_called()
+    mock_faiss_db.add_embeddings.assert_not_called()
+    mock_faiss_db.delete_embeddings.assert_not_called()
+
+    mock_pdf_source.load_documents.return_value = {"doc#page=1": "Changed text"}
+    rag.index_data()
+    deleted = [
+        chunk_id
+        for call in mock_faiss_db.delete_embeddings.call_args_list
+        for chunk_id in call.args[0]
+    ]
+    assert set(first_ids) <= set(deleted)
+    assert len(deleted) > len(first_ids)
+    mock_ollama_model.get_embeddings_batch.assert_called_once_with(
+        rag.text_splitter.split_text("Changed text")
+    )
+    assert list(rag.manifest.documents) == ["doc#page=1"]
+
+
+def test_rag_system_query_batch(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(mock_ollama_config, mock_faiss_config, mock_pdf_config)
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.data_source = mock_pdf_source
+
+    def generate(prompt):
+        question = prompt.rsplit("Human: ", 1)[1]
+        time.sleep(0.01 * (5 - int(question[-1])))
+        return f"Answer to {question}"
+
+    mock_ollama_model.generate.side_effect = generate
+    queries = [f"Question {i}" for i in range(5)]
+
+    responses = rag.query_batch(queries, k=2, max_concurrent_generations=3)
+
+    assert responses == [f"Answer to Question {i}" for i in range(5)]
+    mock_ollama_model.get_embeddings_batch.assert_called_once_with(queries)
+    mock_faiss_db.search_batch.assert_called_once()
+    mock_ollama_model.get_embeddings.assert_not_called()
+    assert rag.query_batch([]) == []
+
+
+def test_rag_system_stream_query(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(mock_ollama_config, mock_faiss_config, mock_pdf_config)
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    mock_ollama_model.generate_stream.return_value = iter(
+        [
+            GenerationChunk(text="Test "),
+            GenerationChunk(text="response", done=True, time_to_first_token=0.1),
+        ]
+    )
+
+    chunks = list(rag.stream_query("Test question"))
+
+    assert "".join(chunk.text for chunk in chunks) == "Test response"
+    assert chunks[-1].done
+    prompt = mock_ollama_model.generate_stream.call_args.args[0]
+    assert "Test document 1" in prompt
+    mock_ollama_model.generate.assert_not_called()
+
+
+def test_rag_system_index_data_saves_dedup_index(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        dedup_config=DedupConfig(),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.data_source = mock_pdf_source
+    mock_pdf_source.load_documents.return_value = {
+        "doc#page=1": "Same text on every page.",
+        "doc#page=2": "Same text on every page.",
+    }
+
+    rag.index_data()
+
+    (texts,) = mock_ollama_model.get_embeddings_batch.call_args.args
+    assert texts == ["Same text on every page."]
+    assert os.path.exists(rag.dedup_path)
+
+
+def test_rag_system_query_cache(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        query_cache_config=QueryCacheConfig(),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.data_source = mock_pdf_source
+    mock_ollama_model.get_embeddings.return_value = [1.0, 0.0]
+    mock_ollama_model.get_embeddings_batch.side_effect = lambda texts: [
+        [1.0, 0.0] for _ in texts
+    ]
+
+    assert rag.query("What is RAG?") == "Test response"
+    assert rag.query("what is rag") == "Test response"
+    assert rag.query("Tell me about RAG") == "Test response"
+    assert rag.query_batch(["What is RAG?", "Explain RAG"]) == ["Test response"] * 2
+    mock_ollama_model.generate.assert_called_once()
+    mock_faiss_db.search_batch.assert_not_called()
+
+    rag.index_data()
+    assert len(rag.query_cache) == 0
+    rag.query("What is RAG?")
+    assert mock_ollama_model.generate.call_count == 2
+
+
+def test_rag_system_hybrid_search_fuses_keyword_matches(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        hybrid_search_config=HybridSearchConfig(),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.lexical_index.add(
+        [0, 7], ["Test document 1 on how to replace", "Replace cartridge AB-1234"]
+    )
+    mock_faiss_db.get_by_ids.return_value = [
+        {"index": 7, "text": "Replace cartridge AB-1234"}
+    ]
+
+    docs = rag._retrieve("How do I replace AB-1234?", [0.1, 0.2], k=2)
+
+    mock_faiss_db.search.assert_called_once_with([0.1, 0.2], 50, where=None, ids=None)
+    mock_faiss_db.get_by_ids.assert_called_once_with([7])
+    assert [doc["index"] for doc in docs] == [0, 7]
+    assert docs[0]["score"] == 1 / 61 + 1 / 62
+    assert docs[1]["score"] == 1 / 61
+
+
+def test_rag_system_packs_context_within_budget(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        context_config=ContextConfig(max_tokens=6),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    mock_faiss_db.search.return_value = [
+        {"index": 1, "text": "b c d", "document_id": "a", "start": 2, "end": 7},
+        {"index": 0, "text": "a b c", "document_id": "a", "start": 0, "end": 5},
+        {"index": 2, "text": "a much longer chunk that does not fit"},
+        {"index": 3, "text": "e f"},
+    ]
+
+    rag.query("Test question")
+
+    (prompt,) = mock_ollama_model.generate.call_args.args
+    assert "Context: a b c d\n\ne f\n" in prompt
+
+
+def test_rag_system_filtered_query(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        query_cache_config=QueryCacheConfig(),
+        hybrid_search_config=HybridSearchConfig(),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.lexical_index.add(
+        [0, 7, 8], ["Test document 1", "Replace AB-1234", "Replace AB-1234 too"]
+    )
+    mock_faiss_db.get_by_ids.return_value = [
+        {"index": 7, "text": "Replace AB-1234", "source": "a.pdf"},
+    ]
+    mock_faiss_db.ids_matching.return_value = np.array([0, 7])
+    where = {"source": "a.pdf"}
+
+    rag.query("Replace AB-1234", k=3)
+    rag.query("Replace AB-1234", k=3, where=where)
+
+    assert mock_ollama_model.generate.call_count == 2
+    assert mock_faiss_db.search.call_args.kwargs == {"where": where, "ids": None}
+    mock_faiss_db.ids_matching.assert_called_once_with(where)
+    mock_faiss_db.get_by_ids.assert_called_with([7])
+    (prompt,) = mock_ollama_model.generate.call_args.args
+    assert "Replace AB-1234" in prompt
+    assert "too" not in prompt
+
+
+def test_rag_system_filter_matches_every_location_of_shared_chunks(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        hybrid_search_config=HybridSearchConfig(),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.manifest.documents["a"] = DocumentRecord(
+        content_hash="x",
+        chunk_ids=[1, 2],
+        chunk_offsets=[(0, 10), (11, 20)],
+        metadata={"source": "a.pdf"},
+    )
+    rag.manifest.documents["b"] = DocumentRecord(
+        content_hash="y",
+        chunk_ids=[2, 3],
+        chunk_offsets=[(0, 9), (10, 20)],
+        metadata={"source": "b.pdf"},
+    )
+    # The shared chunk 2 is stored with the metadata of document a
+    mock_faiss_db.ids_matching.side_effect = lambda where: (
+        np.array([1, 2]) if where["source"] == "a.pdf" else np.array([3])
+    )
+
+    rag.query("Test query", k=2, where={"source": "b.pdf"})
+    rag.query_batch(["Test query"], k=2, where={"source": "a.pdf"})
+
+    assert mock_faiss_db.search.call_args.kwargs["where"] is None
+    assert mock_faiss_db.search.call_args.kwargs["ids"].tolist() == [2, 3]
+    assert mock_faiss_db.search_batch.call_args.kwargs["ids"].tolist() == [1, 2]
+
+
+def test_rag_system_reranks_candidates(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        reranker_config=LexicalRerankerConfig(candidates=20),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    mock_faiss_db.search.return_value = [
+        {"index": i, "text": f"Unrelated passage {i}"} for i in range(19)
+    ] + [{"index": 19, "text": "Replace the toner cartridge"}]
+
+    docs = rag._retrieve("How do I replace the toner cartridge?", [0.1, 0.2], k=3)
+
+    assert mock_faiss_db.search.call_args.args[1] == 20
+    assert [doc["index"] for doc in docs] == [19, 0, 1]
+    assert rag.query_batch(["How do I replace the toner cartridge?"], k=1) == [
+        "Test response"
+    ]
+    (prompt,) = mock_ollama_model.generate.call_args.args
+    assert "Replace the toner cartridge" in prompt
+    assert "Unrelated passage" not in prompt
+
+
+def test_rag_system_records_stage_metrics(
+    mock_ollama_config,
+    mock_faiss_config,
+    mock_pdf_config,
+    mock_ollama_model,
+    mock_faiss_db,
+    mock_pdf_source,
+):
+    rag = RAGSystem(
+        mock_ollama_config,
+        mock_faiss_config,
+        mock_pdf_config,
+        query_cache_config=QueryCacheConfig(),
+        metrics_config=MetricsConfig(),
+    )
+    rag.model = mock_ollama_model
+    rag.vector_db = mock_faiss_db
+    rag.data_source = mock_pdf_source
+    mock_ollama_model.get_embeddings.return_value = [1.0, 0.0]
+
+    rag.index_data(batch_size=1)
+    rag.query("What is RAG?")
+    rag.query("What is RAG?")
+    rag.query_batch(["First question", "Second question"])
+
+    metrics = rag.metrics
+    for stage in ["index", "index.split", "index.embed", "index.add", "index.flush"]:
+        assert metrics.count(stage) >= 1
+    assert metrics.counter("chunks_embedded") == metrics.counter("vectors_added") == 2
+    assert metrics.count("query") == 2
+    for stage in ["query.embed", "query.search", "query.generate"]:
+        assert metrics.count(stage) == 1
+    assert metrics.count("query.prompt") == 3
+    assert metrics.count("query_batch.generate") == 1
+    assert metrics.counter("queries") == 4
+    assert metrics.counter("query_cache_hits") == 1
+    assert metrics.counter("query_cache_misses") == 3
+    assert 'rag_stage_seconds_count{stage="query.generate"} 1' in (
+        metrics.export().splitlines()
+    )
@@ -0,0 +1,123 @@
+import re
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+from src.config.rerank_config import CrossEncoderRerankerConfig, LexicalRerankerConfig
+from src.rerankers.cross_encoder_reranker import CrossEncoderReranker
+from src.rerankers.lexical_reranker import LexicalReranker
+
+DOCS = [
+    {"index": 0, "text": "The printer is switched off at night."},
+    {"index": 1, "text": "Open the lid to replace the cartridge."},
+    {"index": 2, "text": "To replace the toner cartridge, open the front lid."},
+    {"index": 3, "text": "Toner is sold separately."},
+]
+
+
+def test_lexical_reranker_scores_query_overlap():
+    reranker = LexicalReranker(LexicalRerankerConfig())
+    scores = reranker.score_batch(
+        "replace the toner cartridge", [doc["text"] for doc in DOCS]
+    )
+
+    assert scores[2] == max(scores) == 1.5
+    assert scores[2] > scores[1] > scores[3] > scores[0]
+    assert reranker.score_batch("?", ["Anything"]) == [0.0]
+
+
+def test_reranker_keeps_best_k_and_retrieval_order_on_ties():
+    reranker = LexicalReranker(LexicalRerankerConfig())
+
+    docs = reranker.rerank("replace the toner cartridge", DOCS, k=2)
+    assert [doc["index"] for doc in docs] == [2, 1]
+    assert docs[0]["rerank_score"] == 1.5
+
+    docs = reranker.rerank("unrelated words", DOCS, k=3)
+    assert [doc["index"] for doc in docs] == [0, 1, 2]
+
+
+class SlowReranker(LexicalReranker):
+    def score_batch(self, query, texts):
+        time.sleep(0.02)
+        return super().score_batch(query, texts)
+
+
+def test_reranker_falls_back_to_retrieval_order_over_budget():
+    reranker = SlowReranker(LexicalRerankerConfig(batch_size=2, budget_ms=30))
+
+    docs = reranker.rerank("replace the toner cartridge", DOCS, k=3)
+
+    # Only the first batch fits: it is ranked by score, then the rest follow
+    assert [doc["index"] for doc in docs] == [1, 0, 2]
+    assert docs[0]["rerank_score"] > docs[1]["rerank_score"]
+    assert docs[2] == DOCS[2]
+    assert reranker.fallbacks == 1
+
+    reranker.budget_seconds = 0
+    assert [d["index"] for d in reranker.rerank("toner cartridge", DOCS, k=1)] == [2]
+    assert reranker.fallbacks == 1
+
+
+class FakePairTokenizer:
+    """Marks tokens of the chunk that also occur in the query."""
+
+    def encode_batch(self, pairs):
+        encodings = []
+        for query, text in pairs:
+            query_words = re.findall(r"\w+", query.lower())
+            text_words = re.findall(r"\w+", text.lower())
+            encodings.append(
+                SimpleNamespace(
+                    ids=[int(word in query_words) for word in query_words + text_words],
+                    attention_mask=[1] * (len(query_words) + len(text_words)),
+                    type_ids=[0] * len(query_words) + [1] * len(text_words),
+                )
+            )
+        width = max(len(encoding.ids) for encoding in encodings)
+        for encoding in encodings:
+            padding = width - len(encoding.ids)
+            encoding.ids += [0] * padding
+            encoding.attention_mask += [0] * padding
+            encoding.type_ids += [0] * padding
+        return encodings
+
+
+class FakeCrossEncoder:
+    """Two-class model whose relevant logit counts query words in the chunk."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def get_inputs(self):
+        return [
+            SimpleNamespace(name="input_ids"),
+            SimpleNamespace(name="attention_mask"),
+            SimpleNamespace(name="token_type_ids"),
+        ]
+
+    def run(self, outputs, feeds):
+        self.batch_sizes.append(len(feeds["input_ids"]))
+        relevant = (feeds["input_ids"] * feeds["token_type_ids"]).sum(axis=1)
+        return [np.stack([-relevant, relevant], axis=1).astype(np.float32)]
+
+
+def test_cross_encoder_reranker_scores_pairs_in_batches():
+    session = FakeCrossEncoder()
+    config = CrossEncoderRerankerConfig(
+        model_path="model.onnx", tokenizer_path="tokenizer.json", batch_size=3
+    )
+    with (
+        patch.object(CrossEncoderReranker, "_load_session", return_value=session),
+        patch.object(
+            CrossEncoderReranker, "_load_tokenizer", return_value=FakePairTokenizer()
+        ),
+    ):
+        reranker = CrossEncoderReranker(config)
+
+    docs = reranker.rerank("replace the toner cartridge", DOCS, k=2)
+
+    assert [doc["index"] for doc in docs] == [2, 1]
+    assert docs[0]["rerank_score"] == 5.0
+    assert session.batch_sizes == [3, 1]
+    assert reranker.score_batch("query", []) == []
@@ -1,3 +1,4 @@
+import pytest
 from src.text_splitter.recursive_splitter import RecursiveTextSplitter
 
 
@@ -8,8 +9,34 @@ def test_recursive_splitter_init():
 
 
 def test_recursive_splitter_split():
-    splitter = RecursiveTextSplitter(chunk_size=10, chunk_overlap=2)
+    splitter = RecursiveTextSplitter(chunk_size=4, chunk_overlap=1)
     text = "This is a test text for splitting."
     chunks = splitter.split_text(text)
-    assert len(chunks) > 0
-    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert chunks == ["This is a test", "test text for", "for splitting."]
+
+
+def test_recursive_splitter_respects_boundaries():
+    splitter = RecursiveTextSplitter(chunk_size=6, chunk_overlap=0)
+    text = "First sentence is here. Second one follows.\n\nA new paragraph."
+    offsets = splitter.split_offsets(text)
+    assert [text[start:end] for start, end in offsets] == [
+        "First sentence is here.",
+        "Second one follows.",
+        "A new paragraph.",
+    ]
+
+
+def test_recursive_splitter_terminates_with_long_tokens():
+    splitter = RecursiveTextSplitter(chunk_size=3, chunk_overlap=2)
+    text = "x" * 50 + " " + "a.b.c.d.e.f"
+    chunks = splitter.split_text(text)
+    assert chunks == ["x" * 50, "a.b", ".c.", "d.e", ".f"]
+    assert splitter.split_text("   ") == []
+
+
+@pytest.mark.parametrize(
+    "chunk_size, chunk_overlap", [(0, 0), (10, 10), (10, 20), (10, -1)]
+)
+def test_recursive_splitter_rejects_invalid_sizes(chunk_size, chunk_overlap):
+    with pytest.raises(ValueError):
+        RecursiveTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
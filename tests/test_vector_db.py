@@ -1,20 +1,33 @@
+import json
+import os
+import faiss
+import numpy as np
+import pytest
 from unittest.mock import patch, Mock
+from src.config.vector_db_config import FAISSConfig, ShardedFAISSConfig
 from src.vector_db.faiss_db import FAISSVectorDB
+from src.vector_db.sharded_faiss_db import ShardedFAISSVectorDB
+from src.vector_db.mapped_sequence import MappedSequence
+from src.vector_db.metadata_columns import MetadataColumns
 
 
 def test_faiss_db_init(mock_faiss_config):
     db = FAISSVectorDB(mock_faiss_config)
-    assert db.file_path == "/tmp/test.index"
+    assert db.file_path == mock_faiss_config.index_path
     assert db.index is None
     assert db.dimension is None
     assert db.texts == []
 
 
-@patch("faiss.IndexFlatL2")
+@patch("faiss.IndexIDMap")
+@patch("faiss.IndexFlat")
 @patch("faiss.write_index")
-def test_faiss_db_add_embeddings(mock_write_index, mock_index_class, mock_faiss_config):
+def test_faiss_db_add_embeddings(
+    mock_write_index, mock_flat_class, mock_index_class, mock_faiss_config
+):
     mock_index = Mock()
     mock_index_class.return_value = mock_index
+    mock_write_index.side_effect = lambda index, path: open(path, "wb").close()
 
     db = FAISSVectorDB(mock_faiss_config)
     embeddings = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
@@ -24,5 +37,601 @@ def test_faiss_db_add_embeddings(mock_write_index, mock_index_class, mock_faiss_
 
     assert db.dimension == 3
     assert db.texts == ["doc1", "doc2"]
-    mock_index.add.assert_called_once()
-    mock_write_index.assert_called_once_with(mock_index, "/tmp/test.index")
+    mock_flat_class.assert_called_once_with(3, faiss.METRIC_L2)
+    mock_index_class.assert_called_once_with(mock_flat_class.return_value)
+    mock_index.add_with_ids.assert_called_once()
+    mock_write_index.assert_not_called()
+
+    db.flush()
+    mock_write_index.assert_called_once_with(
+        mock_index, f"{mock_faiss_config.index_path}.tmp"
+    )
+    assert os.path.exists(mock_faiss_config.index_path)
+
+
+def test_faiss_db_reloads_saved_index(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings(
+        [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]],
+        [{"text": "doc1", "page": 1}, {"text": "dóc2"}],
+    )
+
+    reloaded = FAISSVectorDB(config)
+    assert reloaded.dimension == 3
+    assert reloaded.index.ntotal == 2
+    assert reloaded.texts == ["doc1", "dóc2"]
+    assert list(reloaded.metadata) == [{"page": 1}, {}]
+
+    results = reloaded.search([0.1, 0.2, 0.3], k=5)
+    assert [r["text"] for r in results] == ["doc1", "dóc2"]
+    assert results[0]["page"] == 1
+
+
+def test_faiss_db_rejects_mismatched_chunk_store(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings([[0.1, 0.2, 0.3]], [{"text": "doc1"}])
+    db.flush()
+    os.remove(db.metadata_codes_path)
+
+    with pytest.raises(ValueError):
+        FAISSVectorDB(config)
+
+
+def test_faiss_db_delete_and_replace_by_id(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings(
+        [[0.0, 0.0], [1.0, 1.0], [2.0, 2.0]],
+        [{"text": "a"}, {"text": "b"}, {"text": "c"}],
+        ids=[10, 20, 30],
+    )
+
+    db.delete_embeddings([20])
+    assert len(db.ids) == 2
+    assert db.texts == ["a", "c"]
+    assert [r["index"] for r in db.search([1.0, 1.0], k=5)] == [10, 30]
+
+    db.add_embeddings([[5.0, 5.0]], [{"text": "c2"}], ids=[30])
+    assert db.ids.tolist() == [10, 30]
+    assert db.search([5.0, 5.0], k=1)[0]["text"] == "c2"
+
+    assert [r["text"] for r in db.get_by_ids([30, 99, 10])] == ["c2", "a"]
+
+    reloaded = FAISSVectorDB(config)
+    assert reloaded.ids.tolist() == [10, 30]
+    assert reloaded.search([0.0, 0.0], k=1)[0]["text"] == "a"
+
+
+def test_faiss_db_appends_new_ids_without_removal(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    vectors = np.random.default_rng(0).random((3000, 4), dtype=np.float32)
+    with patch.object(db, "_apply_delete") as apply_delete:
+        for start in range(0, 3000, 100):
+            db.add_embeddings(
+                vectors[start : start + 100].tolist(),
+                [{"text": str(i)} for i in range(start, start + 100)],
+                ids=list(range(start, start + 100)),
+            )
+        apply_delete.assert_not_called()
+    assert db.ids.tolist() == list(range(3000))
+    assert db.get_by_ids([2999, 0])[0]["text"] == "2999"
+
+    db.add_embeddings([[0.0] * 4], [{"text": "new"}])
+    db.add_embeddings([[0.0] * 4], [{"text": "replaced"}], ids=[5])
+    assert db.ids[-2:].tolist() == [3000, 5]
+    assert db.get_by_ids([5])[0]["text"] == "replaced"
+    assert len(db.ids) == 3001
+    db.flush()
+    assert db.index.ntotal == 3001
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_faiss_db_tombstones_deleted_vectors(tmp_path, index_type):
+    index_path = str(tmp_path / "test.index")
+    config = FAISSConfig(
+        index_path=index_path,
+        index_type=index_type,
+        nlist=2,
+        nprobe=2,
+        training_sample_size=50,
+    )
+    vectors = np.random.default_rng(0).random((50, 4), dtype=np.float32)
+    db = FAISSVectorDB(config)
+    db.add_embeddings(
+        vectors.tolist(),
+        [{"text": f"doc{i}", "page": i % 2} for i in range(50)],
+        ids=list(range(50)),
+    )
+
+    with patch.object(db, "_create_index") as create_index:
+        db.delete_embeddings([3])
+        db.add_embeddings([vectors[4].tolist()], [{"text": "new4", "page": 1}], ids=[4])
+        create_index.assert_not_called()
+    assert [r["index"] for r in db.search(vectors[3].tolist(), k=50)].count(3) == 0
+    assert [r["text"] for r in db.search(vectors[4].tolist(), k=50)].count("new4") == 1
+    assert 4 not in [
+        r["index"] for r in db.search(vectors[4].tolist(), k=50, where={"page": 0})
+    ]
+    assert len(db.ids) == len(db.texts) == len(db.metadata) == 49
+    db.flush()
+
+    for read_only in (False, True):
+        reloaded = FAISSVectorDB(config.model_copy(update={"read_only": read_only}))
+        results = reloaded.search(vectors[4].tolist(), k=50)
+        assert [r["index"] for r in results].count(3) == 0
+        assert [r["text"] for r in results if r["index"] == 4] == ["new4"]
+        assert len(reloaded.ids) == 49
+    if index_type == "hnsw":
+        # One deleted vector in fifty stays a tombstone in the graph
+        assert reloaded.index.ntotal == 51
+    else:
+        assert reloaded.index.ntotal == 49
+
+
+def test_faiss_db_rebuilds_hnsw_past_deleted_fraction(tmp_path):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"),
+        index_type="hnsw",
+        max_deleted_fraction=0.2,
+    )
+    vectors = np.random.default_rng(0).random((20, 4), dtype=np.float32)
+    db = FAISSVectorDB(config)
+    db.add_embeddings(vectors.tolist(), [{"text": str(i)} for i in range(20)])
+
+    db.delete_embeddings([0, 1, 2])
+    db.flush()
+    assert db.index.ntotal == 20
+    db.delete_embeddings([3, 4])
+    db.flush()
+    assert db.index.ntotal == 15
+    assert db.ids.tolist() == list(range(5, 20))
+    assert db.search(vectors[7].tolist(), k=1)[0]["text"] == "7"
+    assert not os.path.getsize(db.deleted_path)
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "ivf_pq", "hnsw"])
+def test_faiss_db_approximate_index_types(tmp_path, index_type):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"),
+        index_type=index_type,
+        nlist=4,
+        nprobe=4,
+        pq_m=4,
+        pq_nbits=4,
+        training_sample_size=300,
+    )
+    vectors = np.random.default_rng(0).random((300, 8), dtype=np.float32)
+    db = FAISSVectorDB(config)
+    db.add_embeddings(vectors.tolist(), [{"text": str(i)} for i in range(300)])
+
+    results = db.search(vectors[7].tolist(), k=3, nprobe=4, ef_search=32)
+    assert len(results) == 3
+    assert "7" in [r["text"] for r in results]
+
+    db.delete_embeddings([7])
+    assert len(db.ids) == 299
+    assert "7" not in [r["text"] for r in db.search(vectors[7].tolist(), k=3)]
+
+    reloaded = FAISSVectorDB(config)
+    assert len(reloaded.ids) == 299
+    assert len(reloaded.search(vectors[8].tolist(), k=3)) == 3
+
+
+def test_faiss_db_stages_vectors_until_ivf_can_be_trained(tmp_path, caplog):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"),
+        index_type="ivf_flat",
+        nlist=4,
+        nprobe=4,
+        training_sample_size=1000,
+    )
+    vectors = np.random.default_rng(0).random((1000, 8), dtype=np.float32)
+    db = FAISSVectorDB(config)
+    for start in range(0, 1000, 100):
+        assert isinstance(db.index, (type(None), faiss.IndexIDMap))
+        db.add_embeddings(
+            vectors[start : start + 100].tolist(),
+            [{"text": str(i)} for i in range(start, start + 100)],
+        )
+    ivf = faiss.extract_index_ivf(db.index)
+    assert ivf.nlist == 4 and ivf.ntotal == 1000
+    assert db.search(vectors[7].tolist(), k=1)[0]["text"] == "7"
+
+    # A checkpoint trains once 39 vectors per cell are stored
+    small = FAISSVectorDB(
+        config.model_copy(update={"index_path": str(tmp_path / "small.index")})
+    )
+    small.add_embeddings(vectors[:100].tolist(), [{"text": ""}] * 100)
+    small.flush()
+    assert isinstance(small.index, faiss.IndexIDMap)
+    small.add_embeddings(vectors[100:160].tolist(), [{"text": ""}] * 60)
+    small.flush()
+    assert faiss.extract_index_ivf(small.index).nlist == 4
+    assert isinstance(FAISSVectorDB(small.config).index, faiss.IndexIVFFlat)
+
+    # nlist is kept, with a warning, when the sample is too small for it
+    few = FAISSVectorDB(
+        config.model_copy(
+            update={
+                "index_path": str(tmp_path / "few.index"),
+                "training_sample_size": 8,
+            }
+        )
+    )
+    few.add_embeddings(vectors[:8].tolist(), [{"text": ""}] * 8)
+    assert faiss.extract_index_ivf(few.index).nlist == 4
+    assert "at least 156 are recommended" in caplog.text
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+@pytest.mark.parametrize("storage", ["float16", "sq8"])
+def test_faiss_db_cosine_metric_reduced_precision(tmp_path, index_type, storage):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"),
+        index_type=index_type,
+        metric="cosine",
+        storage=storage,
+        nlist=4,
+        nprobe=4,
+    )
+    vectors = np.random.default_rng(0).normal(size=(300, 8)).astype(np.float32)
+    db = FAISSVectorDB(config)
+    db.add_embeddings(vectors * 10, [{"text": str(i)} for i in range(300)])
+
+    # Scaling does not change cosine similarity
+    results = db.search((vectors[7] * 0.5).tolist(), k=3)
+    assert results[0]["text"] == "7"
+    assert results[0]["distance"] == pytest.approx(1.0, abs=0.02)
+    assert results[0]["distance"] >= results[1]["distance"]
+
+    db.flush()
+    reloaded = FAISSVectorDB(config)
+    assert reloaded.search(vectors[8].tolist(), k=1)[0]["text"] == "8"
+    with pytest.raises(ValueError, match="different metric"):
+        FAISSVectorDB(config.model_copy(update={"metric": "l2"}))
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_faiss_db_trains_sq8_on_staged_batches(tmp_path, index_type):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"),
+        index_type=index_type,
+        storage="sq8",
+        training_sample_size=200,
+    )
+    rng = np.random.default_rng(0)
+    first = rng.random((100, 8), dtype=np.float32)
+    # Outside the value range of the first batch
+    second = rng.random((100, 8), dtype=np.float32) * 10 + 5
+    db = FAISSVectorDB(config)
+
+    db.add_embeddings(first.tolist(), [{"text": f"a{i}"} for i in range(100)])
+    assert isinstance(faiss.downcast_index(db.index.index), faiss.IndexFlat)
+    db.add_embeddings(second.tolist(), [{"text": f"b{i}"} for i in range(100)])
+    assert not isinstance(faiss.downcast_index(db.index.index), faiss.IndexFlat)
+
+    results = db.search_batch(second.tolist(), k=1)
+    assert [r[0]["text"] for r in results] == [f"b{i}" for i in range(100)]
+
+
+def test_faiss_db_storage_reduces_index_size(tmp_path):
+    vectors = np.random.default_rng(0).random((1000, 64), dtype=np.float32)
+    sizes = {}
+    for storage in ("float32", "float16", "sq8"):
+        config = FAISSConfig(
+            index_path=str(tmp_path / f"{storage}.index"), storage=storage
+        )
+        db = FAISSVectorDB(config)
+        db.add_embeddings(vectors, [{"text": ""}] * len(vectors))
+        db.flush()
+        sizes[storage] = os.path.getsize(config.index_path)
+    assert sizes["float16"] < 0.6 * sizes["float32"]
+    assert sizes["sq8"] < 0.35 * sizes["float32"]
+
+
+def test_faiss_db_replays_log_and_checkpoints(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings([[0.0, 0.0], [1.0, 1.0]], [{"text": "a"}, {"text": "b"}])
+    db.delete_embeddings([0])
+    assert not os.path.exists(config.index_path)
+
+    replayed = FAISSVectorDB(config)
+    assert replayed.texts == ["b"]
+    assert replayed.ids.tolist() == [1]
+
+    replayed.flush()
+    assert os.path.exists(config.index_path)
+    assert not os.path.exists(replayed.log.path)
+    assert FAISSVectorDB(config).texts == ["b"]
+
+
+def test_faiss_db_ignores_torn_log_record(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings([[0.0, 0.0]], [{"text": "a"}])
+    db.add_embeddings([[1.0, 1.0]], [{"text": "b"}])
+    size = os.path.getsize(db.log.path)
+    with open(db.log.path, "r+b") as file:
+        file.truncate(size - 3)
+
+    recovered = FAISSVectorDB(config)
+    assert recovered.texts == ["a"]
+    recovered.add_embeddings([[2.0, 2.0]], [{"text": "c"}])
+    assert FAISSVectorDB(config).texts == ["a", "c"]
+
+
+def test_faiss_db_rolls_interrupted_checkpoint_forward(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings([[0.0, 0.0]], [{"text": "a"}])
+    db.flush()
+    db.add_embeddings([[1.0, 1.0]], [{"text": "b"}])
+
+    with patch.object(FAISSVectorDB, "_commit_checkpoint"):
+        db.flush()
+    assert os.path.exists(db.checkpoint_path)
+    assert FAISSVectorDB(config).texts == ["a", "b"]
+    assert not os.path.exists(db.checkpoint_path)
+
+
+def test_faiss_db_autosaves_after_pending_changes(tmp_path):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"), autosave_vectors=3, autosave_seconds=0
+    )
+    db = FAISSVectorDB(config)
+    db.add_embeddings([[0.0, 0.0], [1.0, 1.0]], [{"text": "a"}, {"text": "b"}])
+    assert not os.path.exists(config.index_path)
+    db.add_embeddings([[2.0, 2.0]], [{"text": "c"}])
+    assert os.path.exists(config.index_path)
+    assert not os.path.exists(db.log.path)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_faiss_db_read_only_memory_mapped(tmp_path, index_type):
+    index_path = str(tmp_path / "test.index")
+    vectors = np.random.default_rng(0).random((50, 4), dtype=np.float32)
+    writer = FAISSVectorDB(
+        FAISSConfig(
+            index_path=index_path,
+            index_type=index_type,
+            nlist=2,
+            nprobe=2,
+            training_sample_size=50,
+        )
+    )
+    writer.add_embeddings(
+        vectors.tolist(),
+        [{"text": f"dóc{i}", "page": i} for i in range(50)],
+        ids=list(range(100, 150)),
+    )
+    writer.flush()
+    expected = writer.search(vectors[3].tolist(), k=3)
+
+    reader = FAISSVectorDB(
+        FAISSConfig(
+            index_path=index_path, index_type=index_type, nprobe=2, read_only=True
+        )
+    )
+    assert isinstance(reader.texts, MappedSequence)
+    assert len(reader.texts) == 50
+    assert reader.texts[-1] == "dóc49"
+    assert reader.metadata[3] == {"page": 3}
+    assert reader.search(vectors[3].tolist(), k=3) == expected
+
+    with pytest.raises(ValueError):
+        reader.add_embeddings([[0.0, 0.0, 0.0, 0.0]], [{"text": "x"}])
+    with pytest.raises(ValueError):
+        reader.delete_embeddings([100])
+
+
+def test_faiss_db_read_only_requires_checkpoint(tmp_path):
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"), read_only=True)
+    with pytest.raises(FileNotFoundError):
+        FAISSVectorDB(config)
+
+
+def test_mapped_sequence(tmp_path):
+    blob_path, offsets_path = tmp_path / "blob", tmp_path / "offsets"
+    blob_path.write_bytes(b"abcde")
+    np.array([0, 2, 2, 5], dtype=np.int64).tofile(offsets_path)
+
+    with MappedSequence(str(blob_path), str(offsets_path), bytes.decode) as records:
+        assert len(records) == 3
+        assert list(records) == ["ab", "", "cde"]
+        assert records[1:] == ["", "cde"]
+        with pytest.raises(IndexError):
+            records[3]
+
+
+def test_faiss_db_search_batch_matches_search(tmp_path):
+    db = FAISSVectorDB(FAISSConfig(index_path=str(tmp_path / "test.index")))
+    vectors = np.random.default_rng(0).random((20, 4), dtype=np.float32)
+    db.add_embeddings(vectors.tolist(), [{"text": str(i)} for i in range(20)])
+
+    queries = vectors[[3, 11, 17]].tolist()
+    assert db.search_batch(queries, k=4) == [db.search(q, k=4) for q in queries]
+    assert db.search_batch([], k=4) == []
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_sharded_faiss_db_matches_single_index(tmp_path, metric):
+    vectors = np.random.default_rng(0).random((200, 8), dtype=np.float32)
+    metadata = [{"text": str(i)} for i in range(200)]
+    single = FAISSVectorDB(
+        FAISSConfig(index_path=str(tmp_path / "single.index"), metric=metric)
+    )
+    single.add_embeddings(vectors.tolist(), metadata)
+    sharded = ShardedFAISSVectorDB(
+        ShardedFAISSConfig(
+            index_path=str(tmp_path / "sharded.index"), metric=metric, num_shards=4
+        )
+    )
+    sharded.add_embeddings(vectors.tolist(), metadata)
+
+    assert all(len(shard.ids) for shard in sharded.shards)
+    assert sorted(sharded.ids.tolist()) == list(range(200))
+    queries = vectors[[3, 50, 199]].tolist()
+    assert [
+        [r["index"] for r in results] for results in sharded.search_batch(queries, k=10)
+    ] == [
+        [r["index"] for r in results] for results in single.search_batch(queries, k=10)
+    ]
+    assert sharded.search(queries[0], k=1)[0]["text"] == "3"
+
+
+def test_sharded_faiss_db_delete_get_and_reload(tmp_path):
+    config = ShardedFAISSConfig(index_path=str(tmp_path / "test.index"), num_shards=3)
+    db = ShardedFAISSVectorDB(config)
+    db.add_embeddings(
+        [[0.0, 0.0], [1.0, 1.0], [2.0, 2.0]],
+        [{"text": "a"}, {"text": "b"}, {"text": "c"}],
+        ids=[10, 20, 30],
+    )
+    db.delete_embeddings([20])
+    db.add_embeddings([[5.0, 5.0]], [{"text": "c2"}], ids=[30])
+
+    assert [r["index"] for r in db.search([1.0, 1.0], k=5)] == [10, 30]
+    assert [r["text"] for r in db.get_by_ids([30, 99, 10])] == ["c2", "a"]
+    db.flush()
+
+    reloaded = ShardedFAISSVectorDB(config)
+    assert sorted(reloaded.ids.tolist()) == [10, 30]
+    assert sorted(reloaded.texts) == ["a", "c2"]
+    assert reloaded.search([0.0, 0.0], k=1)[0]["text"] == "a"
+    assert all(
+        os.path.exists(f"{config.index_path}.shard{shard}")
+        or not len(db.shards[shard].ids)
+        for shard in range(3)
+    )
+    with pytest.raises(ValueError, match="shards"):
+        ShardedFAISSVectorDB(config.model_copy(update={"num_shards": 2}))
+
+
+def test_metadata_columns_filters(tmp_path):
+    records = [
+        {"source": "a.pdf", "page": 1, "tags": ["intro", "setup"]},
+        {"source": "a.pdf", "page": 2},
+        {"source": "b.pdf", "page": 3, "tags": ["setup"]},
+        {"page": "iv"},
+    ]
+    columns = MetadataColumns.from_records(records)
+
+    def rows(where):
+        return np.flatnonzero(columns.mask(where)).tolist()
+
+    assert rows({"source": "a.pdf"}) == [0, 1]
+    assert rows({"source": "a.pdf", "page": {"$gt": 1}}) == [1]
+    assert rows({"page": {"$gte": 2, "$lt": 3}}) == [1]
+    assert rows({"tags": "setup"}) == [0, 2]
+    assert rows({"tags": {"$in": ["intro", "faq"]}}) == [0]
+    assert rows({"source": {"$ne": "a.pdf"}}) == [2, 3]
+    assert rows({"source": {"$nin": ["a.pdf", "b.pdf"]}}) == [3]
+    assert rows({"$or": [{"page": 3}, {"tags": "intro"}]}) == [0, 2]
+    assert rows({"$and": [{"page": {"$lte": 3}}, {"$not": {"source": "b.pdf"}}]}) == [
+        0,
+        1,
+    ]
+    assert rows({"missing": 1}) == []
+    with pytest.raises(ValueError):
+        columns.mask({"page": {"$like": 1}})
+
+    columns.retain(np.array([True, False, True, True]))
+    codes, values = columns.encode()
+    codes.tofile(tmp_path / "codes")
+    (tmp_path / "values").write_text(json.dumps(values))
+    loaded = MetadataColumns.load(str(tmp_path / "codes"), str(tmp_path / "values"))
+    assert list(loaded) == [records[0], records[2], records[3]]
+    assert values["columns"]["page"] == [1, 3, "iv"]
+
+
+def test_metadata_columns_extend_in_batches():
+    columns = MetadataColumns()
+    records = [{"page": i % 3} for i in range(3000)]
+    for start in range(0, 3000, 7):
+        columns.extend(records[start : start + 7])
+    columns.extend([{"page": 1, "source": "late.pdf"}])
+
+    assert len(columns) == 3001
+    assert np.flatnonzero(columns.mask({"page": 2}))[:2].tolist() == [2, 5]
+    assert np.flatnonzero(columns.mask({"source": "late.pdf"})).tolist() == [3000]
+
+    columns.retain(np.arange(3001) >= 2999)
+    columns.extend([{"source": "later.pdf"}])
+    assert list(columns) == [
+        {"page": 2},
+        {"page": 1, "source": "late.pdf"},
+        {"source": "later.pdf"},
+    ]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat", "ivf_pq"])
+def test_faiss_db_filtered_search(tmp_path, index_type):
+    config = FAISSConfig(
+        index_path=str(tmp_path / "test.index"),
+        index_type=index_type,
+        nlist=4,
+        nprobe=4,
+        pq_m=4,
+        pq_nbits=4,
+        training_sample_size=200,
+    )
+    db = FAISSVectorDB(config)
+    vectors = np.random.default_rng(0).random((200, 8), dtype=np.float32)
+    metadata = [
+        {"text": str(i), "source": f"{i % 5}.pdf", "page": i % 7} for i in range(200)
+    ]
+    ids = [i * 7919 + 2**40 for i in range(200)]
+    db.add_embeddings(vectors.tolist(), metadata, ids=ids)
+    where = {"source": "2.pdf", "page": {"$gte": 3}}
+
+    results = db.search(vectors[0].tolist(), k=5, where=where)
+
+    assert len(results) == 5
+    assert all(r["source"] == "2.pdf" and r["page"] >= 3 for r in results)
+    assert all(r["index"] == ids[int(r["text"])] for r in results)
+    assert db.search(vectors[0].tolist(), k=5, where={"source": "9.pdf"}) == []
+    listed = db.search(vectors[0].tolist(), k=5, where=where, ids=ids[10:20])
+    assert {int(r["text"]) for r in listed} == {12, 17}
+    if index_type == "flat":
+        matching = [i for i in range(200) if i % 5 == 2 and i % 7 >= 3]
+        distances = ((vectors[matching] - vectors[0]) ** 2).sum(axis=1)
+        expected = [matching[i] for i in np.argsort(distances)[:5]]
+        assert [int(r["text"]) for r in results] == expected
+
+
+def test_faiss_db_filtered_search_read_only_and_sharded(tmp_path):
+    vectors = np.random.default_rng(0).random((50, 4), dtype=np.float32)
+    metadata = [
+        {"text": str(i), "tags": ["even" if i % 2 else "odd"]} for i in range(50)
+    ]
+    config = FAISSConfig(index_path=str(tmp_path / "test.index"))
+    db = FAISSVectorDB(config)
+    db.add_embeddings(vectors.tolist(), metadata)
+    db.flush()
+    sharded = ShardedFAISSVectorDB(
+        ShardedFAISSConfig(index_path=str(tmp_path / "sharded.index"), num_shards=3)
+    )
+    sharded.add_embeddings(vectors.tolist(), metadata)
+    reader = FAISSVectorDB(config.model_copy(update={"read_only": True}))
+
+    expected = db.search_batch(vectors[:3].tolist(), k=4, where={"tags": "odd"})
+    assert all(r["tags"] == ["odd"] for results in expected for r in results)
+    assert reader.search_batch(vectors[:3].tolist(), k=4, where={"tags": "odd"}) == (
+        expected
+    )
+    assert [
+        [r["index"] for r in results]
+        for results in sharded.search_batch(
+            vectors[:3].tolist(), k=4, where={"tags": "odd"}
+        )
+    ] == [[r["index"] for r in results] for results in expected]
+
+    odd = list(range(0, 50, 2))
+    db.delete_embeddings([0])
+    assert db.ids_matching({"tags": "odd"}).tolist() == odd[1:]
+    assert reader.ids_matching({"tags": "odd"}).tolist() == odd
+    assert sorted(sharded.ids_matching({"tags": "odd"}).tolist()) == odd